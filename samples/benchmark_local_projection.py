@@ -0,0 +1,69 @@
+"""
+   This sample compares projecting geometries on the client with
+   arcrest.common.projection against the project operation of a geometry
+   service.  Both paths project the same polygons from WGS84 (4326) to
+   Web Mercator (3857) and the largest difference between their
+   coordinates is printed with the timings.
+
+   Python 3.x
+   ArcREST 3.5.9
+   Requires NumPy
+"""
+from __future__ import print_function
+import math
+import time
+from arcrest.security import AGOLTokenSecurityHandler
+from arcrest.geometryservice import GeometryService
+from arcrest.common.geometry import Polygon
+from arcrest.common import projection
+
+def make_polygons(count, vertices):
+    """builds count circles of the given number of vertices over Europe"""
+    polygons = []
+    for i in range(count):
+        cx = -10.0 + (i % 40)
+        cy = 35.0 + (i // 40) % 30
+        ring = [[cx + 0.4 * math.cos(2 * math.pi * k / vertices),
+                 cy + 0.4 * math.sin(2 * math.pi * k / vertices)]
+                for k in range(vertices)]
+        ring.append(ring[0])
+        polygons.append(Polygon(rings=[ring[::-1]], wkid=4326))
+    return polygons
+
+if __name__ == "__main__":
+    username = "<username>"
+    password = "<password>"
+    url = "<URL to a Geometry Service>"
+    proxy_port = None
+    proxy_url = None
+    count = 200
+    vertices = 500
+
+    sh = AGOLTokenSecurityHandler(username=username,
+                                  password=password)
+    gs = GeometryService(url=url,
+                         securityHandler=sh,
+                         proxy_url=proxy_url,
+                         proxy_port=proxy_port)
+    polygons = make_polygons(count, vertices)
+
+    start = time.time()
+    local = projection.project(polygons, 4326, 3857)
+    local_time = time.time() - start
+
+    start = time.time()
+    remote = gs.project(geometries=polygons, inSR=4326, outSR=3857,
+                        local_projection=False)
+    remote_time = time.time() - start
+
+    difference = 0.0
+    for a, b in zip(local, remote['geometries']):
+        for ra, rb in zip(a.asDictionary['rings'], b['rings']):
+            for pa, pb in zip(ra, rb):
+                difference = max(difference,
+                                 abs(pa[0] - pb[0]), abs(pa[1] - pb[1]))
+    print("%s polygons of %s vertices" % (count, vertices))
+    print("local:  %.3f seconds" % local_time)
+    print("remote: %.3f seconds" % remote_time)
+    print("speed up: %.0fx" % (remote_time / max(local_time, 1e-9)))
+    print("largest coordinate difference: %.6f meters" % difference)
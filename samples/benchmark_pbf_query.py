@@ -0,0 +1,61 @@
+"""
+   This sample compares the JSON (f=json) and protocol buffer (f=pbf)
+   responses of the same feature layer query.  Both responses are
+   downloaded once, then the payload sizes and the time to decode each
+   into a FeatureSet are printed.  The layer must list PBF in its
+   supportedQueryFormats.
+
+   Python 3.x
+   ArcREST 3.5.9
+   Requires NumPy
+"""
+from __future__ import print_function
+import json
+import time
+from arcrest.security import AGOLTokenSecurityHandler
+from arcrest.agol import FeatureLayer
+from arcrest.common import pbf
+from arcrest.common.general import FeatureSet
+
+def timed(function, repeat=5):
+    """returns the average run time of function in seconds"""
+    start = time.time()
+    for _ in range(repeat):
+        function()
+    return (time.time() - start) / repeat
+
+if __name__ == "__main__":
+    username = "<username>"
+    password = "<password>"
+    url = "<URL to a feature layer>"
+    proxy_port = None
+    proxy_url = None
+    record_count = 2000
+
+    sh = AGOLTokenSecurityHandler(username=username,
+                                  password=password)
+    fl = FeatureLayer(url=url,
+                      securityHandler=sh,
+                      proxy_url=proxy_url,
+                      proxy_port=proxy_port)
+    print("supported query formats: %s" % fl.supportedQueryFormats)
+    params = fl._query_params(resultRecordCount=record_count)
+    fl._pbf_params(params)
+    params['f'] = "pbf"
+    pbf_body = fl._post(url=fl.url + "/query", param_dict=params,
+                        securityHandler=sh, proxy_url=proxy_url,
+                        proxy_port=proxy_port)
+    # the same quantization makes both responses carry the same vertices
+    params['f'] = "json"
+    json_body = json.dumps(fl._post(url=fl.url + "/query", param_dict=params,
+                                    securityHandler=sh, proxy_url=proxy_url,
+                                    proxy_port=proxy_port)).encode("utf-8")
+
+    json_time = timed(lambda: FeatureSet.fromDict(
+        fl._decode_result(json.loads(json_body))))
+    pbf_time = timed(lambda: FeatureSet.fromDict(pbf.decode(pbf_body)))
+    print("JSON: %8d bytes, %.3f seconds" % (len(json_body), json_time))
+    print("PBF:  %8d bytes, %.3f seconds" % (len(pbf_body), pbf_time))
+    print("payload: %.1fx smaller, decode: %.1fx faster" %
+          (len(json_body) / float(len(pbf_body)),
+           json_time / max(pbf_time, 1e-9)))
@@ -0,0 +1,706 @@
+"""
+   Query planner choosing how the features of a large query are extracted
+   from a feature layer, see FeatureLayer.plan_query.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+import math
+import itertools
+import collections
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from ..web import _json as json
+
+__all__ = ["QueryPlan", "plan_query", "STRATEGIES"]
+
+STRATEGIES = ("single", "offset", "oid_range", "oid_list", "tiles")
+# above this many features deep resultOffset pages and returnIdsOnly
+# responses become slow, OID ranges are preferred when available
+_LARGE_LAYER = 1000000
+_DEFAULT_PAGE_SIZE = 1000
+# object ID ranges aim at this share of a page, ranges denser than the
+# average then rarely exceed the transfer limit
+_RANGE_FILL = 0.7
+# tiles are not split further below this depth (1/4**16 of the extent),
+# ex: for many features on the same point
+_MAX_DEPTH = 16
+_FILTERS = ('where', 'timeFilter', 'geometryFilter', 'gdbVersion',
+            'distance', 'units')
+#----------------------------------------------------------------------
+def _layer_info(layer):
+    """returns the resource dictionary of the layer, loading it once"""
+    info = getattr(layer, '_json_dict', None)
+    if not isinstance(info, dict):
+        layer.maxRecordCount
+        info = getattr(layer, '_json_dict', None)
+    return info if isinstance(info, dict) else {}
+#----------------------------------------------------------------------
+def _capability(info, name):
+    """returns a query capability of the layer resource as a boolean"""
+    advanced = info.get('advancedQueryCapabilities') or {}
+    return bool(advanced.get(name, info.get(name, False)))
+#----------------------------------------------------------------------
+def _filters(query):
+    """returns the parameters of query selecting the features"""
+    return dict((k, v) for k, v in query.items() if k in _FILTERS)
+#----------------------------------------------------------------------
+def _oid_statistics(layer, query, oidField):
+    """
+    returns the minimum and maximum object IDs and the number of the
+    features matching query, from one outStatistics request.  The values
+    are None if no feature matches.
+    """
+    params = _filters(query)
+    params.update(returnGeometry=False, as_json=True,
+                  outStatistics=json.dumps([
+                      {"statisticType" : statistic,
+                       "onStatisticField" : oidField,
+                       "outStatisticFieldName" : "%sOID" % statistic.upper()}
+                      for statistic in ("min", "max", "count")]))
+    features = layer.query(**params).get('features') or [{}]
+    values = dict((k.upper(), v) for k, v in
+                  features[0].get('attributes', {}).items())
+    if values.get('MINOID') is None:
+        return None, None, None
+    return (int(values['MINOID']), int(values['MAXOID']),
+            int(values['COUNTOID']) if values.get('COUNTOID') is not None
+            else None)
+#----------------------------------------------------------------------
+def _oid_where(where, oidField, start, end):
+    """returns where restricted to start <= object ID < end"""
+    bounds = "%s >= %d AND %s < %d" % (oidField, start, oidField, end)
+    if not where or where.strip() == "1=1":
+        return bounds
+    return "(%s) AND %s" % (where, bounds)
+#----------------------------------------------------------------------
+def _envelope_filter(xmin, ymin, xmax, ymax, spatialReference):
+    """returns the geometry filter parameters of an envelope"""
+    return {"geometry" : json.dumps({"xmin" : xmin, "ymin" : ymin,
+                                     "xmax" : xmax, "ymax" : ymax,
+                                     "spatialReference" : spatialReference}),
+            "geometryType" : "esriGeometryEnvelope",
+            "spatialRel" : "esriSpatialRelIntersects",
+            "inSR" : json.dumps(spatialReference)}
+#----------------------------------------------------------------------
+def _quarters(box):
+    """returns the four quarters of a (xmin, ymin, xmax, ymax) box"""
+    xmin, ymin, xmax, ymax = box
+    x = (xmin + xmax) / 2.0
+    y = (ymin + ymax) / 2.0
+    return [(xmin, ymin, x, y), (x, ymin, xmax, y),
+            (xmin, y, x, ymax), (x, y, xmax, ymax)]
+########################################################################
+class _ObjectIdBatches(object):
+    """
+    the requests of the oid_list strategy.  Only the object IDs are held,
+    the request of a batch is made when it is read.
+    """
+    _oids = None
+    _size = None
+    #----------------------------------------------------------------------
+    def __init__(self, oids, size):
+        """Constructor"""
+        self._oids = oids
+        self._size = size
+    #----------------------------------------------------------------------
+    def __len__(self):
+        """returns the number of batches"""
+        return (len(self._oids) + self._size - 1) // self._size
+    #----------------------------------------------------------------------
+    def __getitem__(self, index):
+        """returns the request of a batch"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("batch index out of range")
+        start = index * self._size
+        return {"objectIds" : ",".join(
+                    str(oid) for oid in self._oids[start:start + self._size]),
+                "where" : "1=1", "timeFilter" : None,
+                "geometryFilter" : None}
+########################################################################
+class QueryPlan(object):
+    """
+    The strategy chosen to extract the features of a query and the page
+    requests it makes.  Plans are made by FeatureLayer.plan_query, run
+    by execute (query_all) or iter_pages (iter_query), and explain()
+    tells why a strategy was picked.
+
+    Strategies:
+       single - all features fit in one page
+       offset - pages of resultOffset/resultRecordCount ordered by object
+          ID, needs supportsPagination
+       oid_range - where clauses on equal width object ID ranges between
+          the minimum and maximum object ID, needs supportsStatistics.
+          Unlike oid_list no request returns all the object IDs.
+       oid_list - the object IDs are fetched once and queried in batches
+       tiles - envelope filters over the layer's extent, for layers that
+          silently truncate at exceededTransferLimit.  Each tile is
+          counted first, tiles over the page size are split in four
+          until they fit, empty tiles are skipped, and the features on
+          tile edges are returned once.
+
+    Object ID ranges aim at 70% of a page.  A range that still exceeds
+    the transfer limit keeps its page when it holds the first object IDs
+    of the range, and the rest of the range is replaced by narrower
+    ranges from its min/max object IDs and count, refined again if
+    needed.  A page of the single or tiles strategies that still exceeds
+    the transfer limit is completed with the object IDs of its own
+    request.  After a run, statistics tells the number of pages and
+    features received and the coverage of the count of the query.
+    """
+    _layer = None
+    _strategy = None
+    _page_size = None
+    _workers = None
+    _count = None
+    _oidField = None
+    _query = None
+    _reasons = None
+    _metadata = None
+    _requests = None
+    _details = None
+    _statistics = None
+    #----------------------------------------------------------------------
+    def __init__(self, layer, strategy, page_size, workers, query,
+                 count=None, oidField=None, reasons=None, metadata=None,
+                 details=None):
+        """Constructor"""
+        if strategy not in STRATEGIES:
+            raise ValueError("strategy must be one of: %s" %
+                             ", ".join(STRATEGIES))
+        self._layer = layer
+        self._strategy = strategy
+        self._page_size = page_size
+        self._workers = max(1, workers)
+        self._query = query
+        self._count = count
+        self._oidField = oidField
+        self._reasons = reasons or []
+        self._metadata = metadata or {}
+        self._details = details or {}
+    #----------------------------------------------------------------------
+    @property
+    def strategy(self):
+        """gets the extraction strategy"""
+        return self._strategy
+    #----------------------------------------------------------------------
+    @property
+    def page_size(self):
+        """gets the number of features requested per page"""
+        return self._page_size
+    #----------------------------------------------------------------------
+    @property
+    def workers(self):
+        """gets/sets the number of pages fetched at the same time"""
+        return self._workers
+    #----------------------------------------------------------------------
+    @workers.setter
+    def workers(self, value):
+        """gets/sets the number of pages fetched at the same time"""
+        self._workers = max(1, int(value))
+    #----------------------------------------------------------------------
+    @property
+    def count(self):
+        """gets the number of features matching the query"""
+        return self._count
+    #----------------------------------------------------------------------
+    @property
+    def oidField(self):
+        """gets the object ID field of the layer"""
+        return self._oidField
+    #----------------------------------------------------------------------
+    @property
+    def reasons(self):
+        """gets the reasons for the chosen strategy"""
+        return self._reasons
+    #----------------------------------------------------------------------
+    @property
+    def ordered(self):
+        """gets if the pages return the features in object ID order"""
+        return self._strategy != "tiles"
+    #----------------------------------------------------------------------
+    @property
+    def statistics(self):
+        """
+        gets the statistics of the last run, None before: pages,
+        features, coverage (features received / count of the query), for
+        oid_range the ranges fetched and refined and for tiles the tiles
+        fetched, split and empty, the maximum depth and the duplicate
+        features of tile edges removed
+        """
+        return self._statistics
+    #----------------------------------------------------------------------
+    def explain(self):
+        """returns a description of the plan and why it was chosen"""
+        lines = ["strategy: %s" % self._strategy,
+                 "features: %s" % ("unknown" if self._count is None
+                                   else "{:,}".format(self._count)),
+                 "page size: %s" % self._page_size,
+                 "pages: %s" % self._pages(),
+                 "workers: %s" % self._workers]
+        for key in sorted(self._details):
+            lines.append("%s: %s" % (key, self._details[key]))
+        lines.append("layer: %s" % ", ".join(
+            "%s=%s" % (k, self._metadata[k]) for k in sorted(self._metadata)))
+        lines.append("reasons:")
+        lines.extend("  - %s" % reason for reason in self._reasons)
+        if self._statistics is not None:
+            lines.append("statistics:")
+            for key in sorted(self._statistics):
+                value = self._statistics[key]
+                if key == "coverage" and value is not None:
+                    value = "%.1f%%" % (value * 100)
+                lines.append("  %s: %s" % (key, value))
+        return "\n".join(lines)
+    #----------------------------------------------------------------------
+    def _pages(self):
+        """
+        returns the number of pages, estimated for an object ID list that
+        is not fetched yet
+        """
+        if self._requests is None and self._strategy == "oid_list":
+            return int(math.ceil((self._count or 0) / float(self._page_size)))
+        if self._strategy == "tiles":
+            return "adaptive, at least %d" % int(math.ceil(
+                (self._count or 0) / float(self._page_size)))
+        return len(self.requests())
+    #----------------------------------------------------------------------
+    def __str__(self):
+        """returns the explanation of the plan"""
+        return self.explain()
+    #----------------------------------------------------------------------
+    def requests(self):
+        """
+        returns the sequence of the query parameters each page adds to
+        (or replaces in) the query, in page order
+        """
+        if self._requests is None:
+            self._requests = getattr(self, "_%s_requests" % self._strategy)()
+        return self._requests
+    #----------------------------------------------------------------------
+    def _single_requests(self):
+        """one request for all features"""
+        return [{}]
+    #----------------------------------------------------------------------
+    def _offset_requests(self):
+        """resultOffset pages ordered by object ID"""
+        requests = []
+        for offset in range(0, max(self._count or 0, 1), self._page_size):
+            request = {"resultOffset" : offset,
+                       "resultRecordCount" : self._page_size}
+            if self._oidField:
+                request['orderByFields'] = "%s ASC" % self._oidField
+            if self._details.get('resultType'):
+                request['resultType'] = self._details['resultType']
+            requests.append(request)
+        return requests
+    #----------------------------------------------------------------------
+    def _oid_range_requests(self):
+        """where clauses on equal width object ID ranges"""
+        return [self._range_request(start, end)
+                for start, end in self._oid_ranges()]
+    #----------------------------------------------------------------------
+    def _oid_ranges(self):
+        """returns the (start, end) object ID ranges, end excluded"""
+        low = self._details['min OID']
+        high = self._details['max OID'] + 1
+        count = max(self._count or 1, 1)
+        # ranges a bit under a page at the average density of the OID
+        # space, so most ranges fit a page despite uneven densities
+        width = max(1, int(self._range_size() * (high - low) / float(count)))
+        return [(start, min(start + width, high))
+                for start in range(low, high, width)]
+    #----------------------------------------------------------------------
+    def _range_request(self, start, end):
+        """returns the where clause of an object ID range"""
+        return {"where" : _oid_where(self._query.get('where'),
+                                     self._oidField, start, end)}
+    #----------------------------------------------------------------------
+    def _range_size(self):
+        """returns the number of features aimed at per object ID range"""
+        return max(1, int(self._page_size * _RANGE_FILL))
+    #----------------------------------------------------------------------
+    def _range_count(self, start, end):
+        """returns the number of features matching the query in a range"""
+        query = dict(self._query)
+        query.update(self._range_request(start, end))
+        return self._layer.query(returnCountOnly=True,
+                                 **_filters(query)).get('count')
+    #----------------------------------------------------------------------
+    def _range(self, start, end):
+        """
+        returns (sub ranges, response) for an object ID range.  A range
+        over the transfer limit keeps the features of its page when they
+        are the first object IDs of the range (ordered by the server, or
+        verified with a count), and the min/max object IDs and count of
+        the rest of the range split it in ranges of under a page each.
+        """
+        request = self._range_request(start, end)
+        ordered = self._metadata.get('supportsOrderBy')
+        if ordered:
+            request['orderByFields'] = "%s ASC" % self._oidField
+        result = self._fetch(request, complete=False)
+        if not result.get('exceededTransferLimit') or end - start <= 1:
+            return None, result
+        features = result['features']
+        if features:
+            last = features[-1]['attributes'].get(self._oidField) + 1
+            if ordered or self._range_count(start, last) == len(features):
+                result.pop('exceededTransferLimit', None)
+                start = last
+            else:
+                result = None
+        else:
+            result = None
+        query = dict(self._query)
+        query.update(self._range_request(start, end))
+        low, high, count = _oid_statistics(self._layer, query, self._oidField)
+        if low is None:
+            return None, result
+        # the ranges cover the object IDs actually found in the range
+        start, end = low, high + 1
+        parts = int(math.ceil((count or self._page_size * 2) /
+                              float(self._range_size())))
+        if result is None:
+            # the range must get narrower
+            parts = max(2, parts)
+        parts = max(1, min(end - start, parts))
+        width = int(math.ceil((end - start) / float(parts)))
+        return [(first, min(first + width, end))
+                for first in range(start, end, width)], result
+    #----------------------------------------------------------------------
+    def _oid_list_requests(self):
+        """object ID batches of the IDs matching the query"""
+        return _ObjectIdBatches(self._query_ids(self._query), self._page_size)
+    #----------------------------------------------------------------------
+    def _tiles_requests(self):
+        """the envelope of the extent, split while the pages are fetched"""
+        return [self._tile_request(self._root())]
+    #----------------------------------------------------------------------
+    def _root(self):
+        """returns the (xmin, ymin, xmax, ymax) box of the extent"""
+        extent = self._details['extent']
+        return (extent['xmin'], extent['ymin'], extent['xmax'], extent['ymax'])
+    #----------------------------------------------------------------------
+    def _tile_request(self, box):
+        """returns the geometry filter of a tile"""
+        sr = self._details['extent'].get('spatialReference')
+        return {"geometryFilter" : _envelope_filter(box[0], box[1], box[2],
+                                                    box[3], sr)}
+    #----------------------------------------------------------------------
+    def _tile(self, box, depth):
+        """
+        returns (quarters, None) for a tile over the page size, (None,
+        None) for an empty tile and (None, response) otherwise.  Tiles at
+        the maximum depth are fetched whatever their count.
+        """
+        request = self._tile_request(box)
+        if depth < _MAX_DEPTH:
+            query = dict(self._query)
+            query.update(request)
+            count = self._layer.query(returnCountOnly=True,
+                                      **_filters(query)).get('count')
+            if count == 0:
+                return None, None
+            if count is not None and count > self._page_size:
+                return _quarters(box), None
+        return None, self._fetch(request)
+    #----------------------------------------------------------------------
+    def _query_ids(self, query):
+        """returns the sorted object IDs matching query parameters"""
+        ids = self._layer.query(returnIDsOnly=True, **_filters(query))
+        return sorted(ids.get('objectIds') or [])
+    #----------------------------------------------------------------------
+    def _fetch(self, request, complete=True):
+        """
+        returns the response of one page, pages that exceeded the transfer
+        limit are completed by object ID except for offset pages or if
+        complete is False
+        """
+        query = dict(self._query)
+        query.update(request)
+        result = self._layer.query(as_json=True, **query)
+        features = result.setdefault('features', [])
+        if complete and result.get('exceededTransferLimit') and \
+           self._strategy in ("single", "tiles"):
+            received = set(f['attributes'].get(self._oidField)
+                           for f in features)
+            missing = [oid for oid in self._query_ids(query)
+                       if oid not in received]
+            for i in range(0, len(missing), self._page_size):
+                query.update({"objectIds" : ",".join(
+                    str(oid) for oid in missing[i:i + self._page_size]),
+                              "where" : "1=1", "timeFilter" : None,
+                              "geometryFilter" : None})
+                for key in ('resultOffset', 'resultRecordCount'):
+                    query.pop(key, None)
+                page = self._layer.query(as_json=True, **query)
+                features.extend(page.get('features', []))
+            result.pop('exceededTransferLimit', None)
+        if self._oidField and self.ordered:
+            features.sort(key=lambda f: f['attributes'].get(self._oidField))
+        return result
+    #----------------------------------------------------------------------
+    def iter_pages(self, prefetch=None):
+        """
+        yields the response of each page in order while the following
+        pages are fetched in the background
+        Inputs:
+           prefetch - number of pages fetched ahead, defaults to workers
+        """
+        if prefetch is None:
+            prefetch = self._workers
+        self._statistics = {"pages" : 0, "features" : 0, "coverage" : None}
+        if self._strategy == "tiles":
+            pages = self._iter_tiles(prefetch)
+        elif self._strategy == "oid_range":
+            pages = self._iter_ranges(prefetch)
+        else:
+            pages = self._iter_requests(prefetch)
+        for result in pages:
+            self._statistics['pages'] += 1
+            self._statistics['features'] += len(result['features'])
+            yield result
+        if self._count:
+            self._statistics['coverage'] = \
+                self._statistics['features'] / float(self._count)
+    #----------------------------------------------------------------------
+    def _iter_requests(self, prefetch):
+        """yields the responses of the requests in order"""
+        requests = self.requests()
+        pool = ThreadPoolExecutor(max_workers=prefetch) if prefetch > 0 else None
+        pending = collections.deque()
+        position = 0
+        last = None
+        try:
+            while position < len(requests) or pending:
+                while pool is not None and position < len(requests) and \
+                      len(pending) <= prefetch:
+                    pending.append(pool.submit(self._fetch,
+                                               requests[position]))
+                    position += 1
+                if pending:
+                    result = pending.popleft().result()
+                else:
+                    result = self._fetch(requests[position])
+                    position += 1
+                last = result.pop('exceededTransferLimit', False)
+                yield result
+            # features added since the count query
+            offset = len(requests) * self._page_size
+            while last and self._strategy == "offset":
+                result = self._fetch(dict(requests[-1], resultOffset=offset))
+                last = result.pop('exceededTransferLimit', False)
+                offset += self._page_size
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+            if pool is not None:
+                pool.shutdown(wait=False)
+    #----------------------------------------------------------------------
+    def _iter_ranges(self, prefetch):
+        """
+        yields the responses of the object ID ranges in order.  The
+        ranges refining an oversized range take its place after the page
+        it kept, so the next prefetch ranges are always the ones being
+        fetched.
+        """
+        statistics = self._statistics
+        statistics.update({"ranges" : 0, "refined ranges" : 0})
+        pending = collections.deque([bounds, None]
+                                    for bounds in self._oid_ranges())
+        pool = ThreadPoolExecutor(max_workers=prefetch) if prefetch > 0 else None
+        try:
+            while pending:
+                if pool is not None:
+                    for entry in itertools.islice(pending, prefetch + 1):
+                        if entry[1] is None:
+                            entry[1] = pool.submit(self._range, *entry[0])
+                bounds, future = pending.popleft()
+                if future is not None:
+                    ranges, result = future.result()
+                else:
+                    ranges, result = self._range(*bounds)
+                if ranges is not None:
+                    statistics['refined ranges'] += 1
+                    pending.extendleft([bounds, None]
+                                       for bounds in reversed(ranges))
+                if result is not None:
+                    statistics['ranges'] += 1
+                    result.pop('exceededTransferLimit', None)
+                    yield result
+        finally:
+            for bounds, future in pending:
+                if future is not None:
+                    future.cancel()
+            if pool is not None:
+                pool.shutdown(wait=False)
+    #----------------------------------------------------------------------
+    def _iter_tiles(self, prefetch):
+        """
+        yields the responses of the tiles as they arrive, starting from
+        the extent.  prefetch tiles are counted or fetched at the same
+        time and the quarters of split tiles are queued.
+        """
+        statistics = self._statistics
+        statistics.update({"tiles" : 0, "split tiles" : 0, "empty tiles" : 0,
+                           "max depth" : 0, "duplicates" : 0})
+        queue = collections.deque([(self._root(), 0)])
+        pool = ThreadPoolExecutor(max_workers=prefetch) if prefetch > 0 else None
+        running = {}
+        seen = set()
+        try:
+            while queue or running:
+                if pool is None:
+                    box, depth = queue.popleft()
+                    done = [(depth, self._tile(box, depth))]
+                else:
+                    while queue and len(running) < prefetch:
+                        box, depth = queue.popleft()
+                        running[pool.submit(self._tile, box, depth)] = depth
+                    finished = wait(list(running),
+                                    return_when=FIRST_COMPLETED)[0]
+                    done = [(running.pop(future), future.result())
+                            for future in finished]
+                for depth, (quarters, result) in done:
+                    statistics['max depth'] = max(statistics['max depth'],
+                                                  depth)
+                    if quarters is not None:
+                        statistics['split tiles'] += 1
+                        queue.extend((quarter, depth + 1)
+                                     for quarter in quarters)
+                        continue
+                    if result is None:
+                        statistics['empty tiles'] += 1
+                        continue
+                    statistics['tiles'] += 1
+                    result.pop('exceededTransferLimit', None)
+                    # features on tile edges are returned by both tiles
+                    features = []
+                    for feature in result['features']:
+                        oid = feature['attributes'].get(self._oidField)
+                        if oid not in seen:
+                            seen.add(oid)
+                            features.append(feature)
+                    statistics['duplicates'] += \
+                        len(result['features']) - len(features)
+                    result['features'] = features
+                    yield result
+        finally:
+            for future in running:
+                future.cancel()
+            if pool is not None:
+                pool.shutdown(wait=False)
+    #----------------------------------------------------------------------
+    def execute(self):
+        """
+        returns the response of the query with the features of all pages,
+        in object ID order
+        """
+        result = None
+        for page in self.iter_pages():
+            if result is None:
+                result = page
+            else:
+                result['features'].extend(page['features'])
+        if result is None:
+            # every tile was empty
+            result = {"features" : []}
+        if not self.ordered and self._oidField:
+            result['features'].sort(
+                key=lambda f: f['attributes'].get(self._oidField))
+        return result
+#----------------------------------------------------------------------
+def plan_query(layer, query, strategy=None, page_size=None, workers=4):
+    """
+    returns the QueryPlan extracting the features of a query
+    Inputs:
+       layer - FeatureLayer to query
+       query - dictionary of the query parameters (where, out_fields,
+          timeFilter, geometryFilter, outSR, ...)
+       strategy - forces a strategy, see QueryPlan
+       page_size - number of features per page, defaults to (and is
+          limited to) the layer's maxRecordCount
+       workers - number of pages fetched at the same time
+    """
+    info = _layer_info(layer)
+    maxRecordCount = info.get('maxRecordCount') or \
+        getattr(layer, '_maxRecordCount', None) or _DEFAULT_PAGE_SIZE
+    oidField = info.get('objectIdField') or \
+        getattr(layer, '_objectIdField', None)
+    pagination = _capability(info, 'supportsPagination')
+    statistics = _capability(info, 'supportsStatistics')
+    extent = info.get('extent') or getattr(layer, '_extent', None)
+    metadata = {"maxRecordCount" : maxRecordCount,
+                "supportsPagination" : pagination,
+                "supportsStatistics" : statistics,
+                "supportsOrderBy" : _capability(info, 'supportsOrderBy')}
+    if info.get('standardMaxRecordCount'):
+        metadata['standardMaxRecordCount'] = info['standardMaxRecordCount']
+    reasons = []
+    details = {}
+    size = min(page_size or maxRecordCount, maxRecordCount)
+    count = layer.query(returnCountOnly=True, **_filters(query)).get('count')
+    filtered = query.get('geometryFilter') is not None or \
+        query.get('timeFilter') is not None or \
+        (query.get('where') or '1=1').strip() != '1=1'
+    if strategy is not None:
+        reasons.append("strategy %s was requested" % strategy)
+    elif count is not None and count <= size:
+        strategy = "single"
+        reasons.append("the %s features fit in one page of %s" % (count, size))
+    elif count is not None and count > _LARGE_LAYER and statistics and oidField:
+        strategy = "oid_range"
+        reasons.append("%s features: deep resultOffset pages and the object ID "
+                       "list are slow, min/max OID statistics give ranges" % count)
+    elif pagination:
+        strategy = "offset"
+        reasons.append("the layer supports pagination, pages are independent "
+                       "resultOffset requests")
+    elif statistics and oidField:
+        strategy = "oid_range"
+        reasons.append("no pagination, min/max OID statistics give ranges")
+    elif (count is None or count <= _LARGE_LAYER) or not oidField:
+        strategy = "oid_list"
+        reasons.append("no pagination or statistics, the object IDs are "
+                       "fetched once and queried in batches")
+    elif isinstance(extent, dict) and 'xmin' in extent and \
+         query.get('geometryFilter') is None:
+        strategy = "tiles"
+        reasons.append("no pagination or statistics and %s object IDs are too "
+                       "many to list, the extent is split in tiles" % count)
+    else:
+        strategy = "oid_list"
+        reasons.append("no other strategy applies")
+    if strategy == "offset" and page_size is None and not filtered and \
+       info.get('useStandardizedQueries') and \
+       (info.get('standardMaxRecordCount') or 0) > size:
+        size = info['standardMaxRecordCount']
+        details['resultType'] = "standard"
+        reasons.append("standardized queries allow pages of "
+                       "standardMaxRecordCount (%s)" % size)
+    if strategy == "oid_range":
+        low, high, total = _oid_statistics(layer, query, oidField)
+        if low is None:
+            strategy = "oid_list"
+            reasons.append("the OID statistics are empty, object IDs are "
+                           "listed instead")
+        else:
+            details['min OID'] = low
+            details['max OID'] = high
+            if count is None:
+                count = total
+    if strategy == "tiles":
+        if not isinstance(extent, dict) or 'xmin' not in extent or \
+           not oidField:
+            raise ValueError("the tiles strategy needs the extent and the "
+                             "object ID field of the layer")
+        if query.get('geometryFilter') is not None:
+            raise ValueError("the tiles strategy sets the geometryFilter "
+                             "of each tile, it cannot be combined with one")
+        details['extent'] = extent
+    return QueryPlan(layer, strategy, size, workers, query, count=count,
+                     oidField=oidField, reasons=reasons, metadata=metadata,
+                     details=details)
@@ -5,7 +5,7 @@ from __future__ import absolute_import
 from __future__ import division
 import os
 import mmap
-import json
+from ..web import _json as json
 from ..packages.six.moves import urllib_parse as urlparse
 from ..security import security
 from .._abstract import abstract
@@ -13,17 +13,19 @@ from __future__ import print_function
 from __future__ import division
 import os
 import uuid
-import json
+from ..web import _json as json
 import types
 from re import search
 from ..common.general import create_uid
 from ..packages.six.moves import urllib_parse as urlparse
 from ..packages import six
 from ._uploads import Uploads
+from . import _queryplan
 from ..security import security
 from .._abstract import abstract
 from ..common.filters import LayerDefinitionFilter, GeometryFilter, TimeFilter
 from ..common.general import FeatureSet
+from ..common.columnar import ColumnarFeatureSet
 from ..common import filters
 from ..common.geometry import SpatialReference
 from ..common.general import _date_handler, Feature
@@ -33,6 +35,9 @@ from ..common.spatial import create_feature_layer, merge_feature_class
 from ..common.spatial import featureclass_to_json, create_feature_class
 from ..common.spatial import get_attachment_data
 from ..common import geometry
+from ..common import projection
+from ..common import quantization
+from ..common import pbf
 from ..hostedservice import AdminFeatureService, AdminFeatureServiceLayer
 from .._abstract.abstract import BaseSecurityHandler, BaseAGOLClass
 
@@ -490,9 +495,9 @@ class FeatureService(abstract.BaseAGOLClass):
         if returnIdsOnly == False and returnCountOnly == False:
             if isinstance(res, str):
                 jd = json.loads(res)
-                return [FeatureSet.fromJSON(json.dumps(lyr)) for lyr in jd['layers']]
+                return [FeatureSet.fromDict(lyr) for lyr in jd['layers']]
             elif isinstance(res, dict):
-                return [FeatureSet.fromJSON(json.dumps(lyr)) for lyr in res['layers']]
+                return [FeatureSet.fromDict(lyr) for lyr in res['layers']]
             else:
                 return res
         return res
@@ -646,7 +651,7 @@ class FeatureService(abstract.BaseAGOLClass):
                       transportType="esriTransportTypeUrl",
                       returnAttachments=False,
                       returnAttachmentsDatabyURL=False,
-                      async=False,
+                      asynchronous=False,
                       attachmentsSyncDirection="none",
                       syncModel="none",
                       dataFormat="json",
@@ -706,7 +711,7 @@ class FeatureService(abstract.BaseAGOLClass):
             creating a replica. AttachmentsSyncDirection is currently a createReplica property
             and cannot be overridden during sync.
             Values: none, upload, bidirectional
-           async - If true, the request is processed as an asynchronous job, and a URL is
+           asynchronous - If true, the request is processed as an asynchronous job, and a URL is
             returned that a client can visit to check the status of the job. See the topic on
             asynchronous usage for more information. The default is false.
            syncModel - Client can specify the attachmentsSyncDirection when creating a replica.
@@ -720,7 +725,7 @@ class FeatureService(abstract.BaseAGOLClass):
             to specify parameters for registration of existing data for sync. The operation
             will create a replica but will not return data. The responseType returned in the
             createReplica response will be esriReplicaResponseTypeInfo.
-           wait - if async, wait to pause the process until the async operation is completed.
+           wait - if asynchronous, wait to pause the process until the async operation is completed.
            out_path - folder path to save the file
         """
         if self.syncEnabled == False and "Extract" not in self.capabilities:
@@ -732,7 +737,7 @@ class FeatureService(abstract.BaseAGOLClass):
                   "returnAttachments": returnAttachments,
                   "returnAttachmentsDatabyURL": returnAttachmentsDatabyURL,
                   "attachmentsSyncDirection" : attachmentsSyncDirection,
-                  "async" : async,
+                  "async" : asynchronous,
                   "syncModel" : syncModel,
                   "layers" : layers
                   }
@@ -752,7 +757,7 @@ class FeatureService(abstract.BaseAGOLClass):
         if transportType is not None:
             params['transportType'] = transportType
 
-        if async and wait:
+        if asynchronous and wait:
             exportJob = self._post(url=url,
                                       param_dict=params,
                                       securityHandler=self._securityHandler,
@@ -800,7 +805,7 @@ class FeatureService(abstract.BaseAGOLClass):
                            returnIdsForAdds=False,
                            edits=None,
                            returnAttachmentDatabyURL=False,
-                           async=False,
+                           asynchronous=False,
                            syncDirection="snapshot",
                            syncLayers="perReplica",
                            editsUploadID=None,
@@ -817,7 +822,7 @@ class FeatureService(abstract.BaseAGOLClass):
             "transportType" : transportType,
             "dataFormat" : dataFormat,
             "rollbackOnFailure" : rollbackOnFailure,
-            "async" : async,
+            "async" : asynchronous,
             "returnIdsForAdds": returnIdsForAdds,
             "syncDirection" : syncDirection,
             "returnAttachmentDatabyURL" : returnAttachmentDatabyURL
@@ -1614,6 +1619,10 @@ class FeatureLayer(abstract.BaseAGOLClass):
               quanitizationParameters=None,
               returnCentroid=False,
               as_json=False,
+              as_columnar=False,
+              local_projection=True,
+              quantize=None,
+              use_pbf=False,
               **kwargs):
         """ queries a feature service based on a sql statement
             Inputs:
@@ -1722,12 +1731,39 @@ class FeatureLayer(abstract.BaseAGOLClass):
                 quanitizationParameters - Used to project the geometry onto
                                           a virtual grid, likely
                                           representing pixels on the screen.
+                                          A QuantizationParameters object
+                                          or dictionary. The coordinates of
+                                          the response are restored before
+                                          the query returns.
                 returnCentroid - Used to return the geometry centroid
                                  associated with each feature returned. If
                                  true, the result includes the geometry
                                  centroid. The default is false.
                 as_json - If true, the query will return as the raw JSON.
                           The default is False.
+                as_columnar - If true, the features are returned as a
+                              NumPy backed ColumnarFeatureSet. Requires
+                              NumPy. The default is False.
+                local_projection - If true (default) and the layer's and
+                                   outSR's spatial references are supported
+                                   by common.projection, the features are
+                                   requested in the layer's spatial
+                                   reference and projected on the client.
+                                   Curves (returnTrueCurves) are always
+                                   projected by the server.
+                quantize - "edit" (or True) to request the geometries
+                           quantized to about a millimeter for extracts,
+                           "view" to request them generalized to 1024
+                           pixels across the layer's extent for display.
+                           Ignored when quanitizationParameters is given.
+                use_pbf - If true and the layer lists PBF in its
+                          supportedQueryFormats, the features are requested
+                          as protocol buffers (f=pbf) and decoded on the
+                          client. PBF geometries are always quantized, to
+                          the grid of quanitizationParameters or quantize
+                          when given, else to the server's default
+                          resolution of the spatial reference. The default
+                          is False.
                 returnFeatureClass - If true and arcpy is installed, the
                                      script will attempt to save the result
                                      of the query to a feature class.
@@ -1745,6 +1781,295 @@ class FeatureLayer(abstract.BaseAGOLClass):
                returnFeatureClass is set to True.
          """
         url = self._url + "/query"
+        if quantize and not quanitizationParameters:
+            quanitizationParameters = self._quantization(quantize, outSR)
+        params = self._query_params(where=where,
+                                    out_fields=out_fields,
+                                    timeFilter=timeFilter,
+                                    geometryFilter=geometryFilter,
+                                    returnGeometry=returnGeometry,
+                                    returnCountOnly=returnCountOnly,
+                                    returnIDsOnly=returnIDsOnly,
+                                    returnDistinctValues=returnDistinctValues,
+                                    returnExtentOnly=returnExtentOnly,
+                                    groupByFieldsForStatistics=groupByFieldsForStatistics,
+                                    statisticFilter=statisticFilter,
+                                    resultOffset=resultOffset,
+                                    resultRecordCount=resultRecordCount,
+                                    objectIds=objectIds,
+                                    distance=distance,
+                                    units=units,
+                                    maxAllowableOffset=maxAllowableOffset,
+                                    outSR=outSR,
+                                    geometryPrecision=geometryPrecision,
+                                    gdbVersion=gdbVersion,
+                                    orderByFields=orderByFields,
+                                    outStatistics=outStatistics,
+                                    returnZ=returnZ,
+                                    returnM=returnM,
+                                    multipatchOption=multipatchOption,
+                                    quanitizationParameters=quanitizationParameters,
+                                    returnCentroid=returnCentroid,
+                                    **kwargs)
+        local_sr = self._local_out_sr(params) if local_projection else None
+        if local_sr is not None:
+            del params['outSR']
+        if use_pbf:
+            self._pbf_params(params)
+        result = self._decode_result(
+            self._post(url=url,
+                       securityHandler=self._securityHandler,
+                       param_dict=params,
+                       proxy_url=self._proxy_url,
+                       proxy_port=self._proxy_port))
+        if local_sr is not None and \
+           not self._project_result(result, local_sr):
+            params['outSR'] = local_sr
+            result = self._decode_result(
+                self._post(url=url,
+                           securityHandler=self._securityHandler,
+                           param_dict=params,
+                           proxy_url=self._proxy_url,
+                           proxy_port=self._proxy_port))
+        return self._query_output(result=result,
+                                  as_json=as_json,
+                                  returnCountOnly=returnCountOnly,
+                                  returnIDsOnly=returnIDsOnly,
+                                  returnFeatureClass=returnFeatureClass,
+                                  out_fc=out_fc,
+                                  as_columnar=as_columnar)
+    #----------------------------------------------------------------------
+    async def query_async(self, **kwargs):
+        """
+        asynchronous version of query for use in coroutines, accepts the
+        same parameters and returns the same output as query.  Many
+        queries can be run at once on one event loop:
+
+        >>> results = await asyncio.gather(layer.query_async(where="a=1"),
+        ...                                layer.query_async(where="a=2"))
+        """
+        as_json = kwargs.pop('as_json', False)
+        as_columnar = kwargs.pop('as_columnar', False)
+        returnFeatureClass = kwargs.pop('returnFeatureClass', False)
+        out_fc = kwargs.pop('out_fc', None)
+        local_projection = kwargs.pop('local_projection', True)
+        quantize = kwargs.pop('quantize', None)
+        use_pbf = kwargs.pop('use_pbf', False)
+        if quantize and not kwargs.get('quanitizationParameters'):
+            kwargs['quanitizationParameters'] = \
+                self._quantization(quantize, kwargs.get('outSR'))
+        params = self._query_params(**kwargs)
+        local_sr = self._local_out_sr(params) if local_projection else None
+        if local_sr is not None:
+            del params['outSR']
+        if use_pbf:
+            self._pbf_params(params)
+        result = self._decode_result(
+            await self._apost(url=self._url + "/query",
+                              securityHandler=self._securityHandler,
+                              param_dict=params,
+                              proxy_url=self._proxy_url,
+                              proxy_port=self._proxy_port))
+        if local_sr is not None and \
+           not self._project_result(result, local_sr):
+            params['outSR'] = local_sr
+            result = self._decode_result(
+                await self._apost(url=self._url + "/query",
+                                  securityHandler=self._securityHandler,
+                                  param_dict=params,
+                                  proxy_url=self._proxy_url,
+                                  proxy_port=self._proxy_port))
+        return self._query_output(result=result,
+                                  as_json=as_json,
+                                  returnCountOnly=kwargs.get('returnCountOnly', False),
+                                  returnIDsOnly=kwargs.get('returnIDsOnly', False),
+                                  returnFeatureClass=returnFeatureClass,
+                                  out_fc=out_fc,
+                                  as_columnar=as_columnar)
+    #----------------------------------------------------------------------
+    def plan_query(self,
+                   where="1=1",
+                   out_fields="*",
+                   timeFilter=None,
+                   geometryFilter=None,
+                   strategy=None,
+                   page_size=None,
+                   workers=4,
+                   **kwargs):
+        """
+        returns the QueryPlan that extracts every feature matching the
+        query.  The strategy is picked from the layer's record limits and
+        query capabilities and the number of matching features: one page,
+        resultOffset pagination, object ID ranges, object ID batches or
+        spatial tiles.  print(plan.explain()) shows the choice, and after
+        plan.execute() or plan.iter_pages() the coverage statistics of
+        the run.  The tiles strategy extracts the layers of map services
+        without pagination that truncate at the transfer limit:
+
+        >>> plan = layer.plan_query(strategy="tiles")
+        >>> result = plan.execute()
+        >>> plan.statistics['coverage']
+        Inputs:
+           where - the selection sql statement
+           out_fields - the attribute fields to return, the object ID
+                        field is always included
+           timeFilter - a TimeFilter object or dictionary
+           geometryFilter - a GeometryFilter object or dictionary
+           strategy - single, offset, oid_range, oid_list or tiles to
+                      force a strategy, None picks one
+           page_size - number of features per page, defaults to (and is
+                       limited to) the layer's maxRecordCount
+           workers - number of pages fetched at the same time
+           kwargs - other parameters of query (outSR, returnZ,
+                    gdbVersion, ...), they apply to every page
+        Output:
+           QueryPlan
+        """
+        oidField = self.objectIdField
+        if out_fields != "*" and oidField and \
+           oidField.lower() not in [f.strip().lower()
+                                    for f in out_fields.split(",")]:
+            out_fields = "%s,%s" % (out_fields, oidField)
+        query = dict(kwargs)
+        query.update({"where" : where,
+                      "out_fields" : out_fields,
+                      "timeFilter" : timeFilter,
+                      "geometryFilter" : geometryFilter})
+        return _queryplan.plan_query(self, query, strategy=strategy,
+                                     page_size=page_size, workers=workers)
+    #----------------------------------------------------------------------
+    def query_all(self,
+                  where="1=1",
+                  out_fields="*",
+                  timeFilter=None,
+                  geometryFilter=None,
+                  workers=4,
+                  batch_size=None,
+                  as_json=False,
+                  as_columnar=False,
+                  strategy=None,
+                  **kwargs):
+        """
+        returns every feature matching the query regardless of the
+        layer's maxRecordCount.  The pages of the query plan (see
+        plan_query) are fetched by a pool of worker threads and the
+        features are returned in object ID order.
+        Inputs:
+           where - the selection sql statement
+           out_fields - the attribute fields to return, the object ID
+                        field is always included
+           timeFilter - a TimeFilter object or dictionary
+           geometryFilter - a GeometryFilter object or dictionary
+           workers - number of pages queried at the same time
+           batch_size - number of features per page, defaults to (and is
+                        limited to) the layer's maxRecordCount
+           as_json - If true, the features are returned as a dictionary
+           as_columnar - If true, the features are returned as a NumPy
+                         backed ColumnarFeatureSet
+           strategy - forces the strategy of the plan, see plan_query
+           kwargs - other parameters of query (outSR, returnZ,
+                    gdbVersion, ...), they apply to every page
+        Output:
+           A FeatureSet (default), a ColumnarFeatureSet or a dictionary
+        """
+        plan = self.plan_query(where=where, out_fields=out_fields,
+                               timeFilter=timeFilter,
+                               geometryFilter=geometryFilter,
+                               strategy=strategy, page_size=batch_size,
+                               workers=workers, **kwargs)
+        return self._query_output(result=plan.execute(),
+                                  as_json=as_json,
+                                  as_columnar=as_columnar)
+    #----------------------------------------------------------------------
+    def iter_query(self,
+                   where="1=1",
+                   out_fields="*",
+                   timeFilter=None,
+                   geometryFilter=None,
+                   page_size=None,
+                   prefetch=2,
+                   pages=False,
+                   as_json=False,
+                   as_columnar=False,
+                   strategy=None,
+                   **kwargs):
+        """
+        generator yielding the features matching the query page by page as
+        the pages arrive, in object ID order (except for the tiles
+        strategy).  While a page is consumed the next prefetch pages are
+        downloaded in the background, so at most page_size * (prefetch + 1)
+        features are held whatever the size of the layer.  The oid_list
+        strategy also holds the object IDs matching the query, its batch
+        requests are made as the pages are fetched.  The generator
+        can be passed to the writers of common.writers, ex:
+
+        >>> save_features(layer.iter_query(pages=True), "out.geojson")
+        Inputs:
+           where - the selection sql statement
+           out_fields - the attribute fields to return, the object ID
+                        field is always included
+           timeFilter - a TimeFilter object or dictionary
+           geometryFilter - a GeometryFilter object or dictionary
+           page_size - number of features per page, defaults to (and is
+                       limited to) the layer's maxRecordCount
+           prefetch - number of pages downloaded ahead, 0 downloads each
+                      page when it is needed
+           pages - If true, each page is yielded as a FeatureSet (or as
+                   selected by as_json/as_columnar), otherwise the Feature
+                   objects are yielded one by one
+           as_json - If true, pages are yielded as dictionaries
+           as_columnar - If true, pages are yielded as ColumnarFeatureSets
+           strategy - forces the strategy of the plan, see plan_query
+           kwargs - other parameters of query (outSR, returnZ,
+                    gdbVersion, ...), they apply to every page
+        Output:
+           generator of Feature objects, or of pages
+        """
+        plan = self.plan_query(where=where, out_fields=out_fields,
+                               timeFilter=timeFilter,
+                               geometryFilter=geometryFilter,
+                               strategy=strategy, page_size=page_size,
+                               workers=max(1, prefetch), **kwargs)
+        for result in plan.iter_pages(prefetch=prefetch):
+            if pages:
+                yield self._query_output(result=result,
+                                         as_json=as_json,
+                                         as_columnar=as_columnar)
+            else:
+                for feature in FeatureSet.fromDict(result):
+                    yield feature
+            del result
+    #----------------------------------------------------------------------
+    def _query_params(self,
+                      where="1=1",
+                      out_fields="*",
+                      timeFilter=None,
+                      geometryFilter=None,
+                      returnGeometry=True,
+                      returnCountOnly=False,
+                      returnIDsOnly=False,
+                      returnDistinctValues=False,
+                      returnExtentOnly=False,
+                      groupByFieldsForStatistics=None,
+                      statisticFilter=None,
+                      resultOffset=None,
+                      resultRecordCount=None,
+                      objectIds=None,
+                      distance=None,
+                      units=None,
+                      maxAllowableOffset=None,
+                      outSR=None,
+                      geometryPrecision=None,
+                      gdbVersion=None,
+                      orderByFields=None,
+                      outStatistics=None,
+                      returnZ=False,
+                      returnM=False,
+                      multipatchOption=None,
+                      quanitizationParameters=None,
+                      returnCentroid=False,
+                      **kwargs):
+        """builds the parameters of a query request, see query"""
         params = {"f" : "json"}
         params['where'] = where
         params['outFields'] = out_fields
@@ -1761,7 +2086,10 @@ class FeatureLayer(abstract.BaseAGOLClass):
         if resultOffset:
             params['resultOffset'] = resultOffset
         if quanitizationParameters:
-            params['quanitizationParameters'] = quanitizationParameters
+            params['quantizationParameters'] = str(quanitizationParameters) \
+                if isinstance(quanitizationParameters,
+                              quantization.QuantizationParameters) \
+                else quanitizationParameters
         if multipatchOption:
             params['multipatchOption'] = multipatchOption
         if orderByFields:
@@ -1807,11 +2135,100 @@ class FeatureLayer(abstract.BaseAGOLClass):
                 params[k] = v
                 del k,v
 
-        result = self._post(url=url,
-                            securityHandler=self._securityHandler,
-                            param_dict=params,
-                            proxy_url=self._proxy_url,
-                            proxy_port=self._proxy_port)
+        return params
+    #----------------------------------------------------------------------
+    def _quantization(self, quantize, outSR=None):
+        """
+        returns the QuantizationParameters of the quantize option of query
+        for the layer's extent, or None when the extent is not known in
+        the outSR
+        """
+        extent = self.extent
+        if not isinstance(extent, dict) or 'xmin' not in extent:
+            return None
+        native = extent.get('spatialReference')
+        if outSR and geometry.sr_wkid(outSR) != geometry.sr_wkid(native):
+            if not projection.supported(native, outSR):
+                return None
+            extent = projection.project([extent], native, outSR)[0]
+        if quantize == "view":
+            return quantization.QuantizationParameters.forView(extent)
+        return quantization.QuantizationParameters.forEdit(extent)
+    #----------------------------------------------------------------------
+    def _pbf_params(self, params):
+        """
+        switches the query parameters to f=pbf when the layer supports it
+        and the response has a protocol buffer form
+        """
+        formats = self.supportedQueryFormats
+        if not isinstance(formats, six.string_types) or \
+           'pbf' not in [f.strip().lower() for f in formats.split(',')]:
+            return False
+        for key in ('returnExtentOnly', 'outStatistics',
+                    'groupByFieldsForStatistics', 'multipatchOption'):
+            if params.get(key):
+                return False
+        params['f'] = "pbf"
+        return True
+    #----------------------------------------------------------------------
+    def _decode_result(self, result):
+        """
+        returns a query response with real world coordinates, protocol
+        buffer responses are decoded and quantized JSON responses restored
+        """
+        if isinstance(result, (bytes, bytearray)):
+            return pbf.decode(result)
+        return quantization.decode_response(result)
+    #----------------------------------------------------------------------
+    def _local_out_sr(self, params):
+        """
+        returns the outSR of the query parameters when the features can be
+        projected on the client instead of the server, otherwise None
+        """
+        outSR = params.get('outSR')
+        if outSR in (None, "") or not projection.numpyFound or \
+           str(params.get('returnGeometry', True)).lower() == "false":
+            return None
+        # curves are densified or kept by the server, not on the client
+        if str(params.get('returnTrueCurves', False)).lower() == "true":
+            return None
+        # these are expressed in, or produce values of, the outSR
+        for key in ('maxAllowableOffset', 'geometryPrecision',
+                    'quanitizationParameters', 'quantizationParameters',
+                    'returnCentroid', 'returnExtentOnly'):
+            if params.get(key):
+                return None
+        extent = self.extent
+        if not isinstance(extent, dict) or \
+           not projection.supported(extent.get('spatialReference'), outSR):
+            return None
+        return outSR
+    #----------------------------------------------------------------------
+    def _project_result(self, result, outSR):
+        """
+        projects the features of a query response to outSR in place,
+        returns False when their spatial reference or curve geometries
+        are not supported and the server has to project them
+        """
+        if not isinstance(result, dict) or 'error' in result or \
+           'features' not in result:
+            return True
+        geometries = [feature.get('geometry')
+                      for feature in result['features']
+                      if feature.get('geometry')]
+        if not geometries:
+            return True
+        if not projection.supported(result.get('spatialReference'), outSR):
+            return False
+        if any('curveRings' in g or 'curvePaths' in g for g in geometries):
+            return False
+        projection.project_response(result, outSR)
+        return True
+    #----------------------------------------------------------------------
+    def _query_output(self, result, as_json=False, returnCountOnly=False,
+                      returnIDsOnly=False, returnFeatureClass=False,
+                      out_fc=None, as_columnar=False):
+        """converts the response of a query request, see query"""
         if 'error' in result:
             raise ValueError(result)
         if as_json or \
@@ -1837,8 +2254,10 @@ class FeatureLayer(abstract.BaseAGOLClass):
                                       out_fc=out_fc)
             os.remove(temp)
             return fc
+        elif as_columnar:
+            return ColumnarFeatureSet.fromDict(result)
         else:
-            return FeatureSet.fromJSON(jsonValue=json.dumps(result))
+            return FeatureSet.fromDict(result)
         return result
     #----------------------------------------------------------------------
     def query_related_records(self,
@@ -1976,7 +2395,7 @@ class FeatureLayer(abstract.BaseAGOLClass):
             return self.parentLayer.createReplica(replicaName="fgdb_dump",
                                                   layers="%s" % self.id,
                                                   attachmentsSyncDirection="upload",
-                                                  async=True,
+                                                  asynchronous=True,
                                                   wait=True,
                                                   returnAttachments=includeAttachments,
                                                   out_path=out_path)[0]
@@ -1985,36 +2404,21 @@ class FeatureLayer(abstract.BaseAGOLClass):
             return self.parentLayer.createReplica(replicaName="fgdb_dump",
                                                   layers="%s" % self.id,
                                                   attachmentsSyncDirection="upload",
-                                                  async=True,
+                                                  asynchronous=True,
                                                   wait=True,
                                                   returnAttachments=includeAttachments,
                                                   out_path=out_path)[0]
         else:
+            # pages of the query plan, large layers are split in object
+            # ID ranges rather than listing every object ID
             result_features = []
-            res = self.query(returnIDsOnly=True)
-            OIDS = res['objectIds']
-            OIDS.sort()
-            OIDField = res['objectIdFieldName']
-            count = len(OIDS)
-            if count <= self.maxRecordCount:
-                bins = 1
-            else:
-                bins = count / self.maxRecordCount
-                v = count % self.maxRecordCount
-                if v > 0:
-                    bins += 1
-            chunks = self._chunks(OIDS, bins)
-            for chunk in chunks:
-                chunk.sort()
-                if len(chunk) > 0:
-                    sql = "%s >= %s and %s <= %s" % (OIDField, chunk[0],
-                                                     OIDField, chunk[len(chunk) -1])
-                    temp_base = "a" + uuid.uuid4().get_hex()[:6] + "a"
-                    temp_fc = r"%s\%s" % (scratchGDB(), temp_base)
-                    temp_fc = self.query(where=sql,
-                                         returnFeatureClass=True,
-                                         out_fc=temp_fc)
-                    result_features.append(temp_fc)
+            for page in self.plan_query().iter_pages():
+                temp_fc = os.path.join(scratchGDB(),
+                                       "a%sa" % uuid.uuid4().hex[:6])
+                result_features.append(
+                    self._query_output(result=page,
+                                       returnFeatureClass=True,
+                                       out_fc=temp_fc))
             return merge_feature_class(merges=result_features,
                                        out_fc=out_path)
     #----------------------------------------------------------------------
@@ -2176,7 +2580,54 @@ class FeatureLayer(abstract.BaseAGOLClass):
            Output:
               dictionary of messages
         """
-        editURL = self._url + "/applyEdits"
+        params = self._applyEdits_params(addFeatures=addFeatures,
+                                         updateFeatures=updateFeatures,
+                                         deleteFeatures=deleteFeatures,
+                                         gdbVersion=gdbVersion,
+                                         useGlobalIds=useGlobalIds,
+                                         rollbackOnFailure=rollbackOnFailure,
+                                         attachments=attachments)
+        res = self._post(url=self._url + "/applyEdits",
+                          param_dict=params,
+                          securityHandler=self._securityHandler,
+                          proxy_port=self._proxy_port,
+                          proxy_url=self._proxy_url)
+        return res
+    #----------------------------------------------------------------------
+    async def applyEdits_async(self,
+                               addFeatures=None,
+                               updateFeatures=None,
+                               deleteFeatures=None,
+                               gdbVersion=None,
+                               useGlobalIds=False,
+                               rollbackOnFailure=True,
+                               attachments=None):
+        """
+           asynchronous version of applyEdits for use in coroutines, the
+           inputs and output are the same as applyEdits.
+        """
+        params = self._applyEdits_params(addFeatures=addFeatures,
+                                         updateFeatures=updateFeatures,
+                                         deleteFeatures=deleteFeatures,
+                                         gdbVersion=gdbVersion,
+                                         useGlobalIds=useGlobalIds,
+                                         rollbackOnFailure=rollbackOnFailure,
+                                         attachments=attachments)
+        return await self._apost(url=self._url + "/applyEdits",
+                                 param_dict=params,
+                                 securityHandler=self._securityHandler,
+                                 proxy_port=self._proxy_port,
+                                 proxy_url=self._proxy_url)
+    #----------------------------------------------------------------------
+    def _applyEdits_params(self,
+                           addFeatures=None,
+                           updateFeatures=None,
+                           deleteFeatures=None,
+                           gdbVersion=None,
+                           useGlobalIds=False,
+                           rollbackOnFailure=True,
+                           attachments=None):
+        """builds the parameters of an applyEdits request"""
         params = {"f": "json",
                   "useGlobalIds" : useGlobalIds,
                   "rollbackOnFailure" : rollbackOnFailure
@@ -2219,12 +2670,7 @@ class FeatureLayer(abstract.BaseAGOLClass):
             params['attachments'] = ""
         else:
             params['attachments'] = attachments
-        res = self._post(url=editURL,
-                          param_dict=params,
-                          securityHandler=self._securityHandler,
-                          proxy_port=self._proxy_port,
-                          proxy_url=self._proxy_url)
-        return res
+        return params
     #----------------------------------------------------------------------
     def addFeature(self, features,
                    gdbVersion=None,
@@ -2246,7 +2692,40 @@ class FeatureLayer(abstract.BaseAGOLClass):
            Output:
               JSON message as dictionary
         """
-        url = self._url + "/addFeatures"
+        params = self._addFeature_params(features=features,
+                                         gdbVersion=gdbVersion,
+                                         rollbackOnFailure=rollbackOnFailure)
+        if params is None:
+            return None
+        return self._post(url=self._url + "/addFeatures",
+                             param_dict=params,
+                             securityHandler=self._securityHandler,
+                             proxy_port=self._proxy_port,
+                             proxy_url=self._proxy_url)
+    #----------------------------------------------------------------------
+    async def addFeature_async(self, features,
+                               gdbVersion=None,
+                               rollbackOnFailure=True):
+        """
+           asynchronous version of addFeature for use in coroutines, the
+           inputs and output are the same as addFeature.
+        """
+        params = self._addFeature_params(features=features,
+                                         gdbVersion=gdbVersion,
+                                         rollbackOnFailure=rollbackOnFailure)
+        if params is None:
+            return None
+        return await self._apost(url=self._url + "/addFeatures",
+                                 param_dict=params,
+                                 securityHandler=self._securityHandler,
+                                 proxy_port=self._proxy_port,
+                                 proxy_url=self._proxy_url)
+    #----------------------------------------------------------------------
+    def _addFeature_params(self, features,
+                           gdbVersion=None,
+                           rollbackOnFailure=True):
+        """builds the parameters of an addFeatures request, None when the
+        features are not supported"""
         params = {
             "f" : "json"
         }
@@ -2270,11 +2749,7 @@ class FeatureLayer(abstract.BaseAGOLClass):
                                             default=_date_handler)
         else:
             return None
-        return self._post(url=url,
-                             param_dict=params,
-                             securityHandler=self._securityHandler,
-                             proxy_port=self._proxy_port,
-                             proxy_url=self._proxy_url)
+        return params
     #----------------------------------------------------------------------
     def addFeatures(self, fc, attachmentTable=None,
                     nameField="ATT_NAME", blobField="DATA",
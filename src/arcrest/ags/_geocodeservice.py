@@ -3,7 +3,7 @@ from __future__ import print_function
 from .._abstract.abstract import BaseAGSServer
 from ..security import AGOLTokenSecurityHandler, OAuthSecurityHandler
 from ..common.geometry import Point
-import json
+from ..web import _json as json
 ########################################################################
 class GeocodeService(BaseAGSServer):
     """
@@ -1,6 +1,8 @@
 from __future__ import absolute_import
 from __future__ import print_function
-import json
+from ..web import _json as json
+import time
+import asyncio
 from ._gpobjects import *
 from .._abstract.abstract import BaseAGSServer, BaseGPObject
 from ..common.general import local_time_to_online
@@ -234,29 +236,29 @@ class GPTask(BaseAGSServer):
         for param in self._parameters:
             if not isinstance(param['defaultValue'], BaseGPObject):
                 if param['dataType'] == "GPFeatureRecordSetLayer":
-                    param['defaultValue'] = GPFeatureRecordSetLayer.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPFeatureRecordSetLayer.fromDict(param)
                 elif param['dataType'] == "GPString":
-                    param['defaultValue'] = GPString.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPString.fromDict(param)
                 elif param['dataType'] == "GPLong":
-                    param['defaultValue'] = GPLong.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPLong.fromDict(param)
                 elif param['dataType'] == "GPDouble":
-                    param['defaultValue'] = GPDouble.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPDouble.fromDict(param)
                 elif param['dataType'] == "GPDate":
-                    param['defaultValue'] = GPDate.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPDate.fromDict(param)
                 elif param['dataType'] == "GPBoolean":
-                    param['defaultValue'] = GPBoolean.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPBoolean.fromDict(param)
                 elif param['dataType'] == "GPDataFile":
-                    param['defaultValue'] = GPDataFile.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPDataFile.fromDict(param)
                 elif param['dataType'] == "GPLinearUnit":
-                    param['defaultValue'] = GPLinearUnit.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPLinearUnit.fromDict(param)
                 elif param['dataType'] == "GPMultiValue":
-                    param['defaultValue'] = GPMultiValue.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPMultiValue.fromDict(param)
                 elif param['dataType'] == "GPRasterData":
-                    param['defaultValue'] = GPRasterData.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPRasterData.fromDict(param)
                 elif param['dataType'] == "GPRasterDataLayer":
-                    param['defaultValue'] = GPRasterDataLayer.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPRasterDataLayer.fromDict(param)
                 elif param['dataType'] == "GPRecordSet":
-                    param['defaultValue'] = GPRecordSet.fromJSON(json.dumps(param))
+                    param['defaultValue'] = GPRecordSet.fromDict(param)
         return self._parameters
     #----------------------------------------------------------------------
     @property
@@ -306,17 +308,11 @@ class GPTask(BaseAGSServer):
               JOB ID as a string
         """
         url = f"{self._url}/submitJob"
-        params = { "f" : "json" }
-        if outSR is not None:
-            params['env:outSR'] = outSR
-        if processSR is not None:
-            params['end:processSR'] = processSR
-        params['returnZ'] = returnZ
-        params['returnM'] = returnM
-        if inputs is not None:
-            for p in inputs:
-                if isinstance(p, BaseGPObject):
-                    params[p.paramName] = p.value
+        params = self._submitJob_params(inputs=inputs,
+                                        outSR=outSR,
+                                        processSR=processSR,
+                                        returnZ=returnZ,
+                                        returnM=returnM)
         if method.lower() == "get":
             res = self._get(url=url, param_dict=params,
                                securityHandler=self._securityHandler,
@@ -342,6 +338,56 @@ class GPTask(BaseAGSServer):
         else:
             raise AttributeError(f"Invalid input: {method}. Must be GET or POST")
     #----------------------------------------------------------------------
+    async def submitJob_async(self, inputs, method="POST",
+                              outSR=None, processSR=None,
+                              returnZ=False, returnM=False):
+        """
+           asynchronous version of submitJob for use in coroutines, the
+           inputs and output are the same as submitJob.  Use the
+           status_async and wait_async methods of the returned GPJob to
+           follow the job without blocking the event loop.
+        """
+        url = f"{self._url}/submitJob"
+        params = self._submitJob_params(inputs=inputs,
+                                        outSR=outSR,
+                                        processSR=processSR,
+                                        returnZ=returnZ,
+                                        returnM=returnM)
+        if method.lower() == "get":
+            res = await self._aget(url=url, param_dict=params,
+                                   securityHandler=self._securityHandler,
+                                   proxy_url=self._proxy_url,
+                                   proxy_port=self._proxy_port)
+        elif method.lower() == "post":
+            res = await self._apost(url=url, param_dict=params,
+                                    securityHandler=self._securityHandler,
+                                    proxy_url=self._proxy_url,
+                                    proxy_port=self._proxy_port)
+        else:
+            raise AttributeError(f"Invalid input: {method}. Must be GET or POST")
+        job = GPJob(url=f"{self._url}/jobs/{res['jobId']}",
+                    securityHandler=self._securityHandler,
+                    proxy_url=self._proxy_url,
+                    proxy_port=self._proxy_port)
+        await job.status_async()
+        return job
+    #----------------------------------------------------------------------
+    def _submitJob_params(self, inputs, outSR=None, processSR=None,
+                          returnZ=False, returnM=False):
+        """builds the parameters of a submitJob request"""
+        params = { "f" : "json" }
+        if outSR is not None:
+            params['env:outSR'] = outSR
+        if processSR is not None:
+            params['end:processSR'] = processSR
+        params['returnZ'] = returnZ
+        params['returnM'] = returnM
+        if inputs is not None:
+            for p in inputs:
+                if isinstance(p, BaseGPObject):
+                    params[p.paramName] = p.value
+        return params
+    #----------------------------------------------------------------------
     def executeTask(self,
                     inputs,
                     outSR=None,
@@ -421,6 +467,10 @@ class GPJob(BaseAGSServer):
                                  securityHandler=self._securityHandler,
                                  proxy_url=self._proxy_url,
                                  proxy_port=self._proxy_port)
+        self._load_json(json_dict)
+    #----------------------------------------------------------------------
+    def _load_json(self, json_dict):
+        """ sets the properties from the job resource """
         self._json = json.dumps(json_dict)
         attributes = [attr for attr in dir(self)
                     if not attr.startswith('__') and \
@@ -432,6 +482,39 @@ class GPJob(BaseAGSServer):
                 print (k, " - attribute not implemented for GPJob.")
             del k,v
     #----------------------------------------------------------------------
+    async def status_async(self):
+        """
+        asynchronous version of jobStatus for use in coroutines, reloads
+        the job and returns its status
+        """
+        json_dict = await self._aget(url=self._url,
+                                     param_dict={"f" : "json"},
+                                     securityHandler=self._securityHandler,
+                                     proxy_url=self._proxy_url,
+                                     proxy_port=self._proxy_port)
+        self._load_json(json_dict)
+        return self._jobStatus
+    #----------------------------------------------------------------------
+    async def wait_async(self, poll_interval=5, timeout=None):
+        """
+        waits without blocking the event loop until the job has finished
+        Inputs:
+           poll_interval - seconds between two status requests
+           timeout - maximum seconds to wait, None waits until the job ends
+        Output:
+           the final job status
+        """
+        start = time.time()
+        status = await self.status_async()
+        while status not in ('esriJobSucceeded', 'esriJobFailed',
+                             'esriJobCancelled', 'esriJobTimedOut'):
+            if timeout is not None and time.time() - start >= timeout:
+                raise asyncio.TimeoutError(
+                    f"job {self._jobId} did not finish within {timeout} seconds")
+            await asyncio.sleep(poll_interval)
+            status = await self.status_async()
+        return status
+    #----------------------------------------------------------------------
     def cancelJob(self):
         """ cancels the job """
         params = {
@@ -473,31 +556,31 @@ class GPJob(BaseAGSServer):
         for k,v in self._results.items():
             param = self._get_json(v['paramUrl'])
             if param['dataType'] == "GPFeatureRecordSetLayer":
-                self._results[k] = GPFeatureRecordSetLayer.fromJSON(json.dumps(param))
+                self._results[k] = GPFeatureRecordSetLayer.fromDict(param)
             elif param['dataType'].lower().find('gpmultivalue') > -1:
-                self._results[k] = GPMultiValue.fromJSON(json.dumps(param))
+                self._results[k] = GPMultiValue.fromDict(param)
             elif param['dataType'] == "GPString":
-                self._results[k] = GPString.fromJSON(json.dumps(param))
+                self._results[k] = GPString.fromDict(param)
             elif param['dataType'] == "GPLong":
-                self._results[k] = GPLong.fromJSON(json.dumps(param))
+                self._results[k] = GPLong.fromDict(param)
             elif param['dataType'] == "GPDouble":
-                self._results[k] = GPDouble.fromJSON(json.dumps(param))
+                self._results[k] = GPDouble.fromDict(param)
             elif param['dataType'] == "GPDate":
-                self._results[k] = GPDate.fromJSON(json.dumps(param))
+                self._results[k] = GPDate.fromDict(param)
             elif param['dataType'] == "GPBoolean":
-                self._results[k] = GPBoolean.fromJSON(json.dumps(param))
+                self._results[k] = GPBoolean.fromDict(param)
             elif param['dataType'] == "GPDataFile":
-                self._results[k] = GPDataFile.fromJSON(json.dumps(param))
+                self._results[k] = GPDataFile.fromDict(param)
             elif param['dataType'] == "GPLinearUnit":
-                self._results[k] = GPLinearUnit.fromJSON(json.dumps(param))
+                self._results[k] = GPLinearUnit.fromDict(param)
             elif param['dataType'] == "GPMultiValue":
-                self._results[k] = GPMultiValue.fromJSON(json.dumps(param))
+                self._results[k] = GPMultiValue.fromDict(param)
             elif param['dataType'] == "GPRasterData":
-                self._results[k] = GPRasterData.fromJSON(json.dumps(param))
+                self._results[k] = GPRasterData.fromDict(param)
             elif param['dataType'] == "GPRasterDataLayer":
-                self._results[k] = GPRasterDataLayer.fromJSON(json.dumps(param))
+                self._results[k] = GPRasterDataLayer.fromDict(param)
             elif param['dataType'] == "GPRecordSet":
-                self._results[k] = GPRecordSet.fromJSON(json.dumps(param))
+                self._results[k] = GPRecordSet.fromDict(param)
         return self._results
     #----------------------------------------------------------------------
     @property
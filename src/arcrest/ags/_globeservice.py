@@ -1,7 +1,7 @@
 from __future__ import absolute_import
 from __future__ import print_function
 from .._abstract.abstract import BaseAGSServer
-import json
+from ..web import _json as json
 ########################################################################
 class GlobeServiceLayer(BaseAGSServer):
     """
@@ -3,7 +3,7 @@
 """
 from __future__ import absolute_import
 from __future__ import print_function
-import json
+from ..web import _json as json
 from ..common.general import local_time_to_online
 from .._abstract.abstract import BaseGPObject
 ########################################################################
@@ -51,7 +51,11 @@ class GPMultiValue(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPMultiValue.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPMultiValue(gptype=j['dataType'])
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -100,7 +104,11 @@ class GPRecordSet(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPRecordSet.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPRecordSet()
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -186,7 +194,11 @@ class GPFeatureRecordSetLayer(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPFeatureRecordSetLayer.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPFeatureRecordSetLayer()
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -253,7 +265,11 @@ class GPRasterDataLayer(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPRasterDataLayer.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPRasterDataLayer()
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -301,7 +317,11 @@ class GPRasterData(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPRasterData.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPRasterData()
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -347,7 +367,11 @@ class GPDataFile(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPDataFile.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPDataFile()
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -394,7 +418,11 @@ class GPLinearUnit(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPLinearUnit.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPLinearUnit()
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -439,7 +467,11 @@ class GPDate(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPDate.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPDate()
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -483,7 +515,11 @@ class GPBoolean(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPBoolean.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPBoolean()
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -527,7 +563,11 @@ class GPLong(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPLong.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPLong()
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -571,7 +611,11 @@ class GPString(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPString.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPString()
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -615,7 +659,11 @@ class GPDouble(BaseGPObject):
     @staticmethod
     def fromJSON(value):
         """loads the GP object from a JSON string """
-        j = json.loads(value)
+        return GPDouble.fromDict(json.loads(value))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(j):
+        """loads the GP object from a decoded JSON dictionary """
         v = GPDouble()
         v.value = j['defaultValue'] if "defaultValue" in j else j['value']
         if 'paramName' in j:
@@ -4,7 +4,7 @@ from .._abstract.abstract import BaseSecurityHandler, BaseAGSServer
 from ..security import AGSTokenSecurityHandler, PortalServerSecurityHandler
 from ..common.general import MosaicRuleObject, local_time_to_online
 import datetime, urllib
-import json
+from ..web import _json as json
 from ..common import filters
 ########################################################################
 class ImageService(BaseAGSServer):
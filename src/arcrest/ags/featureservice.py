@@ -7,7 +7,7 @@ from re import search
 from .._abstract.abstract import BaseAGSServer, BaseSecurityHandler
 from ..security import security
 from ..agol.services import FeatureLayer
-import json
+from ..web import _json as json
 from ..common.geometry import SpatialReference
 from ..common.general import FeatureSet
 from ..common.filters import LayerDefinitionFilter, GeometryFilter, TimeFilter
@@ -397,9 +397,9 @@ class FeatureService(BaseAGSServer):
         if returnIdsOnly == False and returnCountOnly == False:
             if isinstance(res, str):
                 jd = json.loads(res)
-                return [FeatureSet.fromJSON(json.dumps(lyr)) for lyr in jd['layers']]
+                return [FeatureSet.fromDict(lyr) for lyr in jd['layers']]
             elif isinstance(res, dict):
-                return [FeatureSet.fromJSON(json.dumps(lyr)) for lyr in res['layers']]
+                return [FeatureSet.fromDict(lyr) for lyr in res['layers']]
             else:
                 return res
         return res
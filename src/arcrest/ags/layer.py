@@ -2,7 +2,7 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import division
 import os
-import json
+from ..web import _json as json
 import uuid
 from ..packages.six.moves import urllib_parse as urlparse
 from .._abstract.abstract import BaseAGSServer
@@ -924,7 +924,7 @@ class FeatureLayer_Depricated(BaseAGSServer):
         ):
             return results
         if not returnFeatureClass:
-            return FeatureSet.fromJSON(json.dumps(results))
+            return FeatureSet.fromDict(results)
         json_text = json.dumps(results)
         temp = scratchFolder() + os.sep + uuid.uuid4().get_hex() + ".json"
         with open(temp, 'wb') as writer:
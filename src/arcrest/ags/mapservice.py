@@ -1,6 +1,6 @@
 from __future__ import absolute_import
 from __future__ import print_function
-import json
+from ..web import _json as json
 import time
 import tempfile
 from .._abstract.abstract import BaseAGSServer, DynamicData, BaseSecurityHandler
@@ -864,7 +864,7 @@ class MapService(BaseAGSServer):
                                 tilePackage=False,
                                 exportExtent="DEFAULTEXTENT",
                                 areaOfInterest=None,
-                                async=True):
+                                asynchronous=True):
         """
         The estimateExportTilesSize operation is an asynchronous task that
         allows estimation of the size of the tile package or the cache data
@@ -907,7 +907,7 @@ class MapService(BaseAGSServer):
 	   Example: { "features": [{"geometry":{"rings":[[[-100,35],
              [-100,45],[-90,45],[-90,35],[-100,35]]],
              "spatialReference":{"wkid":4326}}}]}
-        async - (optional) the estimate function is run asynchronously
+        asynchronous - (optional) the estimate function is run asynchronously
          requiring the tool status to be checked manually to force it to
          run synchronously the tool will check the status until the
          estimation completes.  The default is True, which means the status
@@ -929,7 +929,7 @@ class MapService(BaseAGSServer):
                 params['areaOfInterest'] = template
             else:
                 params['areaOfInterest'] = areaOfInterest
-        if async == True:
+        if asynchronous == True:
             return self._get(url=url,
                                 param_dict=params,
                                 securityHandler=self._securityHandler,
@@ -963,7 +963,7 @@ class MapService(BaseAGSServer):
                     optimizeTilesForSize=True,
                     compressionQuality=0,
                     areaOfInterest=None,
-                    async=False
+                    asynchronous=False
                     ):
         """
         The exportTiles operation is performed as an asynchronous task and
@@ -1038,7 +1038,7 @@ class MapService(BaseAGSServer):
         Example: { "features": [{"geometry":{"rings":[[[-100,35],
          [-100,45],[-90,45],[-90,35],[-100,35]]],
          "spatialReference":{"wkid":4326}}}]}
-        async - default True, this value ensures the returns are returned
+        asynchronous - default True, this value ensures the returns are returned
          to the user instead of the user having the check the job status
          manually.
         """
@@ -1056,7 +1056,7 @@ class MapService(BaseAGSServer):
             geom = areaOfInterest.asDictionary()
             template = { "features": [geom]}
             params["areaOfInterest"] = template
-        if async == True:
+        if asynchronous == True:
             return self._get(url=url, param_dict=params,
                             proxy_url=self._proxy_url,
                             proxy_port=self._proxy_port)
@@ -8,7 +8,7 @@ from __future__ import print_function
 from . import BaseAGSServer
 from ..packages.six.moves.urllib_parse import urlparse
 
-import json
+from ..web import _json as json
 from ._geoprocessing import GPService
 from .mapservice import MapService
 from .featureservice import FeatureService
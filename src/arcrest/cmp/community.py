@@ -1,6 +1,6 @@
 from __future__ import print_function
 from __future__ import absolute_import
-import json
+from ..web import _json as json
 from ..packages.six.moves.urllib_parse import quote
 from ..agol import FeatureService
 from .._abstract.abstract import BaseCMP
@@ -1,7 +1,12 @@
 from __future__ import absolute_import
 from . import spatial
 from . import general
+from . import columnar
 from . import geometry
+from . import projection
+from . import quantization
+from . import pbf
+from . import writers
 from . import filters
 from . import servicedef
 from . import find
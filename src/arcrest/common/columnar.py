@@ -0,0 +1,666 @@
+"""
+   Columnar feature sets backed by NumPy arrays.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from ..web import _json as json
+from collections import OrderedDict
+try:
+    import numpy as np
+    numpyFound = True
+except ImportError:
+    numpyFound = False
+from .general import Feature, FeatureSet, _date_handler
+
+__all__ = ["ColumnarFeatureSet", "GeometryColumn", "numpyFound"]
+
+_INTEGER_TYPES = ("esriFieldTypeOID", "esriFieldTypeSmallInteger",
+                  "esriFieldTypeInteger", "esriFieldTypeBigInteger",
+                  "esriFieldTypeDate")
+_FLOAT_TYPES = ("esriFieldTypeDouble", "esriFieldTypeSingle")
+_PART_KEYS = {"esriGeometryMultipoint" : "points",
+              "esriGeometryPolyline" : "paths",
+              "esriGeometryPolygon" : "rings"}
+_BLOCK_SIZE = 10000
+#----------------------------------------------------------------------
+def _require_numpy():
+    """raises an error when NumPy is not installed"""
+    if numpyFound == False:
+        raise Exception("NumPy is required to use this function")
+#----------------------------------------------------------------------
+def _ranges(starts, counts):
+    """returns the concatenated ranges [start, start + count) as one array"""
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(total, dtype=np.int64)
+#----------------------------------------------------------------------
+def _offsets(counts):
+    """returns the offsets array (length n + 1) of a list of counts"""
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets
+#----------------------------------------------------------------------
+def _column(values, fieldType=None):
+    """
+    builds the typed array and null mask of one attribute
+    Output:
+       (array, nulls) where nulls is None for columns without nulls
+    """
+    if fieldType in _INTEGER_TYPES or fieldType in _FLOAT_TYPES:
+        dtype = np.int64 if fieldType in _INTEGER_TYPES else np.float64
+        nulls = np.fromiter((v is None for v in values), dtype=bool,
+                            count=len(values))
+        if nulls.any():
+            values = [0 if v is None else v for v in values]
+        else:
+            nulls = None
+        try:
+            return np.array(values, dtype=dtype), nulls
+        except (TypeError, ValueError, OverflowError):
+            pass
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column, None
+########################################################################
+class GeometryColumn(object):
+    """
+    Geometries of a ColumnarFeatureSet.  Points are stored as one row of
+    coordinates per feature.  Multipoints, polylines and polygons share a
+    flat coordinate buffer, part_offsets gives the first coordinate of each
+    part and geometry_offsets the first part of each geometry.  Geometry
+    types that cannot be stored this way (envelopes, curves) are kept as
+    an object array of dictionaries.
+
+    Inputs:
+       geometryType - esriGeometryPoint, esriGeometryMultipoint,
+          esriGeometryPolyline or esriGeometryPolygon
+       coords - float64 array of shape (coordinates, dimensions)
+       part_offsets - int64 array, start of each part in coords plus the
+          end of the last part
+       geometry_offsets - int64 array, start of each geometry in the parts
+          plus the end of the last geometry
+       nulls - bool array, True for features without a geometry
+       objects - object array of geometry dictionaries, used instead of
+          the coordinate arrays
+       hasZ - coordinates carry a Z value
+       hasM - coordinates carry an M value
+    """
+    _geometryType = None
+    _coords = None
+    _part_offsets = None
+    _geometry_offsets = None
+    _nulls = None
+    _objects = None
+    _hasZ = False
+    _hasM = False
+    #----------------------------------------------------------------------
+    def __init__(self, geometryType, coords=None, part_offsets=None,
+                 geometry_offsets=None, nulls=None, objects=None,
+                 hasZ=False, hasM=False):
+        """Constructor"""
+        _require_numpy()
+        self._geometryType = geometryType
+        self._coords = coords
+        self._part_offsets = part_offsets
+        self._geometry_offsets = geometry_offsets
+        self._nulls = nulls
+        self._objects = objects
+        self._hasZ = bool(hasZ)
+        self._hasM = bool(hasM)
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromList(geometries, geometryType, hasZ=False, hasM=False):
+        """
+        builds a GeometryColumn from a list of Esri JSON geometry
+        dictionaries (None for features without a geometry)
+        """
+        _require_numpy()
+        count = len(geometries)
+        keys = ["x", "y"] + (["z"] if hasZ else []) + (["m"] if hasM else [])
+        dims = len(keys)
+        if geometryType == "esriGeometryPoint":
+            nan = float('nan')
+            nulls = np.fromiter((not g or g.get('x') is None for g in geometries),
+                                dtype=bool, count=count)
+            coords = np.array([[nan if g.get(k) is None else g[k] for k in keys]
+                               if g else [nan] * dims
+                               for g in geometries],
+                              dtype=np.float64).reshape(count, dims)
+            return GeometryColumn(geometryType, coords=coords, nulls=nulls,
+                                  hasZ=hasZ, hasM=hasM)
+        nulls = np.fromiter((not g for g in geometries), dtype=bool,
+                            count=count)
+        key = _PART_KEYS.get(geometryType)
+        if key is None or \
+           any(g and key not in g for g in geometries):
+            objects = np.empty(count, dtype=object)
+            objects[:] = geometries
+            return GeometryColumn(geometryType, objects=objects, nulls=nulls,
+                                  hasZ=hasZ, hasM=hasM)
+        if key == "points":
+            parts = [[g[key]] if g else [] for g in geometries]
+        else:
+            parts = [g[key] if g else [] for g in geometries]
+        geometry_offsets = _offsets([len(p) for p in parts])
+        flat_parts = [part for p in parts for part in p]
+        part_offsets = _offsets([len(part) for part in flat_parts])
+        points = [pt for part in flat_parts for pt in part]
+        try:
+            coords = np.array(points, dtype=np.float64).reshape(len(points), dims)
+        except (TypeError, ValueError):
+            # ragged or null coordinates, pad them one by one
+            nan = float('nan')
+            coords = np.array([[nan if v is None else v for v in pt[:dims]] +
+                               [nan] * (dims - len(pt[:dims]))
+                               for pt in points],
+                              dtype=np.float64).reshape(len(points), dims)
+        return GeometryColumn(geometryType, coords=coords,
+                              part_offsets=part_offsets,
+                              geometry_offsets=geometry_offsets,
+                              nulls=nulls, hasZ=hasZ, hasM=hasM)
+    #----------------------------------------------------------------------
+    @property
+    def geometryType(self):
+        """gets the geometry type"""
+        return self._geometryType
+    #----------------------------------------------------------------------
+    @property
+    def coords(self):
+        """gets the coordinate array (None for object storage)"""
+        return self._coords
+    #----------------------------------------------------------------------
+    @property
+    def part_offsets(self):
+        """gets the start of each part in coords"""
+        return self._part_offsets
+    #----------------------------------------------------------------------
+    @property
+    def geometry_offsets(self):
+        """gets the start of each geometry in the parts"""
+        return self._geometry_offsets
+    #----------------------------------------------------------------------
+    @property
+    def nulls(self):
+        """gets the mask of features without a geometry"""
+        return self._nulls
+    #----------------------------------------------------------------------
+    @property
+    def hasZ(self):
+        """gets if the coordinates carry Z values"""
+        return self._hasZ
+    #----------------------------------------------------------------------
+    @property
+    def hasM(self):
+        """gets if the coordinates carry M values"""
+        return self._hasM
+    #----------------------------------------------------------------------
+    def __len__(self):
+        """returns the number of geometries"""
+        return len(self._nulls)
+    #----------------------------------------------------------------------
+    def geometry(self, index):
+        """returns the geometry of a feature as an Esri JSON dictionary"""
+        if self._nulls[index]:
+            return None
+        if self._objects is not None:
+            return self._objects[index]
+        if self._geometryType == "esriGeometryPoint":
+            keys = ["x", "y"] + (["z"] if self._hasZ else []) + \
+                (["m"] if self._hasM else [])
+            return dict(zip(keys, self._coords[index].tolist()))
+        po = self._part_offsets
+        go = self._geometry_offsets
+        parts = [self._coords[po[p]:po[p + 1]].tolist()
+                 for p in range(go[index], go[index + 1])]
+        key = _PART_KEYS[self._geometryType]
+        geom = {key : parts[0] if key == "points" else parts}
+        if self._hasZ:
+            geom['hasZ'] = True
+        if self._hasM:
+            geom['hasM'] = True
+        return geom
+    #----------------------------------------------------------------------
+    def take(self, indices):
+        """returns a GeometryColumn of the geometries at the indices"""
+        indices = np.asarray(indices, dtype=np.int64)
+        nulls = self._nulls[indices]
+        if self._objects is not None:
+            return GeometryColumn(self._geometryType,
+                                  objects=self._objects[indices],
+                                  nulls=nulls, hasZ=self._hasZ, hasM=self._hasM)
+        if self._geometryType == "esriGeometryPoint":
+            return GeometryColumn(self._geometryType,
+                                  coords=self._coords[indices],
+                                  nulls=nulls, hasZ=self._hasZ, hasM=self._hasM)
+        go = self._geometry_offsets
+        po = self._part_offsets
+        part_counts = go[indices + 1] - go[indices]
+        parts = _ranges(go[indices], part_counts)
+        coord_counts = po[parts + 1] - po[parts]
+        coords = self._coords[_ranges(po[parts], coord_counts)]
+        return GeometryColumn(self._geometryType, coords=coords,
+                              part_offsets=_offsets(coord_counts),
+                              geometry_offsets=_offsets(part_counts),
+                              nulls=nulls, hasZ=self._hasZ, hasM=self._hasM)
+########################################################################
+class ColumnarFeatureSet(object):
+    """
+    A FeatureSet stored by column: one typed NumPy array per field (int64
+    for integer and date fields, float64 for doubles, object arrays for
+    strings and other values) and a GeometryColumn for the shapes.  Null
+    values of numeric fields are tracked in a separate mask.  Feature
+    objects are only built when the set is iterated or indexed, so large
+    extracts need a fraction of the memory of a FeatureSet and filters and
+    statistics can be computed on whole columns.
+
+    Requires NumPy.
+
+    Usage:
+    >>> fs = layer.query(where="1=1", as_columnar=True)
+    >>> pop = fs.column("POP2010")
+    >>> large = fs.filter(pop > 100000)
+    >>> print(len(large), pop.mean())
+    """
+    _fields = None
+    _columns = None
+    _nulls = None
+    _geometry = None
+    _geometryType = None
+    _spatialReference = None
+    _hasZ = None
+    _hasM = None
+    _displayFieldName = None
+    _objectIdFieldName = None
+    _globalIdFieldName = None
+    _length = None
+    #----------------------------------------------------------------------
+    def __init__(self,
+                 fields,
+                 columns,
+                 nulls=None,
+                 geometry=None,
+                 geometryType=None,
+                 spatialReference=None,
+                 hasZ=False,
+                 hasM=False,
+                 displayFieldName=None,
+                 objectIdFieldName=None,
+                 globalIdFieldName=None):
+        """Constructor"""
+        _require_numpy()
+        self._fields = fields
+        self._columns = OrderedDict(columns)
+        self._nulls = dict((k, v) for k, v in (nulls or {}).items()
+                           if v is not None)
+        self._geometry = geometry
+        self._geometryType = geometryType
+        self._spatialReference = spatialReference
+        self._hasZ = hasZ
+        self._hasM = hasM
+        self._displayFieldName = displayFieldName
+        self._objectIdFieldName = objectIdFieldName
+        self._globalIdFieldName = globalIdFieldName
+        if geometry is not None:
+            self._length = len(geometry)
+        elif self._columns:
+            self._length = len(next(iter(self._columns.values())))
+        else:
+            self._length = 0
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(value):
+        """builds a ColumnarFeatureSet from a decoded query response"""
+        _require_numpy()
+        fields = value.get('fields') or []
+        features = value.get('features') or []
+        names = [fld['name'] for fld in fields]
+        types = dict((fld['name'], fld.get('type')) for fld in fields)
+        if features:
+            known = set(names)
+            names += [k for k in (features[0].get('attributes') or {})
+                      if k not in known]
+        attributes = [f.get('attributes') or {} for f in features]
+        columns = OrderedDict()
+        nulls = {}
+        for name in names:
+            columns[name], nulls[name] = _column([a.get(name) for a in attributes],
+                                                 types.get(name))
+        geometryType = value.get('geometryType')
+        geometry = None
+        if geometryType is not None or \
+           any('geometry' in f for f in features[:1]):
+            geometry = GeometryColumn.fromList([f.get('geometry') for f in features],
+                                               geometryType,
+                                               hasZ=value.get('hasZ', False),
+                                               hasM=value.get('hasM', False))
+        return ColumnarFeatureSet(fields=fields,
+                                  columns=columns,
+                                  nulls=nulls,
+                                  geometry=geometry,
+                                  geometryType=geometryType,
+                                  spatialReference=value.get('spatialReference'),
+                                  hasZ=value.get('hasZ', False),
+                                  hasM=value.get('hasM', False),
+                                  displayFieldName=value.get('displayFieldName'),
+                                  objectIdFieldName=value.get('objectIdFieldName'),
+                                  globalIdFieldName=value.get('globalIdFieldName'))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromJSON(jsonValue):
+        """builds a ColumnarFeatureSet from a JSON string"""
+        return ColumnarFeatureSet.fromDict(json.loads(jsonValue))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromFeatureSet(featureSet):
+        """builds a ColumnarFeatureSet from a FeatureSet"""
+        return ColumnarFeatureSet.fromDict(featureSet.value)
+    #----------------------------------------------------------------------
+    @staticmethod
+    def from_numpy(array, geometryType=None, spatialReference=None,
+                   fields=None, objectIdFieldName=None):
+        """
+        builds a ColumnarFeatureSet from a NumPy structured array, such as
+        the output of to_numpy().  The SHAPE@X, SHAPE@Y, SHAPE@Z and
+        SHAPE@M columns become point geometries and a SHAPE@JSON column of
+        Esri JSON strings becomes the geometries of other types.  NaN
+        values of float columns are treated as nulls.
+        Inputs:
+           array - structured array, one named column per field
+           geometryType - geometry type of a SHAPE@JSON column
+           spatialReference - spatial reference dictionary of the shapes
+           fields - list of field dictionaries, derived from the array's
+              dtype when not given
+           objectIdFieldName - name of the object id field
+        """
+        _require_numpy()
+        names = [n for n in array.dtype.names if not n.startswith("SHAPE@")]
+        if fields is None:
+            fields = []
+            for name in names:
+                kind = array.dtype[name].kind
+                if name == objectIdFieldName:
+                    fieldType = "esriFieldTypeOID"
+                elif kind in "iub":
+                    fieldType = "esriFieldTypeInteger"
+                elif kind == "f":
+                    fieldType = "esriFieldTypeDouble"
+                elif kind == "M":
+                    fieldType = "esriFieldTypeDate"
+                else:
+                    fieldType = "esriFieldTypeString"
+                fields.append({"name" : name, "type" : fieldType,
+                               "alias" : name})
+        types = dict((fld['name'], fld.get('type')) for fld in fields)
+        columns = OrderedDict()
+        nulls = {}
+        for name in names:
+            column = array[name]
+            kind = column.dtype.kind
+            if kind == "f" and types.get(name) in _INTEGER_TYPES:
+                # integer columns with nulls were exported as float
+                mask = np.isnan(column)
+                nulls[name] = mask if mask.any() else None
+                column = np.where(mask, 0, column).astype(np.int64)
+            elif kind == "M":
+                column = column.astype('datetime64[ms]').astype(np.int64)
+            elif kind == "b":
+                column = column.astype(np.int64)
+            elif kind in "US":
+                column = column.astype(object)
+            elif kind == "f":
+                mask = np.isnan(column)
+                nulls[name] = mask if mask.any() else None
+            columns[name] = np.ascontiguousarray(column)
+        hasZ = "SHAPE@Z" in array.dtype.names
+        hasM = "SHAPE@M" in array.dtype.names
+        geometry = None
+        if "SHAPE@X" in array.dtype.names and "SHAPE@Y" in array.dtype.names:
+            geometryType = "esriGeometryPoint"
+            keys = ["SHAPE@X", "SHAPE@Y"] + (["SHAPE@Z"] if hasZ else []) + \
+                (["SHAPE@M"] if hasM else [])
+            coords = np.column_stack([array[k].astype(np.float64) for k in keys])
+            geometry = GeometryColumn(geometryType, coords=coords,
+                                      nulls=np.isnan(coords[:, :2]).any(axis=1),
+                                      hasZ=hasZ, hasM=hasM)
+        elif "SHAPE@JSON" in array.dtype.names:
+            shapes = [json.loads(s) if s else None for s in array["SHAPE@JSON"]]
+            geometry = GeometryColumn.fromList(shapes, geometryType,
+                                               hasZ=any(s and s.get('hasZ') for s in shapes),
+                                               hasM=any(s and s.get('hasM') for s in shapes))
+            hasZ = geometry.hasZ
+            hasM = geometry.hasM
+        return ColumnarFeatureSet(fields=fields,
+                                  columns=columns,
+                                  nulls=nulls,
+                                  geometry=geometry,
+                                  geometryType=geometryType,
+                                  spatialReference=spatialReference,
+                                  hasZ=hasZ,
+                                  hasM=hasM,
+                                  objectIdFieldName=objectIdFieldName)
+    #----------------------------------------------------------------------
+    def to_numpy(self, include_geometry=True):
+        """
+        returns the set as a NumPy structured array with one column per
+        field.  Integer columns with nulls become float64 columns with NaN.
+        Point geometries are added as SHAPE@X, SHAPE@Y (SHAPE@Z, SHAPE@M)
+        columns, other geometries as a SHAPE@JSON column of JSON strings.
+        """
+        arrays = []
+        for name, column in self._columns.items():
+            mask = self._nulls.get(name)
+            if mask is not None and column.dtype.kind != "O":
+                column = column.astype(np.float64)
+                column[mask] = np.nan
+            arrays.append((name, column))
+        geometry = self._geometry
+        if include_geometry and geometry is not None:
+            if geometry.geometryType == "esriGeometryPoint" and \
+               geometry.coords is not None:
+                keys = ["SHAPE@X", "SHAPE@Y"] + \
+                    (["SHAPE@Z"] if geometry.hasZ else []) + \
+                    (["SHAPE@M"] if geometry.hasM else [])
+                for i, key in enumerate(keys):
+                    arrays.append((key, geometry.coords[:, i]))
+            else:
+                shapes = np.empty(self._length, dtype=object)
+                shapes[:] = [None if geometry.nulls[i] else json.dumps(geometry.geometry(i))
+                             for i in range(self._length)]
+                arrays.append(("SHAPE@JSON", shapes))
+        result = np.empty(self._length,
+                          dtype=[(name, column.dtype) for name, column in arrays])
+        for name, column in arrays:
+            result[name] = column
+        return result
+    #----------------------------------------------------------------------
+    def toFeatureSet(self):
+        """returns the set as a row based FeatureSet"""
+        return FeatureSet(fields=self._fields,
+                          features=list(self),
+                          hasZ=self._hasZ,
+                          hasM=self._hasM,
+                          geometryType=self._geometryType,
+                          spatialReference=self._spatialReference,
+                          displayFieldName=self._displayFieldName,
+                          objectIdFieldName=self._objectIdFieldName,
+                          globalIdFieldName=self._globalIdFieldName)
+    #----------------------------------------------------------------------
+    def column(self, name):
+        """returns the array of a field"""
+        return self._columns[name]
+    #----------------------------------------------------------------------
+    def null_mask(self, name):
+        """returns the mask of null values of a field"""
+        mask = self._nulls.get(name)
+        if mask is not None:
+            return mask
+        column = self._columns[name]
+        if column.dtype.kind == "O":
+            return np.fromiter((v is None for v in column), dtype=bool,
+                               count=len(column))
+        return np.zeros(len(column), dtype=bool)
+    #----------------------------------------------------------------------
+    @property
+    def columns(self):
+        """gets the names of the columns"""
+        return list(self._columns.keys())
+    #----------------------------------------------------------------------
+    @property
+    def geometry(self):
+        """gets the GeometryColumn or None for tables"""
+        return self._geometry
+    #----------------------------------------------------------------------
+    def take(self, indices):
+        """returns a new set with the features at the indices"""
+        indices = np.asarray(indices, dtype=np.int64)
+        columns = OrderedDict((name, column[indices])
+                              for name, column in self._columns.items())
+        nulls = dict((name, mask[indices])
+                     for name, mask in self._nulls.items())
+        geometry = self._geometry.take(indices) \
+            if self._geometry is not None else None
+        return ColumnarFeatureSet(fields=self._fields,
+                                  columns=columns,
+                                  nulls=nulls,
+                                  geometry=geometry,
+                                  geometryType=self._geometryType,
+                                  spatialReference=self._spatialReference,
+                                  hasZ=self._hasZ,
+                                  hasM=self._hasM,
+                                  displayFieldName=self._displayFieldName,
+                                  objectIdFieldName=self._objectIdFieldName,
+                                  globalIdFieldName=self._globalIdFieldName)
+    #----------------------------------------------------------------------
+    def filter(self, mask):
+        """returns a new set with the features where the mask is True"""
+        return self.take(np.flatnonzero(np.asarray(mask, dtype=bool)))
+    #----------------------------------------------------------------------
+    def _rows(self, start, stop):
+        """yields the feature dictionaries of a range of rows"""
+        names = list(self._columns.keys())
+        lists = []
+        for name in names:
+            values = self._columns[name][start:stop].tolist()
+            mask = self._nulls.get(name)
+            if mask is not None:
+                values = [None if m else v for v, m in
+                          zip(values, mask[start:stop].tolist())]
+            lists.append(values)
+        geometry = self._geometry
+        for offset, row in enumerate(zip(*lists) if lists else
+                                     ((),) * (stop - start)):
+            feature = {"attributes" : dict(zip(names, row))}
+            if geometry is not None:
+                geom = geometry.geometry(start + offset)
+                if geom is not None:
+                    feature['geometry'] = geom
+            yield feature
+    #----------------------------------------------------------------------
+    def row(self, index):
+        """returns the feature dictionary of a row"""
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("row index out of range")
+        return next(self._rows(index, index + 1))
+    #----------------------------------------------------------------------
+    def __iter__(self):
+        """yields Feature objects built on demand"""
+        for start in range(0, self._length, _BLOCK_SIZE):
+            for feature in self._rows(start, min(start + _BLOCK_SIZE, self._length)):
+                yield Feature(json_string=feature,
+                              spatialReference=self._spatialReference)
+    #----------------------------------------------------------------------
+    def __len__(self):
+        """returns the number of features"""
+        return self._length
+    #----------------------------------------------------------------------
+    def __getitem__(self, key):
+        """
+        returns the column of a field name, the Feature of an integer
+        index, or a new set for a slice, index array or boolean mask
+        """
+        if isinstance(key, str):
+            return self.column(key)
+        if isinstance(key, (int, np.integer)):
+            return Feature(json_string=self.row(int(key)),
+                           spatialReference=self._spatialReference)
+        if isinstance(key, slice):
+            return self.take(np.arange(self._length)[key])
+        key = np.asarray(key)
+        if key.dtype == bool:
+            return self.filter(key)
+        return self.take(key)
+    #----------------------------------------------------------------------
+    @property
+    def features(self):
+        """gets the features as a list of Feature objects"""
+        return list(self)
+    #----------------------------------------------------------------------
+    @property
+    def value(self):
+        """returns object as dictionary"""
+        return {
+            "objectIdFieldName" : self._objectIdFieldName,
+            "displayFieldName" : self._displayFieldName,
+            "globalIdFieldName" : self._globalIdFieldName,
+            "geometryType" : self._geometryType,
+            "spatialReference" : self._spatialReference,
+            "hasZ" : self._hasZ,
+            "hasM" : self._hasM,
+            "fields" : self._fields,
+            "features" : [row for start in range(0, self._length, _BLOCK_SIZE)
+                          for row in self._rows(start, min(start + _BLOCK_SIZE, self._length))]
+        }
+    #----------------------------------------------------------------------
+    @property
+    def toJSON(self):
+        """converts the object to JSON"""
+        return json.dumps(self.value, default=_date_handler)
+    #----------------------------------------------------------------------
+    def __str__(self):
+        """returns object as string"""
+        return self.toJSON
+    #----------------------------------------------------------------------
+    @property
+    def fields(self):
+        """gets the fields"""
+        return self._fields
+    #----------------------------------------------------------------------
+    @property
+    def spatialReference(self):
+        """gets the spatial reference"""
+        return self._spatialReference
+    #----------------------------------------------------------------------
+    @property
+    def geometryType(self):
+        """gets the geometry type"""
+        return self._geometryType
+    #----------------------------------------------------------------------
+    @property
+    def hasZ(self):
+        """gets the Z-property"""
+        return self._hasZ
+    #----------------------------------------------------------------------
+    @property
+    def hasM(self):
+        """gets the M-property"""
+        return self._hasM
+    #----------------------------------------------------------------------
+    @property
+    def objectIdFieldName(self):
+        """gets the object id field"""
+        return self._objectIdFieldName
+    #----------------------------------------------------------------------
+    @property
+    def globalIdFieldName(self):
+        """gets the globalIdFieldName"""
+        return self._globalIdFieldName
+    #----------------------------------------------------------------------
+    @property
+    def displayFieldName(self):
+        """gets the displayFieldName"""
+        return self._displayFieldName
@@ -4,7 +4,7 @@ Domains specify the set of valid values for a field.
 """
 from __future__ import absolute_import
 from __future__ import print_function
-import json
+from ..web import _json as json
 ########################################################################
 class CodedValueDomain(object):
     """
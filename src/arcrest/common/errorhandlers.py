@@ -15,7 +15,7 @@ MSGS = {
     -99999 : "An unknown error has been raised."
 
 }
-import json
+from ..web import _json as json
 #--------------------------------------------------------------------------
 def trace():
     """
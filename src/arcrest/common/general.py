@@ -3,7 +3,7 @@ from __future__ import print_function
 from __future__ import division
 import datetime
 import time
-import json
+from ..web import _json as json
 try:
     import arcpy
     arcpyFound = True
@@ -97,41 +97,62 @@ def timestamp_to_datetime(timestamp):
     return datetime.datetime.fromtimestamp(timestamp /1000)
 ########################################################################
 class Feature(object):
-    """ returns a feature  """
-    _json = None
-    _dict = None
-    _geom = None
-    _geomType = None
-    _attributes = None
-    _wkid = None
-    _wkt = None
+    """
+    returns a feature.  Features are kept as the decoded dictionary and are
+    only serialized to JSON when asked for, the JSON is then cached until
+    the feature is changed through set_value or the geometry property, or
+    its dictionaries are handed out by asDictionary.
+    Features of one FeatureSet share the set's spatial reference.
+    """
+    __slots__ = ('_dict', '_json', '_geom', '_geomType',
+                 '_spatialReference')
     #----------------------------------------------------------------------
     def __init__(self, json_string, wkid=None, spatialReference=None):
         """Constructor"""
-        self._wkid = wkid
         if type(json_string) is dict:
             self._dict = json_string
         elif type(json_string) is str:
             self._dict = json.loads(json_string)
         else:
             raise TypeError("Invalid Input, only dictionary or string allowed")
-        if 'geometry' in self._dict:
-            if wkid is not None: # kept for compatibility
-                self._dict['geometry']['spatialReference']  = {"wkid" : wkid}
-            if spatialReference is not None and isinstance(spatialReference, dict):
-                if 'wkid' in spatialReference:
-                    self._wkid = spatialReference['wkid']
-                if 'wkt' in spatialReference:
-                    self._wkt = spatialReference['wkt']
-                self._dict['geometry'].update({'spatialReference':spatialReference})
-            self._geom = self.geometry
-        self._json = json.dumps(self._dict, default=_date_handler)
+        self._json = None
+        self._geom = None
+        self._geomType = None
+        if spatialReference is not None and \
+           not isinstance(spatialReference, dict):
+            spatialReference = None
+        if wkid is not None: # kept for compatibility
+            sr = {"wkid" : wkid}
+            if spatialReference is not None:
+                sr.update(spatialReference)
+            spatialReference = sr
+        self._spatialReference = spatialReference
+    #----------------------------------------------------------------------
+    def _geometry_dict(self):
+        """
+        returns the geometry dictionary with the shared spatial reference
+        applied, or None for a table row
+        """
+        if 'feature' in self._dict:
+            return self._dict['feature'].get('geometry')
+        geom = self._dict.get('geometry')
+        if isinstance(geom, dict) and self._spatialReference is not None and \
+           geom.get('spatialReference') is not self._spatialReference:
+            geom['spatialReference'] = self._spatialReference
+        return geom
+    #----------------------------------------------------------------------
+    def _attribute_dict(self):
+        """returns the attributes dictionary"""
+        if 'feature' in self._dict:
+            return self._dict['feature']['attributes']
+        return self._dict['attributes']
     #----------------------------------------------------------------------
     def set_value(self, field_name, value):
         """ sets an attribute value for a given field name """
-        if field_name in self.fields:
+        attributes = self._attribute_dict()
+        if field_name in attributes:
             if value is not None:
-                self._dict['attributes'][field_name] = _unicode_convert(value)
+                attributes[field_name] = _unicode_convert(value)
         elif field_name.upper() in ['SHAPE', 'SHAPE@', "GEOMETRY"]:
             if isinstance(value, dict):
                 if 'geometry' in value:
@@ -145,34 +166,47 @@ class Feature(object):
                        value.type == self.geometryType:
                     self._dict['geometry']=json.loads(value.JSON)
             self._geom = None
-            self._geom = self.geometry
         else:
             return False
-        self._json = json.dumps(self._dict, default=_date_handler)
+        self._json = None
         return True
     #----------------------------------------------------------------------
     def get_value(self, field_name):
         """ returns a value for a given field name """
-        if field_name in self.fields:
-            return self._dict['attributes'][field_name]
+        attributes = self._attribute_dict()
+        if field_name in attributes:
+            return attributes[field_name]
         elif field_name.upper() in ['SHAPE', 'SHAPE@', "GEOMETRY"]:
-            return self._dict['geometry']
+            return self._geometry_dict()
         return None
     #----------------------------------------------------------------------
+    def _feature_dict(self):
+        """
+        returns a new dictionary of the geometry and attributes, features
+        wrapped in a 'feature' dictionary are unwrapped
+        """
+        self._geometry_dict()
+        if 'feature' in self._dict:
+            return dict(self._dict['feature'])
+        return dict(self._dict)
+    #----------------------------------------------------------------------
     @property
     def asDictionary(self):
-        """returns the feature as a dictionary"""
-        feat_dict = {}
-        if self._geom is not None:
-            if 'feature' in self._dict:
-                feat_dict['geometry'] = self._dict['feature']['geometry']
-            elif 'geometry' in self._dict:
-                feat_dict['geometry'] =  self._dict['geometry']
-        if 'feature' in self._dict:
-            feat_dict['attributes'] = self._dict['feature']['attributes']
-        else:
-            feat_dict['attributes'] = self._dict['attributes']
-        return self._dict
+        """
+        returns the feature as a dictionary.  Its geometry and attributes
+        are the feature's own, so the cached JSON is dropped and changes
+        made to them are seen by asJSON
+        """
+        self._json = None
+        return self._feature_dict()
+    #----------------------------------------------------------------------
+    @property
+    def asJSON(self):
+        """returns the feature as a JSON string"""
+        if self._json is None:
+            self._json = json.dumps(self._feature_dict(),
+                                    default=_date_handler)
+        return self._json
     #----------------------------------------------------------------------
     @property
     def asRow(self):
@@ -181,9 +215,9 @@ class Feature(object):
                [row items], [field names]
                returns a list of fields and the row object
         """
-        fields = self.fields
+        fields = list(self.fields)
         row = [""] * len(fields)
-        for k,v in self._attributes.items():
+        for k,v in self._attribute_dict().items():
             row[fields.index(k)] = v
             del v
             del k
@@ -197,10 +231,9 @@ class Feature(object):
         """returns the feature geometry"""
         if arcpyFound:
             if self._geom is None:
-                if 'feature' in self._dict:
-                    self._geom = arcpy.AsShape(self._dict['feature']['geometry'], esri_json=True)
-                elif 'geometry' in self._dict:
-                    self._geom = arcpy.AsShape(self._dict['geometry'], esri_json=True)
+                geom = self._geometry_dict()
+                if geom is not None:
+                    self._geom = arcpy.AsShape(geom, esri_json=True)
             return self._geom
         return None
     @geometry.setter
@@ -214,16 +247,12 @@ class Feature(object):
                 if value.type == self.geometryType:
                     self._dict['geometry']=json.loads(value.JSON)
                     self._geom = None
-                    self._geom = self.geometry
+                    self._json = None
     #----------------------------------------------------------------------
     @property
     def fields(self):
         """ returns a list of feature fields """
-        if 'feature' in self._dict:
-            self._attributes = self._dict['feature']['attributes']
-        else:
-            self._attributes = self._dict['attributes']
-        return self._attributes.keys()
+        return self._attribute_dict().keys()
     #----------------------------------------------------------------------
     @property
     def geometryType(self):
@@ -271,7 +300,7 @@ class Feature(object):
     #----------------------------------------------------------------------
     def __str__(self):
         """"""
-        return json.dumps(self.asDictionary)
+        return self.asJSON
 
 ########################################################################
 class MosaicRuleObject(object):
@@ -598,20 +627,33 @@ class FeatureSet(object):
     @staticmethod
     def fromJSON(jsonValue):
         """returns a featureset from a JSON string"""
-        jd = json.loads(jsonValue)
-        features = []
+        return FeatureSet.fromDict(json.loads(jsonValue))
+    #----------------------------------------------------------------------
+    @staticmethod
+    def fromDict(jd):
+        """
+        returns a featureset from a decoded JSON response.  The feature
+        dictionaries are wrapped where they are: the 'features' list of jd
+        becomes the list of the featureset and its items are replaced by
+        Feature objects, so pass a copy if jd is still needed as is.
+        Inputs:
+           jd - dictionary with the featureset, i.e. a query result
+        """
         fields = jd['fields'] if 'fields' in jd else {'fields':[]}
-        if 'features' in jd:
-            for feat in jd['features']:
-                wkid = None
-                spatialReference =None
-                if 'spatialReference' in jd:
-                    spatialReference = jd['spatialReference']
-                    if 'wkid' in jd['spatialReference']:
-                        wkid = jd['spatialReference']['wkid']
-                    elif 'latestWkid' in jd['spatialReference']: # kept for compatibility
-                        wkid = jd['spatialReference']['latestWkid']
-                features.append(Feature(json_string=feat, wkid=wkid, spatialReference=spatialReference))
+        features = jd['features'] if 'features' in jd else []
+        if features:
+            spatialReference = None
+            if 'spatialReference' in jd:
+                # one spatial reference is shared by all features of the set
+                spatialReference = jd['spatialReference']
+                wkid = spatialReference.get('wkid',
+                                            spatialReference.get('latestWkid'))
+                if wkid is not None: # kept for compatibility
+                    spatialReference = dict({"wkid" : wkid}, **spatialReference)
+            for i, feat in enumerate(features):
+                if not isinstance(feat, Feature):
+                    features[i] = Feature(json_string=feat,
+                                          spatialReference=spatialReference)
         return FeatureSet(fields,
                           features,
                           hasZ=jd['hasZ'] if 'hasZ' in jd else False,
@@ -726,42 +768,19 @@ class FeatureSet(object):
                 Types:
                     *.csv - CSV file returned
                     *.json - text file with json
+                    *.geojson - GeoJSON FeatureCollection
                     * If no extension, a shapefile if the path is a
                         folder, a featureclass if the path is a GDB
 
         """
         filename, file_extension = os.path.splitext(outName)
-        if (file_extension == ".csv"):
+        if file_extension.lower() in (".csv", ".json", ".geojson"):
+            from .writers import save_features
             res = os.path.join(saveLocation,outName)
-            import sys
-            if sys.version_info[0] == 2:
-                access = 'wb+'
-                kwargs = {}
+            if file_extension.lower() == ".json":
+                save_features(self, res, indent=4)
             else:
-                access = 'wt+'
-                kwargs = {'newline':''}
-            with open(res, access, **kwargs) as csvFile:
-                import csv
-                f = csv.writer(csvFile)
-                fields = [field['name'] for field in self.fields]
-                f.writerow(fields)
-
-                newRow = []
-                #Loop through the results and save each to a row
-                for feature in self:
-                    newRow = [feature.get_value(field['name']) for field in self.fields]
-                    f.writerow(newRow)
-                csvFile.close()
-            del csvFile
-        elif (file_extension == ".json"):
-            res = os.path.join(saveLocation,outName)
-            with open(res, 'wb') as writer:
-
-                json.dump(self.value, writer, sort_keys = True, indent = 4, ensure_ascii=False)
-                writer.flush()
-                writer.close()
-            del writer
-
+                save_features(self, res)
         else:
             tempDir =  tempfile.gettempdir()
             tempFile = os.path.join(tempDir, f"{uuid.uuid4().hex}.json")
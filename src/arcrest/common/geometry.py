@@ -1,11 +1,18 @@
 from __future__ import absolute_import
 from __future__ import print_function
-import json
+from ..web import _json as json
 try:
     import arcpy
     arcpyFound = True
 except:
     arcpyFound = False
+try:
+    import numpy as np
+    numpyFound = True
+except ImportError:
+    numpyFound = False
+import re
+import math
 import types
 
 
@@ -13,6 +20,68 @@ from .._abstract import abstract
 #----------------------------------------------------------------------
 def _date_handler(obj):
     return local_time_to_online(obj) if isinstance(obj, datetime.datetime) else obj
+#----------------------------------------------------------------------
+def _pack(parts):
+    """
+    stores the vertices of a list of parts in one coordinate array
+    Inputs:
+       parts - list of parts, each a list of [x, y, <z>, <m>] lists, Point
+          objects or an array of shape (vertices, dimensions)
+    Output:
+       (coords, offsets) - float64 array of shape (vertices, dimensions)
+       and the start of each part in coords plus the end of the last part.
+       Without NumPy coords is a flat list of vertex lists.
+    """
+    offsets = [0]
+    vertices = []
+    arrays = numpyFound
+    for part in parts:
+        if arrays and not isinstance(part, np.ndarray):
+            arrays = False
+        offsets.append(offsets[-1] + len(part))
+    if arrays and parts:
+        coords = np.concatenate([np.asarray(part, dtype=np.float64)
+                                 .reshape(len(part), -1) for part in parts])
+        return coords, np.array(offsets, dtype=np.int64)
+    for part in parts:
+        if isinstance(part, list) and \
+           (not part or not isinstance(part[0], Point)):
+            vertices.extend(part)
+        else:
+            vertices.extend(pt.asList if isinstance(pt, Point) else list(pt)
+                            for pt in part)
+    if not numpyFound:
+        return vertices, offsets
+    try:
+        coords = np.array(vertices, dtype=np.float64)
+    except (TypeError, ValueError):
+        # ragged vertices, missing values are padded with NaN
+        width = max(len(v) for v in vertices)
+        nan = float('nan')
+        coords = np.array([[nan if c is None else c for c in v] +
+                           [nan] * (width - len(v)) for v in vertices],
+                          dtype=np.float64)
+    if not vertices:
+        coords = np.zeros((0, 2), dtype=np.float64)
+    return coords, np.array(offsets, dtype=np.int64)
+#----------------------------------------------------------------------
+def _unpack(coords, offsets):
+    """
+    returns the parts stored by _pack() as lists of vertex lists, NaN
+    values become None
+    """
+    if numpyFound and isinstance(coords, np.ndarray):
+        rows = coords.tolist()
+        if np.isnan(coords).any():
+            rows = [[None if c != c else c for c in v] for v in rows]
+    else:
+        rows = coords
+    return [rows[offsets[i]:offsets[i + 1]]
+            for i in range(len(offsets) - 1)]
+#----------------------------------------------------------------------
+def _arcpy_parts(geom, key):
+    """returns the parts of an arcpy geometry as lists of vertex lists"""
+    return json.loads(geom.JSON).get(key, [])
 ########################################################################
 class SpatialReference(abstract.AbstractGeometry):
     """ creates a spatial reference instance """
@@ -211,45 +280,32 @@ class Point(abstract.AbstractGeometry):
         """ get/set the wkt """
         self._wkt = wkt
 ########################################################################
-class MultiPoint(abstract.AbstractGeometry):
-    """ Implements the ArcGIS JSON MultiPoint Geometry Object """
-    _geom = None
-    _json = None
-    _dict = None
+class _PartGeometry(abstract.AbstractGeometry):
+    """
+    Base of the geometries made of parts of vertices.  The vertices of all
+    parts are stored in one float64 array with a row per vertex and the
+    columns x, y, then z if hasZ and m if hasM.  part_offsets holds the
+    first row of each part plus the end of the last part, so no object is
+    created per vertex.
+    """
+    _coords = None
+    _offsets = None
     _wkid = None
     _wkt = None
-    _points = None
-    _hasZ = False
-    _hasM = False
+    _json = None
+    _dict = None
+    _geom = None
+    _hasZ = None
+    _hasM = None
+    _partsKey = None
     #----------------------------------------------------------------------
-    def __init__(self, points, wkid=None, wkt=None, hasZ=False, hasM=False):
-        """Constructor"""
-        if isinstance(points, list):
-            self._points = points
-        elif arcpyFound and isinstance(points, arcpy.Geometry):
-            self._points = self.__geomToPointList(points)
+    def _load(self, parts, wkid, wkt, hasZ, hasM):
+        """stores the parts, spatial reference and dimensions"""
+        self._coords, self._offsets = _pack(parts)
         self._wkid = wkid
         self._wkt = wkt
-        self._hasZ = hasZ
         self._hasM = hasM
-    #----------------------------------------------------------------------
-    def __geomToPointList(self, geom):
-        """ converts a geometry object to a common.Geometry object """
-        if arcpyFound and isinstance(geom, arcpy.Multipoint):
-            feature_geom = []
-            fPart = []
-            for part in geom:
-                fPart = [
-                    Point(
-                        coord=[pnt.X, pnt.Y],
-                        wkid=geom.spatialReference.factoryCode,
-                        z=pnt.Z,
-                        m=pnt.M,
-                    )
-                    for pnt in part
-                ]
-                feature_geom.append(fPart)
-            return feature_geom
+        self._hasZ = hasZ
     #----------------------------------------------------------------------
     @property
     def spatialReference(self):
@@ -260,9 +316,41 @@ class MultiPoint(abstract.AbstractGeometry):
             return {"wkid": self._wkid}
     #----------------------------------------------------------------------
     @property
-    def type(self):
-        """ returns the geometry type """
-        return "esriGeometryMultipoint"
+    def hasZ(self):
+        """gets if the vertices carry Z values"""
+        return self._hasZ
+    #----------------------------------------------------------------------
+    @property
+    def hasM(self):
+        """gets if the vertices carry M values"""
+        return self._hasM
+    #----------------------------------------------------------------------
+    @property
+    def coordinates(self):
+        """
+        gets the vertices of all parts, a float64 array of shape
+        (vertices, dimensions) or a list of vertex lists without NumPy
+        """
+        return self._coords
+    #----------------------------------------------------------------------
+    @property
+    def part_offsets(self):
+        """gets the start of each part in coordinates"""
+        return self._offsets
+    #----------------------------------------------------------------------
+    @property
+    def parts(self):
+        """gets the vertices of each part, views of coordinates"""
+        return [self._coords[self._offsets[i]:self._offsets[i + 1]]
+                for i in range(len(self._offsets) - 1)]
+    #----------------------------------------------------------------------
+    def __len__(self):
+        """returns the number of vertices"""
+        return len(self._coords)
+    #----------------------------------------------------------------------
+    def __str__(self):
+        """ returns the object as a string """
+        return self.asJSON
     #----------------------------------------------------------------------
     @property
     def asJSON(self):
@@ -276,7 +364,7 @@ class MultiPoint(abstract.AbstractGeometry):
     #----------------------------------------------------------------------
     @property
     def asArcPyObject(self):
-        """ returns the Point as an ESRI arcpy.MultiPoint object """
+        """ returns the geometry as an ESRI arcpy.Geometry object """
         if arcpyFound == False:
             raise Exception("ArcPy is required to use this function")
         return arcpy.AsShape(self.asDictionary, True)
@@ -284,233 +372,122 @@ class MultiPoint(abstract.AbstractGeometry):
     @property
     def asDictionary(self):
         """ returns the object as a python dictionary """
-        #
         value = self._dict
         if value is None:
+            parts = _unpack(self._coords, self._offsets)
             template = {
                 "hasM" : self._hasM,
                 "hasZ" : self._hasZ,
-                "points" : [],
+                self._partsKey : parts,
                 "spatialReference" : self.spatialReference
             }
-            for pt in self._points:
-                template['points'].append(pt.asList)
             self._dict = template
         return self._dict
 ########################################################################
-class Polyline(abstract.AbstractGeometry):
-    """ Implements the ArcGIS REST API Polyline Object
+class MultiPoint(_PartGeometry):
+    """ Implements the ArcGIS JSON MultiPoint Geometry Object
         Inputs:
-           paths - list - list of lists of Point objects
+           points - list of Point objects or [x,y,<z>,<m>] lists, an
+              array of shape (points, dimensions) or an arcpy.Multipoint
            wkid - integer - well know spatial reference id
            hasZ - boolean -
            hasM - boolean -
     """
-    _paths = None
-    _wkid = None
-    _wkt = None
-    _json = None
-    _dict = None
-    _geom = None
-    _hasZ = None
-    _hasM = None
+    _partsKey = "points"
     #----------------------------------------------------------------------
-    def __init__(self, paths, wkid=None,wkt=None, hasZ=False, hasM=False):
+    def __init__(self, points, wkid=None, wkt=None, hasZ=False, hasM=False):
         """Constructor"""
-        if isinstance(paths, list):
-            self._paths = paths
-        elif arcpyFound and isinstance(paths, arcpy.Geometry):
-            self._paths = self.__geomToPointList(paths)
-        self._wkid = wkid
-        self._wkt = wkt
-        self._hasM = hasM
-        self._hasZ = hasZ
+        if arcpyFound and isinstance(points, arcpy.Geometry):
+            points = _arcpy_parts(points, "points")
+        self._load([points], wkid, wkt, hasZ, hasM)
     #----------------------------------------------------------------------
-    def __geomToPointList(self, geom):
-        """ converts a geometry object to a common.Geometry object """
-        if not arcpyFound or not isinstance(geom, arcpy.Polyline):
-            return
-        feature_geom = []
-        fPart = []
-        wkt = None
-        wkid = None
-        for part in geom:
-            fPart = []
-            for pnt in part:
-                if geom.spatialReference is None:
-                    if self._wkid is None and self._wkt is not None:
-                        wkt = self._wkt
-                    else:
-                        wkid = self._wkid
-                else:
-                    wkid = geom.spatialReference.factoryCode
-                fPart.append(Point(coord=[pnt.X, pnt.Y],
-                      wkid=wkid,
-                      wkt=wkt,
-                      z=pnt.Z, m=pnt.M))
-            feature_geom.append(fPart)
-        return feature_geom
-    #----------------------------------------------------------------------
-    @property
-    def spatialReference(self):
-        """returns the geometry spatial reference"""
-        if self._wkid is None and self._wkt is not None:
-            return {"wkt": self._wkt}
-        else:
-            return {"wkid": self._wkid}
+    @staticmethod
+    def fromDict(value):
+        """returns a MultiPoint from an Esri JSON dictionary"""
+        sr = value.get('spatialReference') or {}
+        return MultiPoint(points=value.get('points', []),
+                          wkid=sr.get('wkid', sr.get('latestWkid')),
+                          wkt=sr.get('wkt'),
+                          hasZ=value.get('hasZ', False),
+                          hasM=value.get('hasM', False))
     #----------------------------------------------------------------------
     @property
     def type(self):
         """ returns the geometry type """
-        return "esriGeometryPolyline"
-    #----------------------------------------------------------------------
-    @property
-    def asJSON(self):
-        """ returns a geometry as JSON """
-        value = self._json
-        if value is None:
-            value = json.dumps(self.asDictionary,
-                               default=_date_handler)
-            self._json = value
-        return self._json
-    #----------------------------------------------------------------------
-    @property
-    def asArcPyObject(self):
-        """ returns the Polyline as an ESRI arcpy.Polyline object """
-        if arcpyFound == False:
-            raise Exception("ArcPy is required to use this function")
-        return arcpy.AsShape(self.asDictionary, True)
+        return "esriGeometryMultipoint"
     #----------------------------------------------------------------------
     @property
     def asDictionary(self):
         """ returns the object as a python dictionary """
         value = self._dict
         if value is None:
-            template = {
-                "hasM" : self._hasM,
-                "hasZ" : self._hasZ,
-                "paths" : [],
-                "spatialReference" : self.spatialReference
-            }
-            for part in self._paths:
-                lpart = [pt.asList for pt in part]
-                template['paths'].append(lpart)
-                del lpart
-            self._dict = template
-        return self._dict
+            value = super(MultiPoint, self).asDictionary
+            value['points'] = value['points'][0]
+        return value
 ########################################################################
-class Polygon(abstract.AbstractGeometry):
-    """ Implements the ArcGIS REST JSON for Polygon Object """
-    _rings = None
-    _wkid = None
-    _wkt = None
-    _json = None
-    _dict = None
-    _geom = None
-    _hasZ = None
-    _hasM = None
+class Polyline(_PartGeometry):
+    """ Implements the ArcGIS REST API Polyline Object
+        Inputs:
+           paths - list - list of lists of Point objects or [x,y,<z>,<m>]
+              lists, list of arrays or an arcpy.Polyline
+           wkid - integer - well know spatial reference id
+           hasZ - boolean -
+           hasM - boolean -
+    """
+    _partsKey = "paths"
     #----------------------------------------------------------------------
-    def __init__(self, rings, wkid=None,wkt=None, hasZ=False, hasM=False):
+    def __init__(self, paths, wkid=None,wkt=None, hasZ=False, hasM=False):
         """Constructor"""
-        if isinstance(rings, list):
-            self._rings = rings
-        elif arcpyFound and isinstance(rings, arcpy.Geometry):
-            self._rings = self.__geomToPointList(rings)
-##            self._json = rings.JSON
-##            self._dict = _unicode_convert(json.loads(self._json))
-        self._wkid = wkid
-        self._wkt = wkt
-        self._hasM = hasM
-        self._hasZ = hasZ
-    #----------------------------------------------------------------------
-    def __geomToPointList(self, geom):
-        """ converts a geometry object to a common.Geometry object """
-        sr = geom.spatialReference
-        wkid = None
-        wkt = None
-        if sr is None:
-            if self._wkid is None and self._wkt is not None:
-                wkt = self._wkt
-            else:
-                wkid = self._wkid
-        else:
-            wkid = sr.factoryCode
-        g = json.loads(geom.JSON)
-        top = []
-        for gring in g['rings']:
-            ring = []
-            for g in gring:
-                ring.append(Point(coord=g, wkid=wkid, wkt=wkt, z=None, m=None))
-            top.append(ring)
-        return top
-        #if isinstance(geom, arcpy.Polygon):
-            #feature_geom = []
-            #fPart = []
-            #for part in geom:
-                #fPart = []
-                #for pnt in part:
-                    #if geom.spatialReference is None:
-                        #wkid = self._wkid
-                    #else:
-                        #wkid = geom.spatialReference.factoryCode
-                    #fPart.append(Point(coord=[pnt.X, pnt.Y],
-                          #wkid=wkid,
-                          #z=pnt.Z, m=pnt.M))
-                #feature_geom.append(fPart)
-            #return feature_geom
+        if arcpyFound and isinstance(paths, arcpy.Geometry):
+            paths = _arcpy_parts(paths, "paths")
+        self._load(paths, wkid, wkt, hasZ, hasM)
     #----------------------------------------------------------------------
-    @property
-    def spatialReference(self):
-        """returns the geometry spatial reference"""
-        if self._wkid is None and self._wkt is not None:
-            return {"wkt": self._wkt}
-        else:
-            return {"wkid": self._wkid}
+    @staticmethod
+    def fromDict(value):
+        """returns a Polyline from an Esri JSON dictionary"""
+        sr = value.get('spatialReference') or {}
+        return Polyline(paths=value.get('paths', []),
+                        wkid=sr.get('wkid', sr.get('latestWkid')),
+                        wkt=sr.get('wkt'),
+                        hasZ=value.get('hasZ', False),
+                        hasM=value.get('hasM', False))
     #----------------------------------------------------------------------
     @property
     def type(self):
         """ returns the geometry type """
-        return "esriGeometryPolygon"
+        return "esriGeometryPolyline"
+########################################################################
+class Polygon(_PartGeometry):
+    """ Implements the ArcGIS REST JSON for Polygon Object
+        Inputs:
+           rings - list - list of lists of Point objects or [x,y,<z>,<m>]
+              lists, list of arrays or an arcpy.Polygon
+           wkid - integer - well know spatial reference id
+           hasZ - boolean -
+           hasM - boolean -
+    """
+    _partsKey = "rings"
     #----------------------------------------------------------------------
-    @property
-    def asJSON(self):
-        """ returns a geometry as JSON """
-        value = self._json
-        if value is None:
-            value = json.dumps(self.asDictionary,
-                               default=_date_handler)
-            self._json = value
-        return self._json
+    def __init__(self, rings, wkid=None,wkt=None, hasZ=False, hasM=False):
+        """Constructor"""
+        if arcpyFound and isinstance(rings, arcpy.Geometry):
+            rings = _arcpy_parts(rings, "rings")
+        self._load(rings, wkid, wkt, hasZ, hasM)
     #----------------------------------------------------------------------
-    @property
-    def asArcPyObject(self):
-        """ returns the Polyline as an ESRI arcpy.Polyline object """
-        if arcpyFound == False:
-            raise Exception("ArcPy is required to use this function")
-        return arcpy.AsShape(self.asDictionary, True)
+    @staticmethod
+    def fromDict(value):
+        """returns a Polygon from an Esri JSON dictionary"""
+        sr = value.get('spatialReference') or {}
+        return Polygon(rings=value.get('rings', []),
+                       wkid=sr.get('wkid', sr.get('latestWkid')),
+                       wkt=sr.get('wkt'),
+                       hasZ=value.get('hasZ', False),
+                       hasM=value.get('hasM', False))
     #----------------------------------------------------------------------
     @property
-    def asDictionary(self):
-        """ returns the object as a python dictionary """
-        value = self._dict
-        if value is None:
-            template = {
-                "hasM" : self._hasM,
-                "hasZ" : self._hasZ,
-                "rings" : [],
-                "spatialReference" : self.spatialReference
-            }
-            for part in self._rings:
-                lpart = []
-                for pt in part:
-                    if isinstance(pt, list):
-                        lpart.append(pt)
-                    elif isinstance(pt, Point):
-                        lpart.append(pt.asList)
-                template['rings'].append(lpart)
-                del lpart
-            self._dict = template
-        return self._dict
+    def type(self):
+        """ returns the geometry type """
+        return "esriGeometryPolygon"
 ########################################################################
 class Envelope(abstract.AbstractGeometry):
     """
@@ -622,13 +599,499 @@ class Envelope(abstract.AbstractGeometry):
         """ returns the Envelope as an ESRI arcpy.Polygon object """
         env = self.asDictionary
         ring = [[
-            Point(env['xmin'], env['ymin'], self._wkid),
-            Point(env['xmax'], env['ymin'], self._wkid),
-            Point(env['xmax'], env['ymax'], self._wkid),
-            Point(env['xmin'], env['ymax'], self._wkid)
+            [env['xmin'], env['ymin']],
+            [env['xmax'], env['ymin']],
+            [env['xmax'], env['ymax']],
+            [env['xmin'], env['ymax']]
             ]]
         return Polygon(rings=ring,
                        wkid=self._wkid,
-                       wkt=self._wkid,
+                       wkt=self._wkt,
                        hasZ=False,
-                       hasM=False).asArcPyObject
\ No newline at end of file
+                       hasM=False).asArcPyObject
+#----------------------------------------------------------------------
+# Local geometry kernel.  The functions below measure whole batches of
+# geometries at once.  A batch is a list of ArcREST geometry objects or
+# Esri JSON dictionaries, or a common.columnar.GeometryColumn.  Planar
+# results are in the units of the coordinates, geodesic results expect
+# longitude/latitude in degrees on WGS84 and are in meters.
+#----------------------------------------------------------------------
+_POINT, _LINE, _AREA = 0, 1, 2
+_WGS84_A = 6378137.0
+_WGS84_F = 1 / 298.257223563
+_GEOGRAPHIC_WKIDS = frozenset([4326, 4269, 4258])
+_WKT_UNIT = re.compile(r'UNIT\[\s*"[^"]*"\s*,\s*([0-9.E+-]+)')
+_METRIC_WKIDS = frozenset([3857, 102100, 102113, 900913])
+_LINEAR_UNITS = {
+    9001 : 1.0, "esriSRUnit_Meter" : 1.0, "esriMeters" : 1.0,
+    9036 : 1000.0, "esriSRUnit_Kilometer" : 1000.0, "esriKilometers" : 1000.0,
+    9002 : 0.3048, "esriSRUnit_Foot" : 0.3048, "esriFeet" : 0.3048,
+    9003 : 1200.0 / 3937.0, "esriSRUnit_SurveyFoot" : 1200.0 / 3937.0,
+    9096 : 0.9144, "esriYards" : 0.9144,
+    9093 : 1609.344, "esriSRUnit_StatuteMile" : 1609.344, "esriMiles" : 1609.344,
+    9035 : 1609.347218694, "esriSRUnit_SurveyMile" : 1609.347218694,
+    9030 : 1852.0, "esriSRUnit_NauticalMile" : 1852.0, "esriNauticalMiles" : 1852.0,
+    1033 : 0.01, "esriCentimeters" : 0.01,
+    1025 : 0.001, "esriMillimeters" : 0.001,
+    109008 : 0.0254, "esriInches" : 0.0254,
+}
+_AREA_UNITS = {
+    "esriSquareMeters" : 1.0, "esriSquareKilometers" : 1e6,
+    "esriSquareFeet" : 0.09290304, "esriSquareYards" : 0.83612736,
+    "esriSquareInches" : 0.00064516, "esriSquareMiles" : 2589988.110336,
+    "esriAcres" : 4046.8564224, "esriHectares" : 1e4, "esriAres" : 100.0,
+    "esriSquareMillimeters" : 1e-6, "esriSquareCentimeters" : 1e-4,
+    "esriSquareDecimeters" : 1e-2,
+}
+#----------------------------------------------------------------------
+def _require_numpy():
+    """raises an error when NumPy is not installed"""
+    if numpyFound == False:
+        raise Exception("NumPy is required to use this function")
+#----------------------------------------------------------------------
+def sr_wkid(sr):
+    """
+    returns the well known id of a spatial reference given as an integer,
+    a string, a SpatialReference or an Esri JSON dictionary, or None
+    """
+    if isinstance(sr, str) and sr.strip().startswith('{'):
+        try:
+            sr = json.loads(sr)
+        except ValueError:
+            return None
+    if isinstance(sr, SpatialReference):
+        sr = sr.wkid
+    elif isinstance(sr, dict):
+        sr = sr.get('latestWkid', sr.get('wkid'))
+    try:
+        return int(sr)
+    except (TypeError, ValueError):
+        return None
+#----------------------------------------------------------------------
+def is_geographic(sr):
+    """returns True for the supported longitude/latitude references"""
+    return sr_wkid(sr) in _GEOGRAPHIC_WKIDS
+#----------------------------------------------------------------------
+def _sr_dict(sr):
+    """returns a spatial reference as an Esri JSON dictionary, or None"""
+    if isinstance(sr, str) and sr.strip().startswith('{'):
+        try:
+            sr = json.loads(sr)
+        except ValueError:
+            return None
+    if isinstance(sr, SpatialReference):
+        return sr.asDictionary
+    return sr if isinstance(sr, dict) else None
+#----------------------------------------------------------------------
+def meters_per_unit(sr):
+    """
+    returns the approximate length in meters of one coordinate unit of a
+    spatial reference, one degree at the equator for geographic ones.
+    Well known ids outside the geographic ranges and references without
+    a WKT unit are taken to be in meters.
+    """
+    value = _sr_dict(sr) or {}
+    wkt = value.get('wkt')
+    if isinstance(wkt, str) and wkt.strip():
+        wkt = wkt.strip().upper()
+        if wkt.startswith('GEOGCS') or wkt.startswith('GEOGCRS'):
+            return _WGS84_A * math.pi / 180.0
+        # the last UNIT of a PROJCS is its linear unit
+        units = _WKT_UNIT.findall(wkt)
+        if units:
+            return float(units[-1])
+        return 1.0
+    wkid = sr_wkid(sr)
+    if wkid is None:
+        return 1.0
+    if wkid in _GEOGRAPHIC_WKIDS or 4000 <= wkid < 5000 or \
+       37001 <= wkid < 37300 or 104000 <= wkid < 105000:
+        return _WGS84_A * math.pi / 180.0
+    return 1.0
+#----------------------------------------------------------------------
+def is_metric(sr):
+    """
+    returns True for projected references in meters (Web Mercator and
+    the WGS84 and NAD83 UTM zones)
+    """
+    wkid = sr_wkid(sr)
+    if wkid is None:
+        return False
+    return wkid in _METRIC_WKIDS or \
+           32601 <= wkid <= 32660 or 32701 <= wkid <= 32760 or \
+           26901 <= wkid <= 26923
+#----------------------------------------------------------------------
+def _geometry_arrays(geometry):
+    """
+    returns (kind, coords, offsets) of one geometry, coords holds all
+    dimensions of the vertices
+    """
+    if isinstance(geometry, _PartGeometry):
+        kind = _AREA if isinstance(geometry, Polygon) else \
+            _LINE if isinstance(geometry, Polyline) else _POINT
+        return kind, np.asarray(geometry.coordinates, dtype=np.float64), \
+               np.asarray(geometry.part_offsets, dtype=np.int64)
+    if isinstance(geometry, (Point, Envelope)):
+        geometry = geometry.asDictionary
+    if not geometry:
+        return _POINT, np.zeros((0, 2)), np.zeros(1, dtype=np.int64)
+    if 'curveRings' in geometry or 'curvePaths' in geometry:
+        raise ValueError("curves are not supported by the local geometry functions")
+    if 'rings' in geometry:
+        kind, parts = _AREA, geometry['rings']
+    elif 'paths' in geometry:
+        kind, parts = _LINE, geometry['paths']
+    elif 'points' in geometry:
+        kind, parts = _POINT, [geometry['points']]
+    elif 'xmin' in geometry:
+        xmin, ymin = geometry['xmin'], geometry['ymin']
+        xmax, ymax = geometry['xmax'], geometry['ymax']
+        kind, parts = _AREA, [[[xmin, ymin], [xmin, ymax], [xmax, ymax],
+                               [xmax, ymin], [xmin, ymin]]]
+    elif 'x' in geometry:
+        kind, parts = _POINT, [[[geometry['x'], geometry['y']]]]
+    else:
+        raise ValueError("unsupported geometry: %s" % list(geometry.keys()))
+    coords, offsets = _pack(parts)
+    return kind, coords, offsets
+#----------------------------------------------------------------------
+def _batch(geometries):
+    """
+    flattens a batch of geometries
+    Output:
+       (kinds, xy, part_offsets, geometry_offsets) - the kind of each
+       geometry, the x/y columns of all vertices, the start of each part
+       in xy and the start of each geometry in the parts
+    """
+    _require_numpy()
+    if hasattr(geometries, 'geometry_offsets') and \
+       getattr(geometries, 'coords', None) is not None:
+        # a GeometryColumn already has this layout
+        count = len(geometries)
+        xy = geometries.coords[:, :2]
+        gtype = geometries.geometryType
+        kind = _AREA if gtype == "esriGeometryPolygon" else \
+            _LINE if gtype == "esriGeometryPolyline" else _POINT
+        kinds = np.full(count, kind, dtype=np.int8)
+        if geometries.geometry_offsets is None:
+            nulls = np.asarray(geometries.nulls, dtype=bool)
+            counts = (~nulls).astype(np.int64)
+            geometry_offsets = np.zeros(count + 1, dtype=np.int64)
+            np.cumsum(counts, out=geometry_offsets[1:])
+            return kinds, xy[~nulls], np.arange(count + 1 - nulls.sum(), dtype=np.int64), \
+                   geometry_offsets
+        return kinds, xy, geometries.part_offsets, geometries.geometry_offsets
+    if hasattr(geometries, 'geometry_offsets'):
+        geometries = [geometries.geometry(i) for i in range(len(geometries))]
+    kinds = np.zeros(len(geometries), dtype=np.int8)
+    arrays = []
+    part_counts = np.zeros(len(geometries), dtype=np.int64)
+    vertex_counts = []
+    for i, geometry in enumerate(geometries):
+        kind, coords, offsets = _geometry_arrays(geometry)
+        kinds[i] = kind
+        arrays.append(coords[:, :2])
+        part_counts[i] = len(offsets) - 1
+        vertex_counts.append(np.diff(offsets))
+    xy = np.concatenate(arrays) if arrays else np.zeros((0, 2))
+    vertex_counts = np.concatenate(vertex_counts) if vertex_counts else \
+        np.zeros(0, dtype=np.int64)
+    part_offsets = np.zeros(len(vertex_counts) + 1, dtype=np.int64)
+    np.cumsum(vertex_counts, out=part_offsets[1:])
+    geometry_offsets = np.zeros(len(geometries) + 1, dtype=np.int64)
+    np.cumsum(part_counts, out=geometry_offsets[1:])
+    return kinds, xy, part_offsets, geometry_offsets
+#----------------------------------------------------------------------
+def _segments(kinds, xy, part_offsets, geometry_offsets):
+    """
+    returns (start, end, geometry) index arrays of all segments.  Rings
+    get a closing segment back to their first vertex, points have none.
+    """
+    parts = len(part_offsets) - 1
+    part_geometry = np.repeat(np.arange(len(kinds)), np.diff(geometry_offsets))
+    vertex_counts = np.diff(part_offsets)
+    vertex_part = np.repeat(np.arange(parts), vertex_counts)
+    end = np.arange(1, len(xy) + 1)
+    valid = np.ones(len(xy), dtype=bool)
+    nonempty = vertex_counts > 0
+    last = part_offsets[1:][nonempty] - 1
+    part_kind = kinds[part_geometry]
+    end[last] = part_offsets[:-1][nonempty]
+    valid[last] = part_kind[nonempty] == _AREA
+    valid &= part_kind[vertex_part] != _POINT
+    start = np.nonzero(valid)[0]
+    return start, end[start], part_geometry[vertex_part[start]]
+#----------------------------------------------------------------------
+def _authalic_sine(lat):
+    """returns the sine of the authalic latitude of WGS84 latitudes"""
+    e2 = _WGS84_F * (2 - _WGS84_F)
+    e = np.sqrt(e2)
+    def q(sinphi):
+        return (1 - e2) * (sinphi / (1 - e2 * sinphi ** 2) -
+                           np.log((1 - e * sinphi) / (1 + e * sinphi)) / (2 * e))
+    return q(np.sin(np.radians(lat))) / q(1.0)
+#----------------------------------------------------------------------
+def _geodesic_distance(lon1, lat1, lon2, lat2, iterations=50):
+    """
+    returns the WGS84 ellipsoidal distances in meters between arrays of
+    points (Vincenty's inverse formula, nearly antipodal points that do
+    not converge use the last iteration)
+    """
+    a = _WGS84_A
+    f = _WGS84_F
+    b = a * (1 - f)
+    L = np.radians(lon2 - lon1)
+    U1 = np.arctan((1 - f) * np.tan(np.radians(lat1)))
+    U2 = np.arctan((1 - f) * np.tan(np.radians(lat2)))
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+    lam = L.copy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for _ in range(iterations):
+            sinLam, cosLam = np.sin(lam), np.cos(lam)
+            sinSigma = np.hypot(cosU2 * sinLam,
+                                cosU1 * sinU2 - sinU1 * cosU2 * cosLam)
+            cosSigma = sinU1 * sinU2 + cosU1 * cosU2 * cosLam
+            sigma = np.arctan2(sinSigma, cosSigma)
+            sinAlpha = np.where(sinSigma == 0, 0.0,
+                                cosU1 * cosU2 * sinLam / sinSigma)
+            cos2Alpha = 1 - sinAlpha ** 2
+            cos2SigmaM = np.where(cos2Alpha == 0, 0.0,
+                                  cosSigma - 2 * sinU1 * sinU2 / cos2Alpha)
+            C = f / 16 * cos2Alpha * (4 + f * (4 - 3 * cos2Alpha))
+            previous = lam
+            lam = L + (1 - C) * f * sinAlpha * \
+                (sigma + C * sinSigma * (cos2SigmaM + C * cosSigma *
+                                         (-1 + 2 * cos2SigmaM ** 2)))
+            if np.all(np.abs(lam - previous) < 1e-12):
+                break
+        u2 = cos2Alpha * (a ** 2 - b ** 2) / b ** 2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        deltaSigma = B * sinSigma * (cos2SigmaM + B / 4 *
+                                     (cosSigma * (-1 + 2 * cos2SigmaM ** 2) -
+                                      B / 6 * cos2SigmaM * (-3 + 4 * sinSigma ** 2) *
+                                      (-3 + 4 * cos2SigmaM ** 2)))
+        return np.where(sinSigma == 0, 0.0, b * A * (sigma - deltaSigma))
+#----------------------------------------------------------------------
+def areas(geometries, geodesic=False):
+    """
+    returns the areas of a batch of geometries as a float64 array.
+    Clockwise rings count positive and counter clockwise rings (holes)
+    negative as in the ArcGIS REST API; lines and points have no area.
+    Inputs:
+       geometries - list of geometry objects or Esri JSON dictionaries,
+          or a GeometryColumn
+       geodesic - False for planar areas in square coordinate units, True
+          for areas in square meters of longitude/latitude geometries on
+          the WGS84 ellipsoid.  The geodesic area treats each segment as a
+          straight line on an equal area projection, which is accurate for
+          the densely digitized boundaries found in feature services.
+    """
+    kinds, xy, po, go = _batch(geometries)
+    start, end, gid = _segments(kinds, xy, po, go)
+    keep = kinds[gid] == _AREA
+    start, end, gid = start[keep], end[keep], gid[keep]
+    if geodesic:
+        e2 = _WGS84_F * (2 - _WGS84_F)
+        e = np.sqrt(e2)
+        qp = 1 - (1 - e2) / (2 * e) * np.log((1 - e) / (1 + e))
+        radius2 = _WGS84_A ** 2 * qp / 2.0
+        sinb = _authalic_sine(xy[:, 1])
+        dlon = np.radians(xy[end, 0] - xy[start, 0])
+        dlon = (dlon + np.pi) % (2 * np.pi) - np.pi
+        terms = dlon * (sinb[start] + sinb[end]) * radius2 / 2.0
+    else:
+        x, y = xy[:, 0], xy[:, 1]
+        terms = -(x[start] * y[end] - x[end] * y[start]) / 2.0
+    return np.bincount(gid, weights=terms, minlength=len(kinds))
+#----------------------------------------------------------------------
+def lengths(geometries, geodesic=False):
+    """
+    returns the lengths of a batch of geometries as a float64 array, the
+    perimeter for polygons and 0 for points.
+    Inputs:
+       geometries - list of geometry objects or Esri JSON dictionaries,
+          or a GeometryColumn
+       geodesic - False for planar lengths in coordinate units, True for
+          WGS84 ellipsoidal lengths in meters of longitude/latitude
+          geometries
+    """
+    kinds, xy, po, go = _batch(geometries)
+    start, end, gid = _segments(kinds, xy, po, go)
+    if geodesic:
+        terms = _geodesic_distance(xy[start, 0], xy[start, 1],
+                                   xy[end, 0], xy[end, 1])
+    else:
+        terms = np.hypot(xy[end, 0] - xy[start, 0], xy[end, 1] - xy[start, 1])
+    return np.bincount(gid, weights=terms, minlength=len(kinds))
+#----------------------------------------------------------------------
+def envelopes(geometries):
+    """
+    returns the extents of a batch of geometries as a float64 array of
+    shape (geometries, 4) with the columns xmin, ymin, xmax, ymax, rows of
+    empty geometries are NaN
+    """
+    kinds, xy, po, go = _batch(geometries)
+    result = np.full((len(kinds), 4), np.nan)
+    vstart = po[go[:-1]]
+    vend = po[go[1:]]
+    nonempty = vend > vstart
+    if nonempty.any():
+        idx = vstart[nonempty]
+        for col, func, axis in ((0, np.fmin, 0), (1, np.fmin, 1),
+                                (2, np.fmax, 0), (3, np.fmax, 1)):
+            result[nonempty, col] = func.reduceat(xy[:, axis], idx)
+    return result
+#----------------------------------------------------------------------
+def centroids(geometries):
+    """
+    returns the centroids of a batch of geometries as a float64 array of
+    shape (geometries, 2): the area weighted centroid of polygons, the
+    length weighted centroid of lines and the mean of points.  The
+    centroid of a polygon can fall outside of it, see label_points().
+    """
+    kinds, xy, po, go = _batch(geometries)
+    count = len(kinds)
+    vgeometry = np.repeat(np.repeat(np.arange(count), np.diff(go)), np.diff(po))
+    vcount = np.bincount(vgeometry, minlength=count).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        result = np.column_stack([
+            np.bincount(vgeometry, weights=xy[:, 0], minlength=count) / vcount,
+            np.bincount(vgeometry, weights=xy[:, 1], minlength=count) / vcount])
+        start, end, gid = _segments(kinds, xy, po, go)
+        x0, y0 = xy[start, 0], xy[start, 1]
+        x1, y1 = xy[end, 0], xy[end, 1]
+        area = kinds[gid] == _AREA
+        # coordinates relative to the vertex mean keep the products small
+        ox, oy = result[gid, 0], result[gid, 1]
+        cross = np.where(area, (x0 - ox) * (y1 - oy) - (x1 - ox) * (y0 - oy), 0.0)
+        weight = np.where(area, 0.0, np.hypot(x1 - x0, y1 - y0))
+        cw = np.bincount(gid, weights=cross, minlength=count)
+        lw = np.bincount(gid, weights=weight, minlength=count)
+        cx = np.bincount(gid, weights=(x0 + x1 - 2 * ox) * cross, minlength=count)
+        cy = np.bincount(gid, weights=(y0 + y1 - 2 * oy) * cross, minlength=count)
+        mx = np.bincount(gid, weights=(x0 + x1) / 2.0 * weight, minlength=count)
+        my = np.bincount(gid, weights=(y0 + y1) / 2.0 * weight, minlength=count)
+        polygons = (kinds == _AREA) & (cw != 0)
+        result[polygons, 0] += cx[polygons] / (3.0 * cw[polygons])
+        result[polygons, 1] += cy[polygons] / (3.0 * cw[polygons])
+        lines = (kinds == _LINE) & (lw > 0)
+        result[lines, 0] = mx[lines] / lw[lines]
+        result[lines, 1] = my[lines] / lw[lines]
+    return result
+#----------------------------------------------------------------------
+def label_points(polygons):
+    """
+    returns a point inside each polygon of a batch as a float64 array of
+    shape (polygons, 2).  The centroid is used when it lies inside the
+    polygon, otherwise the middle of the widest interior span of the
+    horizontal line through the centroid.
+    """
+    kinds, xy, po, go = _batch(polygons)
+    result = centroids(polygons)
+    start, end, gid = _segments(kinds, xy, po, go)
+    bounds = np.searchsorted(gid, np.arange(len(kinds) + 1))
+    for i in np.nonzero(kinds == _AREA)[0]:
+        s, e = start[bounds[i]:bounds[i + 1]], end[bounds[i]:bounds[i + 1]]
+        if len(s) == 0:
+            continue
+        cx, cy = result[i]
+        y0, y1 = xy[s, 1], xy[e, 1]
+        if not np.isfinite(cy):
+            continue
+        if cy == y0.min() or cy == y0.max():
+            cy = (y0.min() + y0.max()) / 2.0
+        crossing = (y0 > cy) != (y1 > cy)
+        if not crossing.any():
+            continue
+        x0, x1 = xy[s[crossing], 0], xy[e[crossing], 0]
+        ya, yb = y0[crossing], y1[crossing]
+        xs = np.sort(x0 + (cy - ya) * (x1 - x0) / (yb - ya))
+        spans = xs[:len(xs) // 2 * 2].reshape(-1, 2)
+        inside = (spans[:, 0] <= cx) & (cx <= spans[:, 1])
+        if inside.any() and cy == result[i, 1]:
+            continue
+        widest = np.argmax(spans[:, 1] - spans[:, 0])
+        result[i] = [(spans[widest, 0] + spans[widest, 1]) / 2.0, cy]
+    return result
+#----------------------------------------------------------------------
+def _douglas_peucker(xy, tolerance):
+    """returns the mask of the vertices kept by Douglas-Peucker"""
+    keep = np.zeros(len(xy), dtype=bool)
+    if len(xy) == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, len(xy) - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        pts = xy[a + 1:b]
+        ax, ay = xy[a]
+        dx, dy = xy[b, 0] - ax, xy[b, 1] - ay
+        norm = dx * dx + dy * dy
+        if norm == 0:
+            dist = np.hypot(pts[:, 0] - ax, pts[:, 1] - ay)
+        else:
+            t = np.clip(((pts[:, 0] - ax) * dx + (pts[:, 1] - ay) * dy) / norm, 0, 1)
+            dist = np.hypot(pts[:, 0] - ax - t * dx, pts[:, 1] - ay - t * dy)
+        k = int(np.argmax(dist))
+        if dist[k] > tolerance:
+            k += a + 1
+            keep[k] = True
+            stack.append((a, k))
+            stack.append((k, b))
+    return keep
+#----------------------------------------------------------------------
+def generalize(geometries, max_deviation):
+    """
+    simplifies a batch of geometries with the Douglas-Peucker algorithm,
+    the output keeps a subset of the input vertices with their Z and M
+    values.  Rings reduced to less than four vertices and paths reduced
+    to a single vertex are dropped, points are returned unchanged.
+    Inputs:
+       geometries - list of geometry objects or Esri JSON dictionaries
+       max_deviation - maximum distance in coordinate units between the
+          input and the output geometry
+    Output:
+       list of geometries of the input's kind, geometry objects for
+       geometry objects and dictionaries for dictionaries
+    """
+    _require_numpy()
+    results = []
+    for geometry in geometries:
+        if isinstance(geometry, Point) or \
+           (isinstance(geometry, dict) and ('x' in geometry or 'xmin' in geometry)):
+            results.append(geometry)
+            continue
+        kind, coords, offsets = _geometry_arrays(geometry)
+        parts = []
+        for i in range(len(offsets) - 1):
+            part = coords[offsets[i]:offsets[i + 1]]
+            if kind != _POINT:
+                part = part[_douglas_peucker(part[:, :2], max_deviation)]
+                if (kind == _AREA and len(part) < 4) or len(part) < 2:
+                    continue
+            parts.append(part)
+        if isinstance(geometry, _PartGeometry):
+            hasZ, hasM = geometry.hasZ, geometry.hasM
+            wkid, wkt = geometry._wkid, geometry._wkt
+        else:
+            hasZ, hasM = geometry.get('hasZ', False), geometry.get('hasM', False)
+            wkid, wkt = None, None
+        if kind == _AREA:
+            result = Polygon(rings=parts, wkid=wkid, wkt=wkt, hasZ=hasZ, hasM=hasM)
+        elif kind == _LINE:
+            result = Polyline(paths=parts, wkid=wkid, wkt=wkt, hasZ=hasZ, hasM=hasM)
+        else:
+            result = MultiPoint(points=parts[0] if parts else [], wkid=wkid,
+                                wkt=wkt, hasZ=hasZ, hasM=hasM)
+        if isinstance(geometry, dict):
+            result = dict(result.asDictionary)
+            if 'spatialReference' in geometry:
+                result['spatialReference'] = geometry['spatialReference']
+            else:
+                del result['spatialReference']
+        results.append(result)
+    return results
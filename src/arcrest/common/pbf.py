@@ -0,0 +1,434 @@
+"""
+   Decoder of the protocol buffer (f=pbf) query responses of feature
+   services, the esriPBuffer.FeatureCollectionPBuffer message.  It needs
+   no generated code, the few messages of the schema are read directly
+   from the wire format.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+import struct
+try:
+    import numpy as np
+    numpyFound = True
+except ImportError:
+    numpyFound = False
+
+__all__ = ["decode", "CONTENT_TYPE", "numpyFound"]
+
+CONTENT_TYPE = "application/x-protobuf"
+
+_FLOAT = struct.Struct("<f")
+_DOUBLE = struct.Struct("<d")
+_GEOMETRY_TYPES = ["esriGeometryPoint", "esriGeometryMultipoint",
+                   "esriGeometryPolyline", "esriGeometryPolygon",
+                   "esriGeometryMultipatch"]
+_FIELD_TYPES = ["esriFieldTypeSmallInteger", "esriFieldTypeInteger",
+                "esriFieldTypeSingle", "esriFieldTypeDouble",
+                "esriFieldTypeString", "esriFieldTypeDate",
+                "esriFieldTypeOID", "esriFieldTypeGeometry",
+                "esriFieldTypeBlob", "esriFieldTypeRaster",
+                "esriFieldTypeGUID", "esriFieldTypeGlobalID",
+                "esriFieldTypeXML"]
+_SQL_TYPES = ["sqlTypeBigInt", "sqlTypeBinary", "sqlTypeBit", "sqlTypeChar",
+              "sqlTypeDate", "sqlTypeDecimal", "sqlTypeDouble",
+              "sqlTypeFloat", "sqlTypeGeometry", "sqlTypeGUID",
+              "sqlTypeInteger", "sqlTypeLongNVarchar",
+              "sqlTypeLongVarbinary", "sqlTypeLongVarchar", "sqlTypeNChar",
+              "sqlTypeNVarchar", "sqlTypeOther", "sqlTypeReal",
+              "sqlTypeSmallInt", "sqlTypeSqlXml", "sqlTypeTime",
+              "sqlTypeTimestamp", "sqlTypeTimestamp2", "sqlTypeTinyInt",
+              "sqlTypeVarbinary", "sqlTypeVarchar"]
+#----------------------------------------------------------------------
+def _varint(buf, pos):
+    """returns (value, next position) of the varint at pos"""
+    b = buf[pos]
+    if b < 0x80:
+        return b, pos + 1
+    result = b & 0x7f
+    shift = 7
+    pos += 1
+    while True:
+        b = buf[pos]
+        pos += 1
+        result |= (b & 0x7f) << shift
+        if b < 0x80:
+            return result, pos
+        shift += 7
+#----------------------------------------------------------------------
+def _zigzag(value):
+    """returns the signed value of a zigzag encoded integer"""
+    return (value >> 1) ^ -(value & 1)
+#----------------------------------------------------------------------
+def _fields(buf, pos, end):
+    """
+    yields (field number, wire type, value) of the fields of a message,
+    value is an int for varints, (start, end) for length delimited fields
+    and the position of fixed size fields
+    """
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        wire = key & 7
+        if wire == 0:
+            value, pos = _varint(buf, pos)
+        elif wire == 2:
+            size, pos = _varint(buf, pos)
+            value = (pos, pos + size)
+            pos += size
+        elif wire == 1:
+            value = pos
+            pos += 8
+        elif wire == 5:
+            value = pos
+            pos += 4
+        else:
+            raise ValueError("unsupported protocol buffer wire type %s" % wire)
+        yield key >> 3, wire, value
+#----------------------------------------------------------------------
+def _skip(buf, pos):
+    """returns the position after the field starting at pos"""
+    key, pos = _varint(buf, pos)
+    wire = key & 7
+    if wire == 0:
+        return _varint(buf, pos)[1]
+    elif wire == 2:
+        size, pos = _varint(buf, pos)
+        return pos + size
+    elif wire == 1:
+        return pos + 8
+    elif wire == 5:
+        return pos + 4
+    raise ValueError("unsupported protocol buffer wire type %s" % wire)
+#----------------------------------------------------------------------
+def _packed(buf, start, end):
+    """returns the unsigned varints of a packed field as a list"""
+    values = []
+    pos = start
+    while pos < end:
+        value, pos = _varint(buf, pos)
+        values.append(value)
+    return values
+#----------------------------------------------------------------------
+def _string(buf, span):
+    """returns the text of a length delimited field"""
+    return buf[span[0]:span[1]].decode("utf-8")
+#----------------------------------------------------------------------
+def _value(buf, pos, end):
+    """returns the python value of a Value message"""
+    if pos >= end:
+        return None
+    key, pos = _varint(buf, pos)
+    field = key >> 3
+    if field == 1:
+        size, pos = _varint(buf, pos)
+        return buf[pos:pos + size].decode("utf-8")
+    elif field == 3:
+        return _DOUBLE.unpack_from(buf, pos)[0]
+    elif field == 2:
+        # single precision, rounded as the JSON response prints it
+        return float("%.7g" % _FLOAT.unpack_from(buf, pos)[0])
+    value = _varint(buf, pos)[0]
+    if field in (4, 8):
+        return _zigzag(value)
+    elif field == 6:
+        return value - (1 << 64) if value >= (1 << 63) else value
+    elif field == 9:
+        return bool(value)
+    return value
+#----------------------------------------------------------------------
+def _message(buf, span, names):
+    """
+    returns the scalar fields of a small message as a dictionary, names
+    maps field numbers to (key, kind), kind is one of: string, uint,
+    bool, double
+    """
+    value = {}
+    for field, wire, v in _fields(buf, span[0], span[1]):
+        if field not in names:
+            continue
+        key, kind = names[field]
+        if kind == "string":
+            value[key] = _string(buf, v)
+        elif kind == "double":
+            value[key] = _DOUBLE.unpack_from(buf, v)[0]
+        elif kind == "bool":
+            value[key] = bool(v)
+        else:
+            value[key] = v
+    return value
+#----------------------------------------------------------------------
+def _spatial_reference(buf, span):
+    """returns the spatial reference dictionary of a SpatialReference"""
+    return _message(buf, span, {1 : ("wkid", "uint"),
+                                2 : ("latestWkid", "uint"),
+                                3 : ("vcsWkid", "uint"),
+                                4 : ("latestVcsWkid", "uint"),
+                                5 : ("wkt", "string")})
+#----------------------------------------------------------------------
+def _field(buf, span):
+    """returns the field dictionary of a Field message"""
+    value = _message(buf, span, {1 : ("name", "string"),
+                                 2 : ("type", "uint"),
+                                 3 : ("alias", "string"),
+                                 4 : ("sqlType", "uint"),
+                                 5 : ("domain", "string"),
+                                 6 : ("defaultValue", "string")})
+    value.setdefault("type", 0)
+    value["type"] = _FIELD_TYPES[value["type"]] \
+        if value["type"] < len(_FIELD_TYPES) else None
+    if "sqlType" in value:
+        value["sqlType"] = _SQL_TYPES[value["sqlType"]] \
+            if value["sqlType"] < len(_SQL_TYPES) else None
+    return value
+#----------------------------------------------------------------------
+def _transform(buf, span):
+    """returns the transform dictionary of a Transform message"""
+    value = {"originPosition" : "upperLeft",
+             "scale" : [1.0, 1.0, 1.0, 1.0],
+             "translate" : [0.0, 0.0, 0.0, 0.0]}
+    # scale and translate are stored x, y, m, z
+    order = {1 : 0, 2 : 1, 3 : 3, 4 : 2}
+    for field, wire, v in _fields(buf, span[0], span[1]):
+        if field == 1:
+            value["originPosition"] = "upperLeft" if v == 0 else "bottomLeft"
+        elif field in (2, 3):
+            target = value["scale" if field == 2 else "translate"]
+            for f, w, pos in _fields(buf, v[0], v[1]):
+                if f in order:
+                    target[order[f]] = _DOUBLE.unpack_from(buf, pos)[0]
+    return value
+#----------------------------------------------------------------------
+def _geometry(buf, span):
+    """returns (part lengths, coordinate byte span) of a Geometry message"""
+    lengths = []
+    coords = (span[0], span[0])
+    for field, wire, v in _fields(buf, span[0], span[1]):
+        if field == 2:
+            if wire == 2:
+                lengths.extend(_packed(buf, v[0], v[1]))
+            else:
+                lengths.append(v)
+        elif field == 3:
+            coords = v
+    return lengths, coords
+#----------------------------------------------------------------------
+def _decode_coordinates(buf, spans, transform, hasZ=False, hasM=False):
+    """
+    returns (rows, offsets): the real world vertices of all geometries as
+    one list of vertex lists and the first vertex of each geometry plus
+    the end of the last one.  Every dimension is delta encoded from the
+    previous vertex of the geometry, the first vertex from zero.
+    """
+    sx, sy, sz, sm = transform["scale"]
+    tx, ty, tz, tm = transform["translate"]
+    if transform["originPosition"] == "upperLeft":
+        sy = -sy
+    scale = [sx, sy] + ([sz] if hasZ else []) + ([sm] if hasM else [])
+    translate = [tx, ty] + ([tz] if hasZ else []) + ([tm] if hasM else [])
+    dims = len(scale)
+    if not numpyFound:
+        rows = []
+        offsets = [0]
+        for start, end in spans:
+            values = [_zigzag(v) for v in _packed(buf, start, end)]
+            total = [0] * dims
+            for i in range(0, len(values) - dims + 1, dims):
+                vertex = []
+                for d in range(dims):
+                    total[d] += values[i + d]
+                    vertex.append(translate[d] + total[d] * scale[d])
+                rows.append(vertex)
+            offsets.append(len(rows))
+        return rows, offsets
+    data = np.frombuffer(b"".join([buf[s:e] for s, e in spans]),
+                         dtype=np.uint8)
+    bounds = np.cumsum([0] + [e - s for s, e in spans])
+    ends = np.flatnonzero(data < 0x80)
+    # number of varints of each geometry
+    counts = np.diff(np.searchsorted(ends, bounds))
+    if len(ends):
+        # all varints are decoded at once: the 7 bit groups of each are
+        # shifted into place and summed
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        shifts = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+        pieces = (data & 0x7f).astype(np.uint64) << \
+            (shifts * 7).astype(np.uint64)
+        raw = np.add.reduceat(pieces, starts)
+        values = (raw >> np.uint64(1)).astype(np.int64) ^ \
+            -(raw & np.uint64(1)).astype(np.int64)
+    else:
+        values = np.zeros(0, dtype=np.int64)
+    vertices = counts // dims
+    xy = values[:int(vertices.sum()) * dims].reshape(-1, dims)
+    # a running sum per geometry undoes the delta encoding
+    totals = np.cumsum(xy, axis=0)
+    offsets = np.concatenate(([0], np.cumsum(vertices)))
+    first = offsets[:-1]
+    before = np.zeros((len(spans), dims), dtype=np.int64)
+    mask = (vertices > 0) & (first > 0)
+    before[mask] = totals[first[mask] - 1]
+    totals -= np.repeat(before, vertices, axis=0)
+    coords = np.asarray(translate) + totals * np.asarray(scale)
+    return coords.tolist(), offsets.tolist()
+#----------------------------------------------------------------------
+def _esri_geometry(geometryType, lengths, rows, start, end, hasZ, hasM):
+    """
+    returns the Esri JSON dictionary of the geometry stored in
+    rows[start:end]
+    """
+    if geometryType == "esriGeometryPoint":
+        if start == end:
+            return None
+        v = rows[start]
+        value = {"x" : v[0], "y" : v[1]}
+        if hasZ:
+            value["z"] = v[2]
+        if hasM:
+            value["m"] = v[3 if hasZ else 2]
+        return value
+    if geometryType == "esriGeometryMultipoint":
+        return {"points" : rows[start:end]}
+    if len(lengths) < 2:
+        parts = [rows[start:end]]
+    else:
+        parts = []
+        for length in lengths:
+            parts.append(rows[start:start + length])
+            start += length
+    if geometryType == "esriGeometryPolyline":
+        return {"paths" : parts}
+    return {"rings" : parts}
+#----------------------------------------------------------------------
+def _feature_result(buf, span):
+    """returns the featureset dictionary of a FeatureResult message"""
+    value = {}
+    fields = []
+    features = []
+    transform = None
+    geometryType = None
+    for field, wire, v in _fields(buf, span[0], span[1]):
+        if field == 1:
+            value["objectIdFieldName"] = _string(buf, v)
+        elif field == 2:
+            value["uniqueIdField"] = _message(
+                buf, v, {1 : ("name", "string"),
+                         2 : ("isSystemMaintained", "bool")})
+        elif field == 3:
+            value["globalIdFieldName"] = _string(buf, v)
+        elif field == 5:
+            value["geometryProperties"] = _message(
+                buf, v, {1 : ("shapeAreaFieldName", "string"),
+                         2 : ("shapeLengthFieldName", "string"),
+                         3 : ("units", "string")})
+        elif field == 7:
+            geometryType = _GEOMETRY_TYPES[v] \
+                if v < len(_GEOMETRY_TYPES) else None
+        elif field == 8:
+            value["spatialReference"] = _spatial_reference(buf, v)
+        elif field == 9:
+            value["exceededTransferLimit"] = bool(v)
+        elif field == 10:
+            value["hasZ"] = bool(v)
+        elif field == 11:
+            value["hasM"] = bool(v)
+        elif field == 12:
+            transform = _transform(buf, v)
+        elif field == 13:
+            fields.append(_field(buf, v))
+        elif field == 15:
+            features.append(v)
+    if geometryType is not None:
+        value["geometryType"] = geometryType
+    value["fields"] = fields
+    names = [f["name"] for f in fields]
+    hasZ = value.get("hasZ", False)
+    hasM = value.get("hasM", False)
+    if transform is None:
+        transform = {"originPosition" : "bottomLeft",
+                     "scale" : [1.0, 1.0, 1.0, 1.0],
+                     "translate" : [0.0, 0.0, 0.0, 0.0]}
+    decoded = []
+    geometries = []
+    centroids = []
+    for start, end in features:
+        attributes = []
+        geometry = None
+        centroid = None
+        pos = start
+        # the fields of a Feature are all length delimited with one byte
+        # keys, so the generic _fields() loop is unrolled here
+        while pos < end:
+            key = buf[pos]
+            if key >= 0x80 or key & 7 != 2:
+                pos = _skip(buf, pos)
+                continue
+            size = buf[pos + 1]
+            pos += 2
+            if size >= 0x80:
+                size, pos = _varint(buf, pos - 1)
+            if key == 0x0a:
+                attributes.append(_value(buf, pos, pos + size))
+            elif key == 0x12:
+                geometry = _geometry(buf, (pos, pos + size))
+            elif key == 0x22:
+                centroid = _geometry(buf, (pos, pos + size))
+            elif key == 0x1a:
+                raise ValueError("shape buffer geometries are not supported")
+            pos += size
+        feature = {"attributes" : dict(zip(names, attributes))}
+        if geometry is not None:
+            geometries.append((feature, geometry[0], geometry[1]))
+        if centroid is not None:
+            centroids.append((feature, centroid[1]))
+        decoded.append(feature)
+    if geometries:
+        rows, offsets = _decode_coordinates(buf, [g[2] for g in geometries],
+                                            transform, hasZ, hasM)
+        for i, (feature, lengths, span) in enumerate(geometries):
+            feature["geometry"] = _esri_geometry(geometryType, lengths, rows,
+                                                 offsets[i], offsets[i + 1],
+                                                 hasZ, hasM)
+    if centroids:
+        rows, offsets = _decode_coordinates(buf, [c[1] for c in centroids],
+                                            transform)
+        for i, (feature, span) in enumerate(centroids):
+            feature["centroid"] = _esri_geometry("esriGeometryPoint", None,
+                                                 rows, offsets[i],
+                                                 offsets[i + 1], False, False)
+    value["features"] = decoded
+    return value
+#----------------------------------------------------------------------
+def decode(data):
+    """
+    decodes a protocol buffer query response
+    Inputs:
+       data - bytes of a f=pbf query response
+    Output:
+       dictionary shaped like the f=json response of the same query: a
+       featureset with real world coordinates, {"count": n} for count
+       queries or {"objectIdFieldName": ..., "objectIds": [...]} for id
+       queries
+    """
+    buf = bytes(data)
+    for field, wire, v in _fields(buf, 0, len(buf)):
+        if field != 2:
+            continue
+        for kind, w, span in _fields(buf, v[0], v[1]):
+            if kind == 1:
+                return _feature_result(buf, span)
+            elif kind == 2:
+                count = _message(buf, span, {1 : ("count", "uint")})
+                count.setdefault("count", 0)
+                return count
+            elif kind == 3:
+                value = {"objectIds" : []}
+                for f, w2, x in _fields(buf, span[0], span[1]):
+                    if f == 1:
+                        value["objectIdFieldName"] = _string(buf, x)
+                    elif f == 3:
+                        if w2 == 2:
+                            value["objectIds"].extend(_packed(buf, x[0], x[1]))
+                        else:
+                            value["objectIds"].append(x)
+                return value
+    return {"features" : []}
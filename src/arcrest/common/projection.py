@@ -0,0 +1,320 @@
+"""
+   Local projection of coordinates between common spatial references.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+import math
+try:
+    import numpy as np
+    numpyFound = True
+except ImportError:
+    numpyFound = False
+from .geometry import Point, MultiPoint, Envelope, sr_wkid, \
+     _PartGeometry, _pack, _unpack
+
+__all__ = ["supported", "project_coordinates", "project",
+           "project_response", "numpyFound"]
+
+_WEB_MERCATOR = frozenset([3857, 102100, 102113, 900913])
+_MERCATOR_RADIUS = 6378137.0
+_MAX_LATITUDE = 85.0511287798066
+# (semi-major axis, flattening) of the supported datums
+_ELLIPSOIDS = {"WGS84" : (6378137.0, 1 / 298.257223563),
+               "NAD83" : (6378137.0, 1 / 298.257222101)}
+_GEOGRAPHIC = {4326 : "WGS84", 4269 : "NAD83"}
+#----------------------------------------------------------------------
+def _require_numpy():
+    """raises an error when NumPy is not installed"""
+    if numpyFound == False:
+        raise Exception("NumPy is required to use this function")
+#----------------------------------------------------------------------
+def _describe(sr):
+    """
+    returns (datum, kind, zone, south) of a supported spatial reference
+    or None, kind is geographic, mercator or utm
+    """
+    wkid = sr_wkid(sr)
+    if wkid is None:
+        return None
+    if wkid in _GEOGRAPHIC:
+        return (_GEOGRAPHIC[wkid], "geographic", None, False)
+    if wkid in _WEB_MERCATOR:
+        return ("WGS84", "mercator", None, False)
+    if 32601 <= wkid <= 32660:
+        return ("WGS84", "utm", wkid - 32600, False)
+    if 32701 <= wkid <= 32760:
+        return ("WGS84", "utm", wkid - 32700, True)
+    if 26901 <= wkid <= 26923:
+        return ("NAD83", "utm", wkid - 26900, False)
+    return None
+#----------------------------------------------------------------------
+def supported(inSR, outSR):
+    """
+    returns True when coordinates can be projected locally from inSR to
+    outSR: WGS84 (4326), Web Mercator (3857/102100) and the WGS84 UTM
+    zones (326xx/327xx) among each other, and NAD83 (4269) and the NAD83
+    UTM zones (269xx) among each other.  Pairs needing a datum
+    transformation are not supported.
+    """
+    if not numpyFound:
+        return False
+    source = _describe(inSR)
+    target = _describe(outSR)
+    return source is not None and target is not None and \
+           source[0] == target[0]
+#----------------------------------------------------------------------
+def _utm_series(a, f):
+    """returns the Krueger series coefficients of an ellipsoid"""
+    n = f / (2 - f)
+    A = a / (1 + n) * (1 + n ** 2 / 4 + n ** 4 / 64)
+    alpha = (n / 2 - 2 * n ** 2 / 3 + 5 * n ** 3 / 16 + 41 * n ** 4 / 180,
+             13 * n ** 2 / 48 - 3 * n ** 3 / 5 + 557 * n ** 4 / 1440,
+             61 * n ** 3 / 240 - 103 * n ** 4 / 140,
+             49561 * n ** 4 / 161280)
+    beta = (n / 2 - 2 * n ** 2 / 3 + 37 * n ** 3 / 96 - n ** 4 / 360,
+            n ** 2 / 48 + n ** 3 / 15 - 437 * n ** 4 / 1440,
+            17 * n ** 3 / 480 - 37 * n ** 4 / 840,
+            4397 * n ** 4 / 161280)
+    delta = (2 * n - 2 * n ** 2 / 3 - 2 * n ** 3 + 116 * n ** 4 / 45,
+             7 * n ** 2 / 3 - 8 * n ** 3 / 5 - 227 * n ** 4 / 45,
+             56 * n ** 3 / 15 - 136 * n ** 4 / 35,
+             4279 * n ** 4 / 630)
+    e = 2 * math.sqrt(n) / (1 + n)
+    return A, alpha, beta, delta, e
+#----------------------------------------------------------------------
+def _utm_forward(lon, lat, zone, south, datum):
+    """projects longitude/latitude degrees to UTM meters"""
+    A, alpha, beta, delta, e = _utm_series(*_ELLIPSOIDS[datum])
+    k0 = 0.9996
+    lon0 = math.radians(zone * 6 - 183)
+    phi = np.radians(lat)
+    dlam = np.radians(lon) - lon0
+    sinphi = np.sin(phi)
+    t = np.sinh(np.arctanh(sinphi) - e * np.arctanh(e * sinphi))
+    xi = np.arctan2(t, np.cos(dlam))
+    eta = np.arctanh(np.sin(dlam) / np.sqrt(1 + t * t))
+    x = eta.copy()
+    y = xi.copy()
+    for j, a in enumerate(alpha, 1):
+        x += a * np.cos(2 * j * xi) * np.sinh(2 * j * eta)
+        y += a * np.sin(2 * j * xi) * np.cosh(2 * j * eta)
+    return 500000.0 + k0 * A * x, \
+           (10000000.0 if south else 0.0) + k0 * A * y
+#----------------------------------------------------------------------
+def _utm_inverse(x, y, zone, south, datum):
+    """unprojects UTM meters to longitude/latitude degrees"""
+    A, alpha, beta, delta, e = _utm_series(*_ELLIPSOIDS[datum])
+    k0 = 0.9996
+    lon0 = math.radians(zone * 6 - 183)
+    xi = (y - (10000000.0 if south else 0.0)) / (k0 * A)
+    eta = (x - 500000.0) / (k0 * A)
+    xi_ = xi.copy()
+    eta_ = eta.copy()
+    for j, b in enumerate(beta, 1):
+        xi_ -= b * np.sin(2 * j * xi) * np.cosh(2 * j * eta)
+        eta_ -= b * np.cos(2 * j * xi) * np.sinh(2 * j * eta)
+    chi = np.arcsin(np.sin(xi_) / np.cosh(eta_))
+    phi = chi.copy()
+    for j, d in enumerate(delta, 1):
+        phi += d * np.sin(2 * j * chi)
+    lam = lon0 + np.arctan2(np.sinh(eta_), np.cos(xi_))
+    return np.degrees(lam), np.degrees(phi)
+#----------------------------------------------------------------------
+def _to_geographic(x, y, source):
+    """returns longitude/latitude degrees of coordinates in source"""
+    datum, kind, zone, south = source
+    if kind == "mercator":
+        return np.degrees(x / _MERCATOR_RADIUS), \
+               np.degrees(2 * np.arctan(np.exp(y / _MERCATOR_RADIUS)) - math.pi / 2)
+    if kind == "utm":
+        return _utm_inverse(x, y, zone, south, datum)
+    return x, y
+#----------------------------------------------------------------------
+def _from_geographic(lon, lat, target):
+    """projects longitude/latitude degrees to target"""
+    datum, kind, zone, south = target
+    if kind == "mercator":
+        lat = np.clip(lat, -_MAX_LATITUDE, _MAX_LATITUDE)
+        return _MERCATOR_RADIUS * np.radians(lon), \
+               _MERCATOR_RADIUS * np.log(np.tan(math.pi / 4 + np.radians(lat) / 2))
+    if kind == "utm":
+        return _utm_forward(lon, lat, zone, south, datum)
+    return lon, lat
+#----------------------------------------------------------------------
+def project_coordinates(coords, inSR, outSR):
+    """
+    projects an array of coordinates
+    Inputs:
+       coords - array like of shape (vertices, dimensions), the first two
+          columns are x and y, further columns (z, m) are copied
+       inSR - spatial reference of coords as wkid, dictionary or
+          SpatialReference
+       outSR - spatial reference to project to
+    Output:
+       float64 array of the shape of coords
+    """
+    _require_numpy()
+    if not supported(inSR, outSR):
+        raise ValueError("no local projection from %s to %s" % (inSR, outSR))
+    out = np.array(coords, dtype=np.float64)
+    if out.size == 0:
+        return out
+    source = _describe(inSR)
+    target = _describe(outSR)
+    if source[1:] == target[1:]:
+        return out
+    with np.errstate(invalid='ignore', divide='ignore'):
+        lon, lat = _to_geographic(out[:, 0], out[:, 1], source)
+        out[:, 0], out[:, 1] = _from_geographic(lon, lat, target)
+    return out
+#----------------------------------------------------------------------
+def _out_spatial_reference(outSR):
+    """returns the Esri JSON spatial reference written with the results"""
+    wkid = sr_wkid(outSR)
+    if wkid in _WEB_MERCATOR:
+        return {"wkid" : 102100, "latestWkid" : 3857}
+    return {"wkid" : wkid, "latestWkid" : wkid}
+#----------------------------------------------------------------------
+def _project_parts(geometries, key, inSR, outSR):
+    """
+    projects the part lists stored under key of many Esri JSON geometries
+    in one pass, the dictionaries are changed in place
+    """
+    parts = []
+    counts = []
+    for g in geometries:
+        p = g[key] if key != "points" else [g[key]]
+        parts.extend(p)
+        counts.append(len(p))
+    coords, offsets = _pack(parts)
+    projected = _unpack(project_coordinates(coords, inSR, outSR), offsets)
+    start = 0
+    for g, count in zip(geometries, counts):
+        if key == "points":
+            g[key] = projected[start]
+        else:
+            g[key] = projected[start:start + count]
+        start += count
+#----------------------------------------------------------------------
+def _project_dicts(geometries, inSR, outSR):
+    """projects Esri JSON geometries in place"""
+    groups = {"x" : [], "rings" : [], "paths" : [], "points" : [], "xmin" : []}
+    for g in geometries:
+        if not g:
+            continue
+        if 'curveRings' in g or 'curvePaths' in g:
+            raise ValueError("curves are not supported by the local projection")
+        for key in groups:
+            if key in g:
+                groups[key].append(g)
+                break
+    for key in ("rings", "paths", "points"):
+        if groups[key]:
+            _project_parts(groups[key], key, inSR, outSR)
+    if groups["x"]:
+        xy = project_coordinates([[g['x'], g['y']] for g in groups["x"]],
+                                 inSR, outSR).tolist()
+        for g, (x, y) in zip(groups["x"], xy):
+            g['x'], g['y'] = x, y
+    for g in groups["xmin"]:
+        # the corners of a projected envelope are not its extent, project
+        # the densified boundary instead
+        steps = np.linspace(0, 1, 11)
+        xs = g['xmin'] + (g['xmax'] - g['xmin']) * steps
+        ys = g['ymin'] + (g['ymax'] - g['ymin']) * steps
+        boundary = np.concatenate([
+            np.column_stack([xs, np.full(11, g['ymin'])]),
+            np.column_stack([xs, np.full(11, g['ymax'])]),
+            np.column_stack([np.full(11, g['xmin']), ys]),
+            np.column_stack([np.full(11, g['xmax']), ys])])
+        boundary = project_coordinates(boundary, inSR, outSR)
+        g['xmin'], g['ymin'] = boundary.min(axis=0).tolist()
+        g['xmax'], g['ymax'] = boundary.max(axis=0).tolist()
+    for g in geometries:
+        if g and 'spatialReference' in g:
+            g['spatialReference'] = _out_spatial_reference(outSR)
+    return geometries
+#----------------------------------------------------------------------
+def project(geometries, inSR, outSR):
+    """
+    projects a list of geometries
+    Inputs:
+       geometries - list of geometry objects or Esri JSON dictionaries
+       inSR - spatial reference of the geometries
+       outSR - spatial reference to project to
+    Output:
+       list of projected geometries, geometry objects for geometry
+       objects and dictionaries for dictionaries.  The input is not
+       changed.
+    """
+    _require_numpy()
+    if not supported(inSR, outSR):
+        raise ValueError("no local projection from %s to %s" % (inSR, outSR))
+    wkid = sr_wkid(outSR)
+    results = [None] * len(geometries)
+    dicts = []
+    positions = []
+    objects = []
+    for i, g in enumerate(geometries):
+        if isinstance(g, _PartGeometry):
+            objects.append(i)
+        elif isinstance(g, dict):
+            dicts.append(dict(g))
+            positions.append(i)
+        else:
+            dicts.append(g.asDictionary)
+            positions.append(i)
+    for i, g in zip(positions, _project_dicts(dicts, inSR, outSR)):
+        source = geometries[i]
+        if isinstance(source, Point):
+            g = Point(coord=[g['x'], g['y']], wkid=wkid,
+                      z=g.get('z'), m=g.get('m'))
+        elif isinstance(source, Envelope):
+            g = Envelope(g['xmin'], g['ymin'], g['xmax'], g['ymax'],
+                         wkid=wkid, zmin=g.get('zmin'), zmax=g.get('zmax'),
+                         mmin=g.get('mmin'), mmax=g.get('mmax'))
+        results[i] = g
+    if objects:
+        # one call for the xy columns of all vertices of all objects
+        arrays = [np.asarray(geometries[i].coordinates, dtype=np.float64)
+                  for i in objects]
+        xy = project_coordinates(np.concatenate([a[:, :2] for a in arrays]),
+                                 inSR, outSR)
+        start = 0
+        for i, coords in zip(objects, arrays):
+            source = geometries[i]
+            coords = coords.copy()
+            coords[:, :2] = xy[start:start + len(coords)]
+            start += len(coords)
+            offsets = source.part_offsets
+            parts = [coords[offsets[k]:offsets[k + 1]]
+                     for k in range(len(offsets) - 1)]
+            if isinstance(source, MultiPoint):
+                results[i] = MultiPoint(points=coords, wkid=wkid,
+                                        hasZ=source.hasZ, hasM=source.hasM)
+            else:
+                results[i] = source.__class__(parts, wkid=wkid,
+                                              hasZ=source.hasZ,
+                                              hasM=source.hasM)
+    return results
+#----------------------------------------------------------------------
+def project_response(value, outSR, inSR=None):
+    """
+    projects the features of a decoded query response in place
+    Inputs:
+       value - dictionary with a featureset, i.e. a query result
+       outSR - spatial reference to project to
+       inSR - spatial reference of the features, defaults to the
+          spatialReference of value
+    Output:
+       value
+    """
+    if inSR is None:
+        inSR = value.get('spatialReference')
+    geometries = [f.get('geometry') for f in value.get('features', [])]
+    _project_dicts([g for g in geometries if g], inSR, outSR)
+    if 'extent' in value and isinstance(value['extent'], dict):
+        _project_dicts([value['extent']], inSR, outSR)
+    value['spatialReference'] = _out_spatial_reference(outSR)
+    return value
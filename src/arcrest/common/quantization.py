@@ -0,0 +1,239 @@
+"""
+   Quantization parameters of queries and the decoder of quantized,
+   delta encoded query geometries.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import division
+from ..web import _json as json
+try:
+    import numpy as np
+    numpyFound = True
+except ImportError:
+    numpyFound = False
+from .geometry import Envelope, meters_per_unit, _pack, _unpack
+
+__all__ = ["QuantizationParameters", "decode_response", "decode_geometries"]
+
+_PART_KEYS = ("rings", "paths", "points")
+########################################################################
+class QuantizationParameters(object):
+    """
+    Asks a query to return its geometries as integers on a grid instead of
+    real world coordinates.  The first vertex of every path or ring is
+    sent as grid position, the following ones as the difference to the
+    previous vertex, which makes the response several times smaller.
+    FeatureLayer.query restores the real world coordinates before it
+    returns, see decode_response().
+
+    Inputs:
+       mode - "view" generalizes the geometries to the grid for display,
+          "edit" keeps every vertex for extracts
+       tolerance - size of one grid cell in the units of the output
+          spatial reference
+       extent - Envelope or extent dictionary covering the features, the
+          grid starts at its origin
+       originPosition - "upperLeft" (default) or "bottomLeft"
+    """
+    _mode = None
+    _tolerance = None
+    _extent = None
+    _originPosition = None
+    _allowed_modes = ["view", "edit"]
+    _allowed_origins = ["upperLeft", "bottomLeft"]
+    #----------------------------------------------------------------------
+    def __init__(self, mode="view", tolerance=None, extent=None,
+                 originPosition="upperLeft"):
+        """Constructor"""
+        self.mode = mode
+        self.originPosition = originPosition
+        self._tolerance = tolerance
+        self._extent = extent
+    #----------------------------------------------------------------------
+    @staticmethod
+    def forView(extent, width=1024, height=None):
+        """
+        returns parameters for drawing the extent on a screen of the given
+        size in pixels, one grid cell is one pixel
+        """
+        value = extent.asDictionary if isinstance(extent, Envelope) else extent
+        cells = max(width, height or 0)
+        size = max(value['xmax'] - value['xmin'], value['ymax'] - value['ymin'])
+        return QuantizationParameters(mode="view", tolerance=size / float(cells),
+                                      extent=extent)
+    #----------------------------------------------------------------------
+    @staticmethod
+    def forEdit(extent, tolerance=None):
+        """
+        returns parameters that keep every vertex, with a tolerance of
+        about a millimeter in the units of the extent's spatial reference
+        unless given (about 9e-9 for degrees, 0.0033 for feet)
+        """
+        value = extent.asDictionary if isinstance(extent, Envelope) else extent
+        if tolerance is None:
+            tolerance = 0.001 / meters_per_unit(value.get('spatialReference'))
+        return QuantizationParameters(mode="edit", tolerance=tolerance,
+                                      extent=extent)
+    #----------------------------------------------------------------------
+    @property
+    def mode(self):
+        """gets/sets the quantization mode, view or edit"""
+        return self._mode
+    #----------------------------------------------------------------------
+    @mode.setter
+    def mode(self, value):
+        """gets/sets the quantization mode, view or edit"""
+        if value not in self._allowed_modes:
+            raise AttributeError("mode must be one of: %s" %
+                                 ", ".join(self._allowed_modes))
+        self._mode = value
+    #----------------------------------------------------------------------
+    @property
+    def originPosition(self):
+        """gets/sets the corner of the extent where the grid starts"""
+        return self._originPosition
+    #----------------------------------------------------------------------
+    @originPosition.setter
+    def originPosition(self, value):
+        """gets/sets the corner of the extent where the grid starts"""
+        if value not in self._allowed_origins:
+            raise AttributeError("originPosition must be one of: %s" %
+                                 ", ".join(self._allowed_origins))
+        self._originPosition = value
+    #----------------------------------------------------------------------
+    @property
+    def tolerance(self):
+        """gets/sets the size of one grid cell"""
+        return self._tolerance
+    #----------------------------------------------------------------------
+    @tolerance.setter
+    def tolerance(self, value):
+        """gets/sets the size of one grid cell"""
+        self._tolerance = value
+    #----------------------------------------------------------------------
+    @property
+    def extent(self):
+        """gets/sets the extent covered by the grid"""
+        return self._extent
+    #----------------------------------------------------------------------
+    @extent.setter
+    def extent(self, value):
+        """gets/sets the extent covered by the grid"""
+        self._extent = value
+    #----------------------------------------------------------------------
+    @property
+    def value(self):
+        """returns the parameters as a dictionary"""
+        template = {
+            "mode" : self._mode,
+            "originPosition" : self._originPosition
+        }
+        if self._tolerance is not None:
+            template['tolerance'] = self._tolerance
+        if self._extent is not None:
+            template['extent'] = self._extent.asDictionary \
+                if isinstance(self._extent, Envelope) else self._extent
+        return template
+    #----------------------------------------------------------------------
+    def __str__(self):
+        """returns the parameters as a JSON string"""
+        return json.dumps(self.value)
+#----------------------------------------------------------------------
+def _transform(transform):
+    """returns (scale x, scale y, translate x, translate y) of a transform"""
+    sx, sy = transform['scale'][:2]
+    tx, ty = transform['translate'][:2]
+    if transform.get('originPosition', 'upperLeft') == 'upperLeft':
+        sy = -sy
+    return sx, sy, tx, ty
+#----------------------------------------------------------------------
+def _decode_parts(parts, transform):
+    """
+    returns the real world vertices of delta encoded parts (lists of
+    vertex lists), Z and M values are kept as they are
+    """
+    sx, sy, tx, ty = _transform(transform)
+    if not numpyFound:
+        decoded = []
+        for part in parts:
+            x = y = 0
+            out = []
+            for v in part:
+                x += v[0]
+                y += v[1]
+                out.append([tx + x * sx, ty + y * sy] + list(v[2:]))
+            decoded.append(out)
+        return decoded
+    coords, offsets = _pack(parts)
+    if len(coords):
+        # a running sum per part undoes the delta encoding
+        xy = np.cumsum(coords[:, :2], axis=0)
+        starts = offsets[:-1]
+        counts = np.diff(offsets)
+        nonempty = counts > 0
+        before = np.zeros((len(starts), 2))
+        before[nonempty & (starts > 0)] = \
+            xy[starts[nonempty & (starts > 0)] - 1]
+        xy -= np.repeat(before, counts, axis=0)
+        coords[:, 0] = tx + xy[:, 0] * sx
+        coords[:, 1] = ty + xy[:, 1] * sy
+    return _unpack(coords, offsets)
+#----------------------------------------------------------------------
+def decode_geometries(geometries, transform):
+    """
+    restores the real world coordinates of quantized Esri JSON geometries
+    in place, all parts of all geometries are decoded in one pass
+    Inputs:
+       geometries - list of geometry dictionaries (None is skipped)
+       transform - the 'transform' of the query response
+    Output:
+       geometries
+    """
+    groups = dict((key, []) for key in _PART_KEYS)
+    points = []
+    for g in geometries:
+        if not g:
+            continue
+        if 'x' in g:
+            points.append(g)
+            continue
+        for key in _PART_KEYS:
+            if key in g:
+                groups[key].append(g)
+                break
+    sx, sy, tx, ty = _transform(transform)
+    for g in points:
+        if g['x'] is not None and g['y'] is not None:
+            g['x'] = tx + g['x'] * sx
+            g['y'] = ty + g['y'] * sy
+    for key, items in groups.items():
+        if not items:
+            continue
+        parts = []
+        counts = []
+        for g in items:
+            p = [g[key]] if key == "points" else g[key]
+            parts.extend(p)
+            counts.append(len(p))
+        decoded = _decode_parts(parts, transform)
+        start = 0
+        for g, count in zip(items, counts):
+            if key == "points":
+                g[key] = decoded[start]
+            else:
+                g[key] = decoded[start:start + count]
+            start += count
+    return geometries
+#----------------------------------------------------------------------
+def decode_response(value):
+    """
+    restores the real world coordinates of a quantized query response in
+    place and removes its transform, responses without a transform are
+    returned unchanged
+    """
+    if not isinstance(value, dict) or 'transform' not in value:
+        return value
+    transform = value.pop('transform')
+    decode_geometries([f.get('geometry') for f in value.get('features', [])],
+                      transform)
+    return value
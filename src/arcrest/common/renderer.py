@@ -1,6 +1,6 @@
 from __future__ import absolute_import
 from __future__ import print_function
-import json
+from ..web import _json as json
 ########################################################################
 class BaseRenderer(object):
     """base renderer object"""
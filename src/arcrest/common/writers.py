@@ -0,0 +1,434 @@
+"""
+   Streaming writers saving features to CSV, Esri JSON and GeoJSON files.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import io
+import csv
+from ..web import _json as json
+from .general import Feature, FeatureSet, _date_handler
+from .geometry import is_geographic
+from . import projection
+
+__all__ = ["CSVWriter", "JSONWriter", "GeoJSONWriter", "save_features"]
+
+_HEADER_KEYS = ("objectIdFieldName", "globalIdFieldName", "displayFieldName",
+                "geometryType", "spatialReference", "hasZ", "hasM", "fields")
+#----------------------------------------------------------------------
+def _header_of(source):
+    """returns the featureset members of a page, FeatureSet or stream"""
+    if isinstance(source, dict):
+        return dict((k, source[k]) for k in _HEADER_KEYS if k in source)
+    if isinstance(source, FeatureSet):
+        value = {
+            "objectIdFieldName" : source.objectIdFieldName,
+            "globalIdFieldName" : source.globalIdFieldName,
+            "displayFieldName" : source.displayFieldName,
+            "geometryType" : source.geometryType,
+            "spatialReference" : source.spatialReference,
+            "hasZ" : source.hasZ,
+            "hasM" : source.hasM,
+            "fields" : source.fields
+        }
+        return dict((k, v) for k, v in value.items() if v is not None)
+    header = getattr(source, 'header', None)
+    if isinstance(header, dict):
+        return _header_of(header)
+    if hasattr(source, 'fields') and hasattr(source, 'spatialReference') and \
+       hasattr(source, 'geometryType'):
+        # ColumnarFeatureSet
+        return dict((k, v) for k, v in (("fields", source.fields),
+                                        ("spatialReference", source.spatialReference),
+                                        ("geometryType", source.geometryType))
+                    if v is not None)
+    return {}
+########################################################################
+class _FeatureWriter(object):
+    """
+    Base of the streaming writers.  Features are written one at a time as
+    they are passed to write(), so only the current page is in memory.
+    write() accepts a single feature or page, or an iterable of them:
+    Feature objects, feature dictionaries, query responses (dictionaries
+    with a 'features' list), FeatureSets, ColumnarFeatureSets and
+    FeatureStreams.  The file header (fields, spatial reference) is taken
+    from the constructor or from the first page that carries one.
+
+    Inputs:
+       out - path of the output file or a text file object
+       fields - list of field dictionaries, defaults to the fields of the
+          first page
+       spatialReference - spatial reference of the features, defaults to
+          the one of the first page
+       geometryType - Esri geometry type, defaults to the one of the first
+          page
+       encoding - character encoding of a file opened by path
+    """
+    _header = None
+    _count = 0
+    _started = False
+    _closed = False
+    #----------------------------------------------------------------------
+    def __init__(self, out, fields=None, spatialReference=None,
+                 geometryType=None, encoding="utf-8"):
+        """Constructor"""
+        if isinstance(out, str):
+            self._file = io.open(out, 'w', encoding=encoding, newline='')
+            self._owns_file = True
+        else:
+            self._file = out
+            self._owns_file = False
+        self._header = {}
+        if fields is not None:
+            self._header['fields'] = fields
+        if spatialReference is not None:
+            self._header['spatialReference'] = spatialReference
+        if geometryType is not None:
+            self._header['geometryType'] = geometryType
+    #----------------------------------------------------------------------
+    def __enter__(self):
+        """opens the writer in a with statement"""
+        return self
+    #----------------------------------------------------------------------
+    def __exit__(self, exc_type, exc_value, tb):
+        """closes the writer at the end of a with statement"""
+        self.close()
+    #----------------------------------------------------------------------
+    @property
+    def count(self):
+        """gets the number of features written"""
+        return self._count
+    #----------------------------------------------------------------------
+    @property
+    def header(self):
+        """gets the featureset members written with the features"""
+        return self._header
+    #----------------------------------------------------------------------
+    def _adopt(self, source):
+        """takes the header members missing so far from a page"""
+        if self._started:
+            return
+        for k, v in _header_of(source).items():
+            self._header.setdefault(k, v)
+    #----------------------------------------------------------------------
+    def _features(self, source):
+        """yields the feature dictionaries of a feature, page or iterable"""
+        if isinstance(source, Feature):
+            yield source.asDictionary
+        elif isinstance(source, dict):
+            if 'features' in source:
+                self._adopt(source)
+                for feature in source['features']:
+                    yield feature.asDictionary \
+                        if isinstance(feature, Feature) else feature
+            else:
+                yield source
+        elif isinstance(source, FeatureSet) or hasattr(source, 'toFeatureSet'):
+            self._adopt(source)
+            for feature in source:
+                yield feature.asDictionary
+        elif hasattr(source, 'header'):
+            # FeatureStream, its header is complete once the first feature
+            # has been decoded
+            for feature in source:
+                self._adopt(source)
+                yield feature
+        else:
+            for item in source:
+                for feature in self._features(item):
+                    yield feature
+    #----------------------------------------------------------------------
+    def write(self, source):
+        """
+        writes features
+        Inputs:
+           source - a feature or page, or an iterable of them
+        Output:
+           number of features written by this call
+        """
+        if self._closed:
+            raise ValueError("write to a closed writer")
+        written = 0
+        for feature in self._features(source):
+            if not self._started:
+                self._begin()
+                self._started = True
+            self._write_feature(feature)
+            self._count += 1
+            written += 1
+        return written
+    #----------------------------------------------------------------------
+    def close(self):
+        """completes the file and closes it if it was opened by path"""
+        if self._closed:
+            return
+        if not self._started:
+            self._begin()
+            self._started = True
+        self._end()
+        self._closed = True
+        self._file.flush()
+        if self._owns_file:
+            self._file.close()
+    #----------------------------------------------------------------------
+    def _begin(self):
+        """writes the start of the file"""
+        pass
+    #----------------------------------------------------------------------
+    def _write_feature(self, feature):
+        """writes one feature dictionary"""
+        raise NotImplementedError()
+    #----------------------------------------------------------------------
+    def _end(self):
+        """writes the end of the file"""
+        pass
+########################################################################
+class CSVWriter(_FeatureWriter):
+    """
+    Writes features as CSV rows, one column per field.  Without fields
+    the attributes of the first feature give the columns.
+
+    Inputs:
+       out - path of the output file or a text file object
+       fields - list of field dictionaries or field names
+       include_geometry - if True, a SHAPE column holds the Esri JSON of
+          the geometry
+       kwargs - see _FeatureWriter
+    """
+    _include_geometry = False
+    #----------------------------------------------------------------------
+    def __init__(self, out, fields=None, include_geometry=False, **kwargs):
+        """Constructor"""
+        super(CSVWriter, self).__init__(out, fields=fields, **kwargs)
+        self._include_geometry = include_geometry
+        self._writer = csv.writer(self._file)
+        self._names = None
+    #----------------------------------------------------------------------
+    def _begin(self):
+        """writes the header row when the fields are known"""
+        fields = self._header.get('fields')
+        if fields:
+            self._columns([f['name'] if isinstance(f, dict) else f
+                           for f in fields])
+    #----------------------------------------------------------------------
+    def _columns(self, names):
+        """sets the columns and writes the header row"""
+        self._names = names
+        self._writer.writerow(names +
+                              (["SHAPE"] if self._include_geometry else []))
+    #----------------------------------------------------------------------
+    def _write_feature(self, feature):
+        """writes one row"""
+        attributes = feature.get('attributes') or {}
+        if self._names is None:
+            self._columns(list(attributes.keys()))
+        row = [attributes.get(name) for name in self._names]
+        if self._include_geometry:
+            geometry = feature.get('geometry')
+            row.append(json.dumps(geometry) if geometry else None)
+        self._writer.writerow(row)
+########################################################################
+class JSONWriter(_FeatureWriter):
+    """
+    Writes an Esri JSON featureset, the members known before the first
+    feature are written first and each feature is serialized as soon as
+    it is passed to write().
+
+    Inputs:
+       out - path of the output file or a text file object
+       indent - indentation of the featureset members, None for compact
+          output
+       kwargs - see _FeatureWriter
+    """
+    _indent = None
+    #----------------------------------------------------------------------
+    def __init__(self, out, indent=None, **kwargs):
+        """Constructor"""
+        super(JSONWriter, self).__init__(out, **kwargs)
+        self._indent = indent
+    #----------------------------------------------------------------------
+    def _begin(self):
+        """writes the featureset members and opens the features array"""
+        sep = "\n" if self._indent is not None else ""
+        pad = " " * (self._indent or 0)
+        self._file.write("{" + sep)
+        for key in _HEADER_KEYS:
+            if key in self._header:
+                self._file.write('%s%s: %s,%s' % (
+                    pad, json.dumps(key),
+                    json.dumps(self._header[key], default=_date_handler), sep))
+        self._file.write('%s"features": [' % pad)
+    #----------------------------------------------------------------------
+    def _write_feature(self, feature):
+        """writes one feature"""
+        sep = "\n" + " " * (2 * (self._indent or 0)) \
+            if self._indent is not None else ""
+        self._file.write(("," if self._count else "") + sep +
+                         json.dumps(feature, default=_date_handler))
+    #----------------------------------------------------------------------
+    def _end(self):
+        """closes the features array"""
+        sep = "\n" if self._indent is not None else ""
+        pad = " " * (self._indent or 0)
+        self._file.write(sep + (pad if self._count else "") + "]" + sep + "}")
+########################################################################
+class GeoJSONWriter(_FeatureWriter):
+    """
+    Writes a GeoJSON FeatureCollection.  Polygons follow RFC 7946: outer
+    rings are counter clockwise and each hole is placed in the polygon of
+    the outer ring containing it.  Features in Web Mercator or UTM are
+    projected to WGS84 on the fly, other spatial references are written
+    as they are.
+
+    Inputs:
+       out - path of the output file or a text file object
+       id_field - attribute written as the feature id, defaults to the
+          objectIdFieldName of the first page
+       kwargs - see _FeatureWriter
+    """
+    _id_field = None
+    _inSR = None
+    _batch_size = 1000
+    #----------------------------------------------------------------------
+    def __init__(self, out, id_field=None, **kwargs):
+        """Constructor"""
+        super(GeoJSONWriter, self).__init__(out, **kwargs)
+        self._id_field = id_field
+        self._pending = []
+        self._first = True
+    #----------------------------------------------------------------------
+    def _begin(self):
+        """opens the feature collection"""
+        if self._id_field is None:
+            self._id_field = self._header.get('objectIdFieldName')
+        sr = self._header.get('spatialReference')
+        if sr and not is_geographic(sr) and projection.supported(sr, 4326):
+            self._inSR = sr
+        self._file.write('{"type": "FeatureCollection", "features": [')
+    #----------------------------------------------------------------------
+    def _write_feature(self, feature):
+        """queues one feature, they are projected and written in batches"""
+        self._pending.append(feature)
+        if len(self._pending) >= self._batch_size:
+            self._flush()
+    #----------------------------------------------------------------------
+    def _flush(self):
+        """writes the queued features"""
+        features = self._pending
+        self._pending = []
+        geometries = [f.get('geometry') for f in features]
+        if self._inSR is not None:
+            present = [i for i, g in enumerate(geometries) if g]
+            projected = projection.project([geometries[i] for i in present],
+                                           self._inSR, 4326)
+            for i, g in zip(present, projected):
+                geometries[i] = g
+        for feature, geometry in zip(features, geometries):
+            attributes = feature.get('attributes') or {}
+            value = {
+                "type" : "Feature",
+                "geometry" : esri_to_geojson(geometry),
+                "properties" : attributes
+            }
+            if self._id_field is not None and \
+               attributes.get(self._id_field) is not None:
+                value['id'] = attributes[self._id_field]
+            self._file.write(("\n" if self._first else ",\n") +
+                             json.dumps(value, default=_date_handler))
+            self._first = False
+    #----------------------------------------------------------------------
+    def _end(self):
+        """writes the queued features and closes the feature collection"""
+        self._flush()
+        self._file.write("\n]}")
+#----------------------------------------------------------------------
+def _ring_area(ring):
+    """returns the planar signed area of a ring, positive if clockwise"""
+    area = 0.0
+    for i in range(len(ring) - 1):
+        area += ring[i + 1][0] * ring[i][1] - ring[i][0] * ring[i + 1][1]
+    return area / 2.0
+#----------------------------------------------------------------------
+def _in_ring(x, y, ring):
+    """returns True when the point is inside the ring (even-odd rule)"""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > y) != (yj > y) and \
+           x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+#----------------------------------------------------------------------
+def esri_to_geojson(geometry):
+    """
+    returns the GeoJSON geometry of an Esri JSON geometry dictionary, or
+    None for an empty geometry
+    """
+    if not geometry:
+        return None
+    if 'x' in geometry:
+        if geometry['x'] is None:
+            return None
+        coords = [geometry['x'], geometry['y']]
+        if geometry.get('z') is not None:
+            coords.append(geometry['z'])
+        return {"type" : "Point", "coordinates" : coords}
+    if 'points' in geometry:
+        return {"type" : "MultiPoint",
+                "coordinates" : [p[:3] if geometry.get('hasZ') else p[:2]
+                                 for p in geometry['points']]}
+    if 'paths' in geometry:
+        paths = [[p[:3] if geometry.get('hasZ') else p[:2] for p in path]
+                 for path in geometry['paths']]
+        if len(paths) == 1:
+            return {"type" : "LineString", "coordinates" : paths[0]}
+        return {"type" : "MultiLineString", "coordinates" : paths}
+    if 'rings' in geometry:
+        outer = []
+        holes = []
+        for ring in geometry['rings']:
+            ring = [p[:3] if geometry.get('hasZ') else p[:2] for p in ring]
+            if _ring_area(ring) >= 0:
+                outer.append([ring[::-1]])
+            else:
+                holes.append(ring[::-1])
+        for hole in holes:
+            for polygon in outer:
+                if _in_ring(hole[0][0], hole[0][1], polygon[0]):
+                    polygon.append(hole)
+                    break
+            else:
+                # a hole outside of every outer ring is drawn as a polygon
+                outer.append([hole[::-1]])
+        if len(outer) == 1:
+            return {"type" : "Polygon", "coordinates" : outer[0]}
+        return {"type" : "MultiPolygon", "coordinates" : outer}
+    if 'xmin' in geometry:
+        xmin, ymin = geometry['xmin'], geometry['ymin']
+        xmax, ymax = geometry['xmax'], geometry['ymax']
+        return {"type" : "Polygon",
+                "coordinates" : [[[xmin, ymin], [xmax, ymin], [xmax, ymax],
+                                  [xmin, ymax], [xmin, ymin]]]}
+    raise ValueError("unsupported geometry: %s" % list(geometry.keys()))
+#----------------------------------------------------------------------
+def save_features(source, path, **kwargs):
+    """
+    writes features to a file, the format is given by the extension:
+    .csv, .json or .geojson
+    Inputs:
+       source - features or pages, see _FeatureWriter.write
+       path - output file
+       kwargs - options of the writer
+    Output:
+       the number of features written
+    """
+    ext = path.lower().rsplit('.', 1)[-1]
+    writers = {"csv" : CSVWriter, "json" : JSONWriter,
+               "geojson" : GeoJSONWriter}
+    if ext not in writers:
+        raise ValueError("unsupported file type: .%s" % ext)
+    with writers[ext](path, **kwargs) as writer:
+        writer.write(source)
+    return writer.count
@@ -3,7 +3,7 @@ from __future__ import print_function
 from ..common.geometry import Point, Polygon, Envelope, SpatialReference
 from .._abstract.abstract import BaseGeoEnrichment
 from ..manageorg import Administration
-import json
+from ..web import _json as json
 import csv
 import os
 import numpy as np
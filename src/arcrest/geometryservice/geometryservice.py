@@ -2,7 +2,9 @@ from __future__ import absolute_import
 from __future__ import print_function
 from .._abstract import abstract
 from ..common.geometry import Point, Polyline, Polygon, MultiPoint, Envelope
-import json
+from ..common import geometry as _geometry
+from ..common import projection as _projection
+from ..web import _json as json
 
 
 ########################################################################
@@ -12,6 +14,12 @@ class GeometryService(abstract.BaseAGSServer):
     sophisticated and frequently used geometric operations. An ArcGIS
     Server web site can only expose one geometry service with the static
     name "Geometry".
+
+    When local_operations is True, areasAndLengths, lengths, labelPoints
+    and generalize are computed on the client (requires NumPy) whenever
+    the inputs are simple enough: no curves, a planar or geodesic
+    calculation, and units that can be converted without the server.
+    Other calls are sent to the server as before.
     """
     _url = None
     _securityHandler = None
@@ -19,8 +27,10 @@ class GeometryService(abstract.BaseAGSServer):
     _proxy_port = None
     _json_dict = None
     _json_string = None
+    _local_operations = False
     #----------------------------------------------------------------------
-    def __init__(self, url, securityHandler=None, proxy_url=None, proxy_port=None):
+    def __init__(self, url, securityHandler=None, proxy_url=None, proxy_port=None,
+                 local_operations=False):
         """Constructor"""
         self._url = url
         self._securityHandler = securityHandler
@@ -28,6 +38,7 @@ class GeometryService(abstract.BaseAGSServer):
             self._referer_url = securityHandler.referer_url
         self._proxy_port = proxy_port
         self._proxy_url = proxy_url
+        self._local_operations = local_operations
         self.__init()
     #----------------------------------------------------------------------
     def __init(self):
@@ -55,6 +66,52 @@ class GeometryService(abstract.BaseAGSServer):
         for k,v in self._json_dict.items():
             yield [k,v]
     #----------------------------------------------------------------------
+    @property
+    def local_operations(self):
+        """gets/sets if simple measurements are computed locally"""
+        return self._local_operations
+    #----------------------------------------------------------------------
+    @local_operations.setter
+    def local_operations(self, value):
+        """gets/sets if simple measurements are computed locally"""
+        self._local_operations = bool(value)
+    #----------------------------------------------------------------------
+    def __local_factor(self, sr, unit, units, calculationType):
+        """
+        returns the factor converting local results to the unit, or None
+        when the operation has to run on the server
+        """
+        if not self._local_operations or not _geometry.numpyFound:
+            return None
+        if calculationType == "geodesic":
+            if not _geometry.is_geographic(sr):
+                return None
+            if unit in (None, ""):
+                return 1.0
+        elif calculationType == "planar":
+            if unit in (None, ""):
+                return 1.0
+            if not _geometry.is_metric(sr):
+                return None
+        else:
+            return None
+        factor = units.get(unit)
+        if factor is None:
+            return None
+        return 1.0 / factor
+    #----------------------------------------------------------------------
+    def __local_geometries(self, geometries):
+        """returns the geometries as a local batch or None for curves"""
+        if not isinstance(geometries, list) or len(geometries) == 0:
+            return None
+        for g in geometries:
+            if isinstance(g, dict):
+                if 'curveRings' in g or 'curvePaths' in g:
+                    return None
+            elif not isinstance(g, (Point, Polyline, Polygon, MultiPoint, Envelope)):
+                return None
+        return geometries
+    #----------------------------------------------------------------------
     def areasAndLengths(self,
                         polygons,
                         lengthUnit,
@@ -135,6 +192,20 @@ class GeometryService(abstract.BaseAGSServer):
         if not isinstance(polygons, list) or len(polygons) <= 0:
             return "No polygons provided, please submit a list of polygon geometries"
         p = polygons[0]
+        if isinstance(p, Polygon) and self.__local_geometries(polygons):
+            sr = p.spatialReference
+            lengthFactor = self.__local_factor(sr, lengthUnit,
+                                               _geometry._LINEAR_UNITS,
+                                               calculationType)
+            areaFactor = self.__local_factor(sr, areaUnit,
+                                             _geometry._AREA_UNITS,
+                                             calculationType)
+            if lengthFactor is not None and areaFactor is not None:
+                geodesic = calculationType == "geodesic"
+                return {
+                    "areas" : (_geometry.areas(polygons, geodesic) * areaFactor).tolist(),
+                    "lengths" : (_geometry.lengths(polygons, geodesic) * lengthFactor).tolist()
+                }
         if isinstance(p, Polygon):
             params['sr'] = p.spatialReference['wkid']
             params['polygons'] = [poly.asDictionary for poly in polygons]
@@ -661,6 +732,16 @@ class GeometryService(abstract.BaseAGSServer):
             deviationUnit - a unit for maximum deviation. If a unit is not specified, 
                             the units are derived from sr.
         """
+        if self.__local_geometries(geometries) and \
+           self.__local_factor(sr, deviationUnit, _geometry._LINEAR_UNITS,
+                               "planar") is not None:
+            factor = _geometry._LINEAR_UNITS.get(deviationUnit, 1.0)
+            return {
+                "geometries" : [
+                    g.asDictionary if not isinstance(g, dict) else g
+                    for g in _geometry.generalize(geometries,
+                                                  maxDeviation * factor)]
+            }
         url = f"{self._url}/generalize"
         params = {
             "f": "json",
@@ -721,6 +802,13 @@ class GeometryService(abstract.BaseAGSServer):
                        ArcGIS REST API).
             sr - spatial reference of the input geometries WKID.
         """
+        if self.__local_geometries(polygons) and \
+           self.__local_factor(sr, None, _geometry._LINEAR_UNITS,
+                               "planar") is not None:
+            return {
+                "labelPoints" : [{"x" : x, "y" : y} for x, y in
+                                 _geometry.label_points(polygons).tolist()]
+            }
         url = f"{self._url}/labelPoints"
         params = {
             "f" : "json",
@@ -755,6 +843,15 @@ class GeometryService(abstract.BaseAGSServer):
         allowedCalcTypes = ['planar', 'geodesic', 'preserveShape']
         if calculationType not in allowedCalcTypes:
             raise AttributeError("Invalid calculation Type")
+        if self.__local_geometries(polylines):
+            factor = self.__local_factor(sr, lengthUnit,
+                                         _geometry._LINEAR_UNITS,
+                                         calculationType)
+            if factor is not None:
+                return {
+                    "lengths" : (_geometry.lengths(
+                        polylines, calculationType == "geodesic") * factor).tolist()
+                }
         url = f"{self._url}/lengths"
         params = {
             "f" : "json",
@@ -824,7 +921,8 @@ class GeometryService(abstract.BaseAGSServer):
                 inSR,
                 outSR,
                 transformation="",
-                transformFoward=False):
+                transformFoward=False,
+                local_projection=True):
         """
         The project operation is performed on a geometry service resource. This 
         operation projects an array of input geometries from the input spatial 
@@ -839,7 +937,19 @@ class GeometryService(abstract.BaseAGSServer):
                              transformation (also known as datum transformation) 
                              to be applied to the projected geometries.
             transformForward - indicating whether or not to transform forward.
+            local_projection - if True (default), geometries are projected
+                               on the client when both spatial references
+                               are supported by common.projection and no
+                               transformation is given.
         """
+        if local_projection and not transformation and \
+           self.__local_geometries(geometries) and \
+           _projection.supported(inSR, outSR):
+            return {
+                "geometries" : [
+                    g if isinstance(g, dict) else g.asDictionary
+                    for g in _projection.project(geometries, inSR, outSR)]
+            }
         url = f"{self._url}/project"
         params = {
             "f" : "json",
@@ -1,4 +1,4 @@
-import json
+from ..web import _json as json
 from .._abstract.abstract import BaseAGOLClass, BaseSecurityHandler
 from ..security import security
 import collections
@@ -1,6 +1,6 @@
 from __future__ import absolute_import
 from __future__ import print_function
-import json
+from ..web import _json as json
 from .._abstract.abstract import BaseAGSServer
 
 ########################################################################
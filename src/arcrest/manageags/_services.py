@@ -4,7 +4,7 @@ from .._abstract.abstract import BaseAGSServer
 from ..packages.six.moves.urllib_parse import urlparse
 from .parameters import Extension
 import os
-import json
+from ..web import _json as json
 import tempfile
 import xml.etree.ElementTree as ET
 ########################################################################
@@ -2,7 +2,7 @@ from __future__ import absolute_import
 from __future__ import print_function
 from ..packages import six
 from .._abstract.abstract import BaseAGSServer
-import json
+from ..web import _json as json
 ########################################################################
 class UsageReports(BaseAGSServer):
     """
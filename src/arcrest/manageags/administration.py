@@ -12,7 +12,7 @@ from ..security import OAuthSecurityHandler, NTLMSecurityHandler, PKISecurityHan
     ArcGISTokenSecurityHandler,AGOLTokenSecurityHandler, \
     LDAPSecurityHandler, AGSTokenSecurityHandler
 import csv
-import json
+from ..web import _json as json
 from . import _machines, _clusters
 from . import _data, _info
 from . import _kml, _logs
@@ -1,4 +1,4 @@
-import json
+from ..web import _json as json
 
 ########################################################################
 class Extension(object):
@@ -6,7 +6,7 @@ from .._abstract.abstract import BaseAGOLClass
 from datetime import datetime, timedelta
 from ..common.general import local_time_to_online
 
-import json
+from ..web import _json as json
 import os
 ########################################################################
 class Community(BaseAGOLClass):
@@ -98,6 +98,40 @@ class Community(BaseAGOLClass):
                        created.
            sortOrder - Order of result values returned.  Values: asc or desc
         """
+        params = self._search_params(q=q, t=t, start=start, num=num,
+                                     sortField=sortField,
+                                     sortOrder=sortOrder)
+        url = f"{self._url}/groups"
+        return self._post(url=url,
+                             param_dict=params,
+                             securityHandler=self._securityHandler,
+                             proxy_url=self._proxy_url,
+                             proxy_port=self._proxy_port)
+    #----------------------------------------------------------------------
+    async def search_async(self,
+                           q,
+                           t=None,
+                           start=1,
+                           num=10,
+                           sortField="title",
+                           sortOrder="asc"):
+        """
+        asynchronous version of search for use in coroutines, the inputs
+        and output are the same as search.
+        """
+        params = self._search_params(q=q, t=t, start=start, num=num,
+                                     sortField=sortField,
+                                     sortOrder=sortOrder)
+        url = f"{self._url}/groups"
+        return await self._apost(url=url,
+                                 param_dict=params,
+                                 securityHandler=self._securityHandler,
+                                 proxy_url=self._proxy_url,
+                                 proxy_port=self._proxy_port)
+    #----------------------------------------------------------------------
+    def _search_params(self, q, t=None, start=1, num=10,
+                       sortField="title", sortOrder="asc"):
+        """builds the parameters of a group search"""
         params = {
             "f" : "json",
             "q" : q,
@@ -110,12 +144,7 @@ class Community(BaseAGOLClass):
             params['sortField'] = sortField
         if sortOrder is not None:
             params['sortOrder'] = sortOrder
-        url = f"{self._url}/groups"
-        return self._post(url=url,
-                             param_dict=params,
-                             securityHandler=self._securityHandler,
-                             proxy_url=self._proxy_url,
-                             proxy_port=self._proxy_port)
+        return params
     #----------------------------------------------------------------------
     def getGroupIDs(self, groupNames,communityInfo=None):
         """
@@ -6,7 +6,7 @@ from ..security import OAuthSecurityHandler, AGOLTokenSecurityHandler, PortalTok
 from .._abstract.abstract import BaseAGOLClass
 from ._parameters import ItemParameter, BaseParameters, AnalyzeParameters, PublishCSVParameters
 from ._community import Group as CommunityGroup
-import json
+from ..web import _json as json
 import os
 import mmap
 import tempfile
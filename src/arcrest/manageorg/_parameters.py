@@ -3,7 +3,7 @@ from __future__ import print_function
 from .._abstract.abstract import BaseParameters
 from ..common.geometry import SpatialReference, Envelope
 import os
-import json
+from ..web import _json as json
 ########################################################################
 class InvitationList(object):
     """Used for Inviting users to a site"""
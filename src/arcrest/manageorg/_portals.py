@@ -9,7 +9,7 @@ from .._abstract.abstract import BaseAGOLClass
 import os
 from ..packages.six.moves import urllib_parse as urlparse
 from . import _parameters as parameters
-import json
+from ..web import _json as json
 ########################################################################
 class Portals(BaseAGOLClass):
     """
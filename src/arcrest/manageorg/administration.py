@@ -5,7 +5,7 @@ from __future__ import absolute_import
 from __future__ import print_function
 from ..security import PortalServerSecurityHandler
 from .._abstract.abstract import BaseAGOLClass
-import json
+from ..web import _json as json
 from . import _community, _content, _portals, _oauth2
 from ..hostedservice import Services
 from ..manageags import AGSAdministration
@@ -8,7 +8,7 @@ are hierarchical and have unique universal resource locators (URLs).
 """
 from __future__ import absolute_import
 from __future__ import print_function
-import json
+from ..web import _json as json
 import tempfile
 from datetime import datetime
 from .._abstract.abstract import BaseAGOLClass
@@ -10,7 +10,7 @@ import io
 import os
 import re
 import sys
-import json
+from ..web import _json as json
 import uuid
 import zlib
 import shutil
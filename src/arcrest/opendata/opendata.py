@@ -3,7 +3,7 @@
 """
 from __future__ import absolute_import
 from __future__ import print_function
-import json
+from ..web import _json as json
 from ._base import BaseOpenData
 from ..web._base import BaseWebOperations
 ########################################################################
@@ -3,4 +3,12 @@
 """
 from __future__ import absolute_import
 from . import _base
+from ._pool import ConnectionPool, default_pool
+from ._streaming import FeatureStream
+from ._cache import ResponseCache, default_cache
+from ._async import AsyncTransport, get_transport
+from ._singleflight import SingleFlight, default_flight
+from ._ratelimit import RateLimiter, default_limiter
+from ._retry import RetryPolicy, default_retry
+from . import _json
 __version__ = "3.5.9"
\ No newline at end of file
@@ -0,0 +1,421 @@
+"""
+   asyncio transport for the ArcREST web operations.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import io
+import time
+import zlib
+import socket
+import asyncio
+import weakref
+from email.parser import Parser
+
+from ..packages.six.moves import http_client
+from ..packages.six.moves.urllib.error import URLError, HTTPError
+from ..packages.six.moves.urllib_parse import urlsplit, urljoin
+from ._retry import default_retry
+
+_READ_SIZE = 65536
+_transports = weakref.WeakKeyDictionary()
+########################################################################
+class AsyncResponse(object):
+    """
+    response of an AsyncTransport request.  The body must be consumed with
+    read() or chunks() so the connection can be reused.  Every read of
+    the body waits at most timeout seconds for the server, like the
+    socket timeout of urllib.
+    """
+    status = None
+    reason = None
+    headers = None
+    url = None
+    #----------------------------------------------------------------------
+    def __init__(self, status, reason, headers, url, reader,
+                 length, chunked, release, timeout=None):
+        """Constructor"""
+        self._timeout = timeout
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.url = url
+        self._reader = reader
+        self._length = length
+        self._chunked = chunked
+        self._release = release
+        if length == 0 and not chunked:
+            self._finish(True)
+    #----------------------------------------------------------------------
+    @property
+    def code(self):
+        """returns the HTTP status code"""
+        return self.status
+    #----------------------------------------------------------------------
+    def getcode(self):
+        """returns the HTTP status code"""
+        return self.status
+    #----------------------------------------------------------------------
+    def geturl(self):
+        """returns the url of the response"""
+        return self.url
+    #----------------------------------------------------------------------
+    def info(self):
+        """returns the headers"""
+        return self.headers
+    #----------------------------------------------------------------------
+    def _finish(self, reusable):
+        """releases the connection once"""
+        release, self._release = self._release, None
+        if release is not None:
+            release(reusable)
+    #----------------------------------------------------------------------
+    def close(self):
+        """closes the connection without reading the rest of the body"""
+        self._finish(False)
+    #----------------------------------------------------------------------
+    async def _wait(self, read):
+        """awaits one read of the body within the timeout"""
+        if self._timeout is None:
+            return await read
+        try:
+            return await asyncio.wait_for(read, self._timeout)
+        except asyncio.TimeoutError as err:
+            raise URLError(socket.timeout("timed out")) from err
+    #----------------------------------------------------------------------
+    async def _raw_chunks(self):
+        """yields the body as sent by the server"""
+        reader = self._reader
+        if self._release is None:
+            return
+        if self._chunked:
+            while True:
+                line = await self._wait(reader.readline())
+                if not line:
+                    raise asyncio.IncompleteReadError(b'', None)
+                size = int(line.split(b';', 1)[0].strip(), 16)
+                if size == 0:
+                    while True:
+                        line = await self._wait(reader.readline())
+                        if line in (b'\r\n', b'\n', b''):
+                            break
+                    break
+                while size > 0:
+                    data = await self._wait(
+                        reader.read(min(size, _READ_SIZE)))
+                    if not data:
+                        raise asyncio.IncompleteReadError(b'', size)
+                    size -= len(data)
+                    yield data
+                await self._wait(reader.readexactly(2))
+            reusable = True
+        elif self._length is not None:
+            remaining = self._length
+            while remaining > 0:
+                data = await self._wait(
+                    reader.read(min(remaining, _READ_SIZE)))
+                if not data:
+                    raise asyncio.IncompleteReadError(b'', remaining)
+                remaining -= len(data)
+                yield data
+            reusable = True
+        else:
+            while True:
+                data = await self._wait(reader.read(_READ_SIZE))
+                if not data:
+                    break
+                yield data
+            reusable = False
+        self._finish(reusable)
+    #----------------------------------------------------------------------
+    async def chunks(self):
+        """yields the decompressed body in pieces"""
+        encoding = (self.headers.get('content-encoding') or '').lower()
+        decoder = None
+        if encoding == 'gzip':
+            decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            decoder = zlib.decompressobj()
+        try:
+            async for data in self._raw_chunks():
+                if decoder is not None:
+                    data = decoder.decompress(data)
+                if data:
+                    yield data
+            if decoder is not None:
+                data = decoder.flush()
+                if data:
+                    yield data
+        except BaseException:
+            self._finish(False)
+            raise
+    #----------------------------------------------------------------------
+    async def read(self):
+        """reads the whole body into a bytearray"""
+        buf = bytearray()
+        async for data in self.chunks():
+            buf += data
+        return buf
+########################################################################
+class AsyncTransport(object):
+    """
+    HTTP/1.1 client built on asyncio streams.  Connections are kept alive
+    per host and the number of concurrent connections to one host is
+    limited, so a single event loop can drive many REST calls at once.
+    A transport belongs to one event loop, use get_transport() to obtain
+    the transport of the running loop.
+
+    Inputs:
+       limit_per_host - maximum concurrent connections per host
+       idle_timeout - seconds an idle connection may be kept
+    """
+    _limit_per_host = None
+    _idle_timeout = None
+    #----------------------------------------------------------------------
+    def __init__(self, limit_per_host=10, idle_timeout=60):
+        """Constructor"""
+        self._limit_per_host = limit_per_host
+        self._idle_timeout = idle_timeout
+        self._idle = {}
+        self._semaphores = {}
+    #----------------------------------------------------------------------
+    @property
+    def limit_per_host(self):
+        """gets the maximum concurrent connections per host"""
+        return self._limit_per_host
+    #----------------------------------------------------------------------
+    def _semaphore(self, key):
+        """returns the semaphore limiting the connections to a host"""
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(self._limit_per_host)
+        return self._semaphores[key]
+    #----------------------------------------------------------------------
+    async def _connect(self, key, host, port, ssl_context, timeout):
+        """returns (reader, writer, reused) for the host"""
+        idle = self._idle.get(key, [])
+        now = time.time()
+        while idle:
+            reader, writer, last_used = idle.pop()
+            if now - last_used <= self._idle_timeout and \
+               not reader.at_eof() and not writer.is_closing():
+                return reader, writer, True
+            writer.close()
+        connect = asyncio.open_connection(
+            host, port, ssl=ssl_context,
+            server_hostname=host if ssl_context is not None else None)
+        try:
+            reader, writer = await asyncio.wait_for(connect, timeout)
+        except (OSError, asyncio.TimeoutError) as err:
+            raise URLError(err)
+        return reader, writer, False
+    #----------------------------------------------------------------------
+    def _put_back(self, key, reader, writer):
+        """keeps a connection for reuse"""
+        idle = self._idle.setdefault(key, [])
+        if len(idle) < self._limit_per_host and not writer.is_closing():
+            idle.append((reader, writer, time.time()))
+        else:
+            writer.close()
+    #----------------------------------------------------------------------
+    async def _write_body(self, writer, data):
+        """writes bytes or a file-like body in blocks"""
+        if data is None:
+            return
+        if isinstance(data, (bytes, bytearray)):
+            writer.write(data)
+        else:
+            while True:
+                block = data.read(_READ_SIZE)
+                if not block:
+                    break
+                writer.write(block)
+                await writer.drain()
+        await writer.drain()
+    #----------------------------------------------------------------------
+    def _rewind(self, data):
+        """rewinds a request body to send it again, False if impossible"""
+        if data is None or isinstance(data, (bytes, bytearray)):
+            return True
+        if hasattr(data, 'seek'):
+            data.seek(0)
+            return True
+        return False
+    #----------------------------------------------------------------------
+    async def _read_head(self, reader):
+        """reads the status line and headers"""
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError as err:
+                if err.partial:
+                    raise http_client.IncompleteRead(err.partial) from err
+                raise http_client.RemoteDisconnected(
+                    "Remote end closed connection without response") from err
+            status_line, _, header_text = head.decode('iso-8859-1').partition("\r\n")
+            parts = status_line.split(None, 2)
+            if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+                raise http_client.BadStatusLine(status_line)
+            version = parts[0]
+            status = int(parts[1])
+            reason = parts[2] if len(parts) > 2 else ""
+            headers = Parser(_class=http_client.HTTPMessage).parsestr(header_text)
+            if status != 100:
+                return version, status, reason, headers
+    #----------------------------------------------------------------------
+    async def _send(self, method, url, headers, data, ssl_context, timeout,
+                    idempotent):
+        """
+        sends one request and returns the AsyncResponse.  A reused
+        connection that fails while the request is written is replaced and
+        the request written again.  Once written, the request is only sent
+        again if it is idempotent and the server closed the connection
+        without answering, never after a timeout.
+        """
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https") or not parts.hostname:
+            raise URLError("unsupported url: %s" % url)
+        host = parts.hostname
+        port = parts.port or (443 if scheme == "https" else 80)
+        if scheme != "https":
+            ssl_context = None
+        selector = parts.path or "/"
+        if parts.query:
+            selector += "?" + parts.query
+        hostheader = host if parts.port is None else "%s:%s" % (host, port)
+        send_headers = {"Host" : hostheader}
+        for k, v in headers.items():
+            send_headers[k.title()] = v
+        if data is not None and "Content-Length" not in send_headers:
+            send_headers["Content-Length"] = str(len(data))
+        elif data is None and method in ("POST", "PUT"):
+            send_headers["Content-Length"] = "0"
+        head = "%s %s HTTP/1.1\r\n" % (method, selector)
+        head += "".join("%s: %s\r\n" % (k, v) for k, v in send_headers.items())
+        head = (head + "\r\n").encode('iso-8859-1')
+
+        key = (scheme, host, port, id(ssl_context))
+        semaphore = self._semaphore(key)
+        await semaphore.acquire()
+        try:
+            reader, writer, reused = await self._connect(key, host, port,
+                                                         ssl_context, timeout)
+            while True:
+                try:
+                    writer.write(head)
+                    await self._write_body(writer, data)
+                except OSError as err:
+                    writer.close()
+                    if reused and self._rewind(data):
+                        # the server dropped the idle connection
+                        reader, writer, reused = await self._connect(
+                            key, host, port, ssl_context, timeout)
+                        continue
+                    raise URLError(err)
+                try:
+                    version, status, reason, resp_headers = \
+                        await asyncio.wait_for(self._read_head(reader), timeout)
+                except asyncio.TimeoutError as err:
+                    # the server may still be processing the request
+                    writer.close()
+                    raise URLError(socket.timeout("timed out")) from err
+                except (OSError, http_client.HTTPException) as err:
+                    writer.close()
+                    if reused and idempotent and \
+                       isinstance(err, (http_client.RemoteDisconnected,
+                                        ConnectionResetError)) and \
+                       self._rewind(data):
+                        reader, writer, reused = await self._connect(
+                            key, host, port, ssl_context, timeout)
+                        continue
+                    raise URLError(err)
+                break
+        except BaseException:
+            semaphore.release()
+            raise
+        keep_alive = version == "HTTP/1.1" and \
+            (resp_headers.get("connection") or "").lower() != "close"
+        def release(reusable):
+            semaphore.release()
+            if reusable and keep_alive:
+                self._put_back(key, reader, writer)
+            else:
+                writer.close()
+        chunked = (resp_headers.get("transfer-encoding") or "").lower() == "chunked"
+        length = None
+        if method == "HEAD" or status in (204, 304):
+            length = 0
+        elif not chunked and resp_headers.get("content-length"):
+            try:
+                length = int(resp_headers.get("content-length"))
+            except ValueError:
+                length = None
+        return AsyncResponse(status=status, reason=reason,
+                             headers=resp_headers, url=url, reader=reader,
+                             length=length, chunked=chunked,
+                             release=release, timeout=timeout)
+    #----------------------------------------------------------------------
+    async def request(self, method, url, headers=None, data=None,
+                      ssl_context=None, timeout=None, max_redirects=10,
+                      idempotent=None):
+        """
+        performs a request, follows redirects and raises HTTPError for
+        error status codes like urllib does.
+        Inputs:
+           method - GET or POST
+           url - full url including the query string
+           headers - dictionary of request headers
+           data - bytes or a file-like object with the body
+           ssl_context - SSL context for https urls
+           timeout - seconds to wait for the connection, the response
+              head and every read of the body
+           max_redirects - maximum number of redirects to follow
+           idempotent - if True the request may be sent again when a
+              reused connection is closed before the answer, None lets
+              the default retry policy decide from the method and url
+        Output:
+           AsyncResponse
+        """
+        if headers is None:
+            headers = {}
+        if idempotent is None:
+            idempotent = default_retry.is_idempotent(method, url)
+        for _ in range(max_redirects + 1):
+            resp = await self._send(method, url, headers, data,
+                                    ssl_context, timeout, idempotent)
+            location = resp.headers.get("location")
+            if resp.status in (301, 302, 303, 307, 308) and location:
+                await resp.read()
+                url = urljoin(url, location)
+                if resp.status in (301, 302, 303) and method == "POST":
+                    method = "GET"
+                    data = None
+                    headers = dict((k, v) for k, v in headers.items()
+                                   if k.lower() not in ("content-length",
+                                                        "content-type"))
+                elif hasattr(data, 'seek'):
+                    data.seek(0)
+                continue
+            if resp.status >= 400:
+                body = await resp.read()
+                raise HTTPError(url, resp.status, resp.reason, resp.headers,
+                                io.BytesIO(bytes(body)))
+            return resp
+        raise HTTPError(url, resp.status, "too many redirects",
+                        resp.headers, None)
+    #----------------------------------------------------------------------
+    def close(self):
+        """closes all idle connections"""
+        idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for _, writer, _ in conns:
+                writer.close()
+#----------------------------------------------------------------------
+def get_transport(loop=None):
+    """returns the AsyncTransport of the running (or given) event loop"""
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    transport = _transports.get(loop)
+    if transport is None:
+        transport = AsyncTransport()
+        _transports[loop] = transport
+    return transport
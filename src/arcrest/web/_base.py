@@ -9,16 +9,20 @@ import os
 import re
 import ssl
 import sys
-import json
+from . import _json as json
 import uuid
+import gzip
 import zlib
-from inspect import getargspec
+import time
 import shutil
+import asyncio
+import functools
+import threading
 import tempfile
+import collections
 import mimetypes
 import email.generator
 
-from io import BytesIO
 try:
     from cStringIO import StringIO
 except ImportError:
@@ -26,10 +30,44 @@ except ImportError:
 
 from ..packages.six.moves.urllib import request
 from ..packages.six.moves import http_cookiejar as cookiejar
-from ..packages.six.moves.urllib_parse import urlencode
+from ..packages.six.moves.urllib_parse import urlencode, urlsplit
+from ..packages.six.moves.urllib.error import HTTPError
+from ._pool import ConnectionPool, default_pool
+from ._pool import KeepAliveHTTPHandler, KeepAliveHTTPSHandler, rewind_body
+from ._streaming import FeatureStream
+from ._cache import ResponseCache, default_cache
+from ._async import get_transport
+from ._singleflight import SingleFlight, default_flight
+from ._ratelimit import RateLimiter, default_limiter
+from ._retry import RetryPolicy, default_retry
 
 ########################################################################
 __version__ = "3.5.9"
+_OPENER_CACHE_SIZE = 64
+_openers = collections.OrderedDict()
+_openers_lock = threading.Lock()
+# anonymous calls share one jar, and so one opener per proxy and handlers
+_anonymous_cookies = cookiejar.CookieJar()
+_ssl_contexts = {}
+_state_lock = threading.Lock()
+_body_encoding_support = {}
+_REJECTED_ENCODING_CODES = (411, 415, 501)
+_LOST_PARAMETER_MESSAGES = ('unable to parse', 'missing parameter',
+                            'parameter is missing', 'parameter missing',
+                            'required parameter')
+ResponseInfo = collections.namedtuple('ResponseInfo',
+                                      ['method', 'code', 'url', 'headers'])
+########################################################################
+def _ssl_context(verify):
+    """returns the shared SSL context for the verify setting"""
+    verify = bool(verify)
+    if verify not in _ssl_contexts:
+        ctx = ssl.create_default_context()
+        if not verify:
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+        _ssl_contexts.setdefault(verify, ctx)
+    return _ssl_contexts[verify]
 ########################################################################
 
 class BaseOperation(object):
@@ -81,18 +119,11 @@ class MultiPartForm(object):
         self.boundary = None
         self.files = []
         self.form_data = ""
-        if len(self.form_fields) > 0:
-            self.form_fields = []
-
-        if len(param_dict) == 0:
-            self.form_fields = []
-        else:
-            for k,v in param_dict.items():
-                self.form_fields.append((k,v))
-                del k,v
-        if len(files) == 0:
-            self.files = []
-        else:
+        self.form_fields = []
+        for k,v in param_dict.items():
+            self.form_fields.append((k,v))
+            del k,v
+        if len(files) > 0:
             for key,v in files.items():
                 if isinstance(v, list):
                     fileName = os.path.basename(v[1])
@@ -163,59 +194,183 @@ class MultiPartForm(object):
     #----------------------------------------------------------------------
     def _3(self):
         """ python 3 method"""
+        body = self.body
+        self.form_data = body.read()
+        body.close()
+    #----------------------------------------------------------------------
+    def _parts(self):
+        """
+        returns the body as a list of encoded strings and (path, size)
+        tuples for the files, which are only read when the body is sent
+        """
         boundary = self.boundary
-        buf = BytesIO()
-        textwriter = io.TextIOWrapper(
-            buf, 'utf8', newline='', write_through=True)
-
+        parts = []
         for (key, value) in self.form_fields:
-            textwriter.write(
-                '--{boundary}\r\n'
-                'Content-Disposition: form-data; name="{key}"\r\n\r\n'
-                '{value}\r\n'.format(
-                    boundary=boundary, key=key, value=value))
+            parts.append(
+                ('--{boundary}\r\n'
+                 'Content-Disposition: form-data; name="{key}"\r\n\r\n'
+                 '{value}\r\n'.format(
+                     boundary=boundary, key=key, value=value)).encode('utf8'))
         for(key, filename, mimetype, filepath) in self.files:
             if os.path.isfile(filepath):
-                textwriter.write(
-                    '--{boundary}\r\n'
-                    'Content-Disposition: form-data; name="{key}"; '
-                    'filename="{filename}"\r\n'
-                    'Content-Type: {content_type}\r\n\r\n'.format(
-                        boundary=boundary, key=key, filename=filename,
-                        content_type=mimetype))
-                with open(filepath, "rb") as f:
-                    shutil.copyfileobj(f, buf)
-                textwriter.write('\r\n')
-        textwriter.write(f'--{boundary}--\r\n\r\n')
-        self.form_data = buf.getvalue()
+                parts.append(
+                    ('--{boundary}\r\n'
+                     'Content-Disposition: form-data; name="{key}"; '
+                     'filename="{filename}"\r\n'
+                     'Content-Type: {content_type}\r\n\r\n'.format(
+                         boundary=boundary, key=key, filename=filename,
+                         content_type=mimetype)).encode('utf8'))
+                parts.append((filepath, os.path.getsize(filepath)))
+                parts.append(b'\r\n')
+        parts.append(f'--{boundary}--\r\n\r\n'.encode('utf8'))
+        return parts
+    #----------------------------------------------------------------------
+    @property
+    def content_length(self):
+        """returns the size of the body in bytes without reading the files"""
+        return sum(part[1] if isinstance(part, tuple) else len(part)
+                   for part in self._parts())
+    #----------------------------------------------------------------------
+    @property
+    def body(self):
+        """
+        returns a file-like object that reads the body lazily, so uploads
+        of any size are sent with constant memory
+        """
+        return MultiPartStream(self._parts())
+########################################################################
+class MultiPartStream(object):
+    """
+    File-like, read only view of a multipart/form-data body.  Fields are
+    kept encoded in memory, files are read from disk in blocks as the body
+    is sent.
+
+    Inputs:
+       parts - list of byte strings and (path, size) tuples
+    """
+    #----------------------------------------------------------------------
+    def __init__(self, parts):
+        """Constructor"""
+        self._parts = parts
+        self._file = None
+        self.seek(0)
+    #----------------------------------------------------------------------
+    def __len__(self):
+        """returns the length of the body"""
+        return sum(part[1] if isinstance(part, tuple) else len(part)
+                   for part in self._parts)
+    #----------------------------------------------------------------------
+    def seek(self, offset, whence=0):
+        """rewinds the stream, only seeking to the start is supported"""
+        if offset != 0 or whence != 0:
+            raise io.UnsupportedOperation("can only seek to the start")
+        self.close()
+        self._index = 0
+        self._offset = 0
+        self._position = 0
+        return 0
+    #----------------------------------------------------------------------
+    def tell(self):
+        """returns the current position in the body"""
+        return self._position
+    #----------------------------------------------------------------------
+    def read(self, size=-1):
+        """reads up to size bytes, or the rest of the body"""
+        if size is None or size < 0:
+            size = len(self) - self._position
+        blocks = []
+        while size > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, tuple):
+                if self._file is None:
+                    self._file = open(part[0], 'rb')
+                block = self._file.read(size)
+                if not block:
+                    self._file.close()
+                    self._file = None
+                    self._index += 1
+                    continue
+            else:
+                block = part[self._offset:self._offset + size]
+                self._offset += len(block)
+                if self._offset >= len(part):
+                    self._index += 1
+                    self._offset = 0
+            blocks.append(block)
+            size -= len(block)
+            self._position += len(block)
+        return b"".join(blocks)
+    #----------------------------------------------------------------------
+    def close(self):
+        """closes any open file"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 ########################################################################
 class BaseWebOperations(BaseOperation):
     """performs the get/post operations"""
     PY3 = sys.version_info[0] == 3
     PY2 = sys.version_info[0] == 2
     _referer_url = None
-    _last_url = None
-    _last_code = None
-    _last_method = None
     _useragent = "Mozilla/5.0 (Windows NT 6.3; rv:36.0) Gecko/20100101 Firefox/36.0"
     _verify = False
+    _connection_pool = None
+    _response_cache = None
+    _single_flight = None
+    _rate_limiter = None
+    _retry_policy = None
+    _request_compression = None
+    _request_compression_threshold = 65536
+    _timeout = 300
     def __init__(self, verify=False):
         self._verify = verify
     #----------------------------------------------------------------------
+    def _thread_state(self):
+        """
+        returns the per thread storage of this object.  Response metadata
+        is kept here so one object can be shared by many worker threads.
+        """
+        state = self.__dict__.get('_thread_local')
+        if state is None:
+            with _state_lock:
+                state = self.__dict__.setdefault('_thread_local',
+                                                 threading.local())
+        return state
+    #----------------------------------------------------------------------
+    def _set_last_response(self, method, resp):
+        """stores the response metadata of the current thread's call"""
+        info = ResponseInfo(method=method,
+                            code=resp.getcode(),
+                            url=resp.geturl(),
+                            headers=resp.headers)
+        self._thread_state().response = info
+        return info
+    #----------------------------------------------------------------------
+    @property
+    def last_response(self):
+        """
+        gets the ResponseInfo (method, code, url, headers) of the last web
+        operation made by the calling thread
+        """
+        return getattr(self._thread_state(), 'response', None)
+    #----------------------------------------------------------------------
     @property
     def last_method(self):
         """gets the last method used (either POST or GET)"""
-        return self._last_method
+        info = self.last_response
+        return info.method if info is not None else None
     #----------------------------------------------------------------------
     @property
     def last_code(self):
         """gets the last code from the last web operation"""
-        return self._last_code
+        info = self.last_response
+        return info.code if info is not None else None
     #----------------------------------------------------------------------
     @property
     def last_url(self):
         """gets the last web url called"""
-        return self._last_url
+        info = self.last_response
+        return info.url if info is not None else None
     #----------------------------------------------------------------------
     @property
     def referer_url(self):
@@ -241,6 +396,308 @@ class BaseWebOperations(BaseOperation):
         elif self._useragent != value:
             self._useragent = value
     #----------------------------------------------------------------------
+    @property
+    def connection_pool(self):
+        """
+        gets/sets the ConnectionPool used to keep connections alive between
+        web operations.  All objects share arcrest.web.default_pool unless
+        a pool is set.
+        """
+        if self._connection_pool is None:
+            return default_pool
+        return self._connection_pool
+    #----------------------------------------------------------------------
+    @connection_pool.setter
+    def connection_pool(self, value):
+        """gets/sets the connection pool"""
+        if value is None or isinstance(value, ConnectionPool):
+            self._connection_pool = value
+    #----------------------------------------------------------------------
+    @property
+    def response_cache(self):
+        """
+        gets/sets the ResponseCache used for conditional GET requests.  All
+        objects share arcrest.web.default_cache unless a cache is set.
+        """
+        if self._response_cache is None:
+            return default_cache
+        return self._response_cache
+    #----------------------------------------------------------------------
+    @response_cache.setter
+    def response_cache(self, value):
+        """gets/sets the response cache"""
+        if value is None or isinstance(value, ResponseCache):
+            self._response_cache = value
+    #----------------------------------------------------------------------
+    @property
+    def single_flight(self):
+        """
+        gets/sets the SingleFlight used to coalesce identical GET requests
+        running at the same time.  All objects share
+        arcrest.web.default_flight unless one is set.
+        """
+        if self._single_flight is None:
+            return default_flight
+        return self._single_flight
+    #----------------------------------------------------------------------
+    @single_flight.setter
+    def single_flight(self, value):
+        """gets/sets the single flight"""
+        if value is None or isinstance(value, SingleFlight):
+            self._single_flight = value
+    #----------------------------------------------------------------------
+    @property
+    def rate_limiter(self):
+        """
+        gets/sets the RateLimiter pacing the requests sent to each host.
+        All objects share arcrest.web.default_limiter unless one is set.
+        """
+        if self._rate_limiter is None:
+            return default_limiter
+        return self._rate_limiter
+    #----------------------------------------------------------------------
+    @rate_limiter.setter
+    def rate_limiter(self, value):
+        """gets/sets the rate limiter"""
+        if value is None or isinstance(value, RateLimiter):
+            self._rate_limiter = value
+    #----------------------------------------------------------------------
+    @property
+    def retry_policy(self):
+        """
+        gets/sets the RetryPolicy used for transient failures.  All objects
+        share arcrest.web.default_retry unless one is set.
+        """
+        if self._retry_policy is None:
+            return default_retry
+        return self._retry_policy
+    #----------------------------------------------------------------------
+    @retry_policy.setter
+    def retry_policy(self, value):
+        """gets/sets the retry policy"""
+        if value is None or isinstance(value, RetryPolicy):
+            self._retry_policy = value
+    #----------------------------------------------------------------------
+    @property
+    def timeout(self):
+        """
+        gets/sets the seconds to wait for a connection or for data from
+        the server, None waits forever
+        """
+        return self._timeout
+    #----------------------------------------------------------------------
+    @timeout.setter
+    def timeout(self, value):
+        """gets/sets the seconds to wait for the server"""
+        if value is None or (isinstance(value, (int, float)) and value > 0):
+            self._timeout = value
+    #----------------------------------------------------------------------
+    def _open(self, opener, req, idempotent=False):
+        """
+        opens a request, idempotent requests that fail with a transient
+        error are sent again as the retry policy allows
+        """
+        policy = self.retry_policy
+        # read by the connection pool before it resends a request whose
+        # keep-alive connection dropped
+        req.idempotent = idempotent
+        attempt = 1
+        while True:
+            try:
+                return self._open_once(opener, req)
+            except Exception as e:
+                if not idempotent or \
+                   attempt >= policy.max_attempts or \
+                   not policy.retryable(e) or \
+                   not rewind_body(req.data):
+                    raise
+                if isinstance(e, HTTPError):
+                    e.close()
+                time.sleep(policy.delay(attempt, e))
+                attempt += 1
+    #----------------------------------------------------------------------
+    def _open_once(self, opener, req):
+        """
+        opens a request through the rate limiter of the request's host.
+        The request counts as in flight until the response headers arrive.
+        """
+        limiter = self.rate_limiter
+        host = req.host
+        started = limiter.acquire(host)
+        try:
+            resp = opener.open(req, timeout=self._timeout)
+        except HTTPError as e:
+            limiter.release(host, started, code=e.code,
+                            retry_after=e.headers.get('Retry-After') \
+                            if e.headers is not None else None)
+            raise
+        except:
+            limiter.release(host, started)
+            raise
+        limiter.release(host, started, code=resp.getcode(),
+                        retry_after=resp.headers.get('Retry-After'))
+        return resp
+    #----------------------------------------------------------------------
+    @property
+    def request_compression(self):
+        """
+        gets/sets the Content-Encoding used to compress large urlencoded
+        POST bodies: None (default), 'gzip' or 'deflate'.  Hosts that
+        reject compressed bodies are remembered and sent plain bodies, the
+        rejected request is sent again only when it is idempotent.
+        """
+        return self._request_compression
+    #----------------------------------------------------------------------
+    @request_compression.setter
+    def request_compression(self, value):
+        """gets/sets the request body compression"""
+        if value is None or str(value).lower() in ('gzip', 'deflate'):
+            self._request_compression = value.lower() if value else None
+    #----------------------------------------------------------------------
+    @property
+    def request_compression_threshold(self):
+        """gets/sets the body size in bytes from which bodies are compressed"""
+        return self._request_compression_threshold
+    #----------------------------------------------------------------------
+    @request_compression_threshold.setter
+    def request_compression_threshold(self, value):
+        """gets/sets the body size in bytes from which bodies are compressed"""
+        if isinstance(value, int) and value >= 0:
+            self._request_compression_threshold = value
+    #----------------------------------------------------------------------
+    def _encode_body(self, url, data):
+        """
+        compresses a POST body when request compression is on, the body is
+        large enough and the host has not rejected compressed bodies.
+        Output:
+           (data, encoding) where encoding is None for a plain body
+        """
+        encoding = self._request_compression
+        if encoding is None or \
+           len(data) < self._request_compression_threshold or \
+           _body_encoding_support.get(urlsplit(url).netloc) is False:
+            return data, None
+        if encoding == 'gzip':
+            return gzip.compress(data, compresslevel=6), encoding
+        return zlib.compress(data, 6), encoding
+    #----------------------------------------------------------------------
+    def _body_encoding_rejected(self, url, encoding, code=None, result=None,
+                                content_type=None, param_dict=None):
+        """
+        records how a host answered a compressed body, returns True when
+        the answer shows that the server could not read it.  Other errors,
+        such as the validation errors of an edit, say nothing about the
+        encoding and leave the host's support unknown.
+        Inputs:
+           code - HTTP status code of an error response
+           result - decoded body of a successful response
+           content_type - Content-Type of the error response
+           param_dict - the parameters that were sent
+        """
+        if encoding is None:
+            return False
+        host = urlsplit(url).netloc
+        if code is not None:
+            if code in _REJECTED_ENCODING_CODES or \
+               (code == 400 and 'html' in str(content_type or '').lower()):
+                _body_encoding_support[host] = False
+                return True
+            return False
+        if _body_encoding_support.get(host) is not None:
+            return False
+        # a server ignoring Content-Encoding reads no parameters: it answers
+        # an HTML page for the missing f, or that a parameter or the token
+        # is missing
+        if isinstance(result, dict):
+            if 'error' not in result:
+                _body_encoding_support[host] = True
+            elif self._parameters_lost(result['error'], param_dict):
+                _body_encoding_support[host] = False
+                return True
+        elif isinstance(result, str):
+            _body_encoding_support[host] = False
+            return True
+        elif isinstance(result, bytes):
+            _body_encoding_support[host] = True
+        return False
+    #----------------------------------------------------------------------
+    def _parameters_lost(self, error, param_dict=None):
+        """
+        returns True when a JSON error says the server did not receive the
+        parameters of the request
+        """
+        if not isinstance(error, dict):
+            return False
+        if error.get('code') == 499 and param_dict and 'token' in param_dict:
+            return True
+        text = " ".join([str(error.get('message', ''))] +
+                        [str(d) for d in error.get('details') or []]).lower()
+        return any(m in text for m in _LOST_PARAMETER_MESSAGES)
+    #----------------------------------------------------------------------
+    def _auth_identity(self, securityHandler):
+        """returns a hashable description of the credentials of a call"""
+        if securityHandler is None:
+            return None
+        username = getattr(securityHandler, '_username', None) or \
+            getattr(securityHandler, '_login_username', None)
+        if username is None:
+            username = id(securityHandler)
+        return "%s:%s" % (securityHandler.__class__.__name__, username)
+    #----------------------------------------------------------------------
+    def _is_resource_load(self, param_dict):
+        """returns True for plain ?f=json requests of a resource"""
+        if not param_dict:
+            return False
+        if set(param_dict.keys()) - set(['f', 'token']):
+            return False
+        return str(param_dict.get('f', '')).lower() in ('json', 'pjson')
+    #----------------------------------------------------------------------
+    def _opener(self, handler=None, cj=None, custom_handlers=None,
+                proxy_url=None, proxy_port=None):
+        """
+        returns the opener for a security handler, cookie jar, proxy and
+        SSL setting combination.  Openers are built once and reused so the
+        pooled connections stay alive between web operations.
+        """
+        if custom_handlers is None:
+            custom_handlers = []
+        if proxy_url is not None and proxy_port is None:
+            proxy_port = 80
+        pool = self.connection_pool
+        key = (handler, cj, tuple(custom_handlers), proxy_url, proxy_port,
+               self._verify, pool)
+        with _openers_lock:
+            opener = _openers.get(key)
+            if opener is not None:
+                _openers.move_to_end(key)
+        if opener is not None:
+            return opener
+        handlers = [RedirectHandler()]
+        if handler is not None:
+            handlers.append(handler)
+        if cj is not None:
+            handlers.append(request.HTTPCookieProcessor(cj))
+        handlers.extend(custom_handlers)
+        if proxy_url is not None:
+            proxies = {"http":"http://%s:%s" % (proxy_url, proxy_port),
+                       "https":"https://%s:%s" % (proxy_url, proxy_port)}
+            handlers.append(request.ProxyHandler(proxies))
+        # handlers such as the PKI client certificate handler open their
+        # own connections and take precedence over the pooled ones
+        if not any(isinstance(h, request.HTTPSHandler) for h in handlers):
+            handlers.append(KeepAliveHTTPSHandler(pool=pool,
+                                                  context=_ssl_context(self._verify)))
+        if not any(isinstance(h, request.HTTPHandler) for h in handlers):
+            handlers.append(KeepAliveHTTPHandler(pool=pool))
+        opener = request.build_opener(*handlers)
+        opener.addheaders = []
+        with _openers_lock:
+            opener = _openers.setdefault(key, opener)
+            # drops the least recently used openers
+            while len(_openers) > _OPENER_CACHE_SIZE:
+                _openers.popitem(last=False)
+        return opener
+    #----------------------------------------------------------------------
     def _get_file_name(self, contentDisposition,
                        url, ext=".unknown"):
         """ gets the file name from the header or url if possible """
@@ -262,8 +719,10 @@ class BaseWebOperations(BaseOperation):
         """proceses the handler and returns the cookiejar"""
         cj = None
         handler = None
+        # never modify the caller's dictionary, it may be shared by threads
+        param_dict = dict(param_dict)
         if securityHandler is None:
-            cj = cookiejar.CookieJar()
+            cj = _anonymous_cookies
         elif securityHandler.method.lower() in ["token", "oauth"]:
             param_dict['token'] = securityHandler.token
             if hasattr(securityHandler, 'cookiejar'):
@@ -279,7 +738,7 @@ class BaseWebOperations(BaseOperation):
                     param_dict[k] = json.dumps(v)
         return param_dict, handler, cj
     #----------------------------------------------------------------------
-    def _process_response(self, resp, out_folder=None):
+    def _process_response(self, resp, out_folder=None, stream=False):
         """ processes the response object"""
         CHUNK = 4056
         maintype = self._mainType(resp)
@@ -308,17 +767,53 @@ class BaseWebOperations(BaseOperation):
                     del data
                 del writer
             return file_name
+        elif stream:
+            return FeatureStream(self._chunk(response=resp, size=65536))
         else:
-            read = ""
-            for data in self._chunk(response=resp, size=4096):
-                read += data.decode('utf-8') if self.PY3 == True else data
-                del data
-            try:
-                return json.loads(read.strip())
-            except:
-                return read
+            return self._decode_body(self._read_body(resp), contentType)
         return None
     #----------------------------------------------------------------------
+    def _read_body(self, resp):
+        """
+        reads the complete response body into a single bytearray.  When the
+        server reports the length of an uncompressed body the buffer is
+        allocated once and filled in place.
+        """
+        contentLength = resp.headers.get('content-length')
+        if resp.headers.get("content-encoding") not in ("gzip", "deflate") and \
+           contentLength is not None and contentLength.strip().isdigit():
+            size = int(contentLength)
+            buf = bytearray(size)
+            view = memoryview(buf)
+            pos = 0
+            while pos < size:
+                read = resp.readinto(view[pos:])
+                if not read:
+                    break
+                pos += read
+            view.release()
+            if pos < size:
+                del buf[pos:]
+            return buf
+        buf = bytearray()
+        for data in self._chunk(response=resp, size=65536):
+            buf += data
+            del data
+        return buf
+    #----------------------------------------------------------------------
+    def _decode_body(self, body, contentType=None):
+        """
+        decodes the body as JSON, or returns it as text.  Protocol buffer
+        responses (f=pbf) are returned as bytes.
+        """
+        if contentType is not None and \
+           contentType.split(';')[0].strip().lower() == "application/x-protobuf":
+            return bytes(body)
+        try:
+            return json.loads(body)
+        except ValueError:
+            return bytes(body).decode('utf-8', 'replace')
+    #----------------------------------------------------------------------
     def _make_boundary(self):
         """ creates a boundary for multipart post (form post)"""
         if self.PY2:
@@ -354,6 +849,9 @@ class BaseWebOperations(BaseOperation):
                 yield data
                 b = response.read(size)
                 del data
+            data = d.flush()
+            if data:
+                yield data
         else:
             while True:
                 if chunk := response.read(size):
@@ -372,7 +870,8 @@ class BaseWebOperations(BaseOperation):
               compress=True,
               out_folder=None,
               file_name=None,
-              force_form_post=False):
+              force_form_post=False,
+              stream=False):
         """
         Performs a POST operation on a URL.
 
@@ -401,6 +900,8 @@ class BaseWebOperations(BaseOperation):
              given in the header or a user wishes to override the return saved
              file name, provide value here.
            force_form_post - boolean -
+           stream - if True, JSON responses are returned as a FeatureStream
+              that decodes the 'features' array incrementally.
         Output:
            returns dictionary or string depending on web operation.
         """
@@ -416,22 +917,9 @@ class BaseWebOperations(BaseOperation):
             additional_headers = {}
         if custom_handlers is None:
             custom_handlers = []
-        if (
-            self._verify == False
-            and sys.version_info[:3] >= (2, 7, 9)
-            and hasattr(ssl, 'create_default_context')
-        ):
-            ctx = ssl.create_default_context()
-            ctx.check_hostname = False
-            ctx.verify_mode = ssl.CERT_NONE
-            custom_handlers.append(request.HTTPSHandler(context=ctx))
-        if len(files) == 0 and force_form_post == False:
-            self._last_method = "POST"
-        elif len(files) == 0 and force_form_post == True:
-            self._last_method = "FORM-MULTIPART"
-        elif len(files) > 0:
-            self._last_method = "FORM-MULTIPART"
+        if len(files) > 0:
             force_form_post = True
+        method = "FORM-MULTIPART" if force_form_post else "POST"
 
         headers = {
             "User-Agent": self.useragent,
@@ -439,67 +927,77 @@ class BaseWebOperations(BaseOperation):
         }
         if securityHandler and securityHandler.referer_url:
             headers['referer'] = securityHandler.referer_url
-        opener = None
         return_value = None
-        handlers = [RedirectHandler()]
         param_dict, handler, cj = self._processHandler(securityHandler, param_dict)
-        if handler is not None:
-            handlers.append(handler)
-        if cj is not None:
-            handlers.append(request.HTTPCookieProcessor(cj))
-        if isinstance(custom_handlers, list) and \
-               len(custom_handlers) > 0:
-            handlers.extend(iter(custom_handlers))
         headers['Accept-Encoding'] = 'gzip' if compress else ''
         for k,v in additional_headers.items():
             headers[k] = v
             del k,v
-        hasContext = 'context' in self._has_context(request.urlopen)
-        if (
-            self._verify == False
-            and sys.version_info[:3] >= (2, 7, 9)
-            and hasattr(ssl, 'create_default_context')
-        ):
-            ctx = ssl.create_default_context()
-            ctx.check_hostname = False
-            ctx.verify_mode = ssl.CERT_NONE
-
-        opener = request.build_opener(*handlers)
-        opener.addheaders = list(headers.items())
-        request.install_opener(opener)
+        opener = self._opener(handler=handler,
+                              cj=cj,
+                              custom_handlers=custom_handlers,
+                              proxy_url=proxy_url,
+                              proxy_port=proxy_port)
+        idempotent = len(files) == 0 and \
+            self.retry_policy.is_idempotent("POST", url, param_dict)
+        encoding = None
         if force_form_post == False:
             data = urlencode(param_dict)
             if self.PY3:
                 data = data.encode('ascii')
-            opener.data = data
+            data, encoding = self._encode_body(self._asString(url), data)
+            if encoding is not None:
+                headers['Content-Encoding'] = encoding
             req = request.Request(self._asString(url),
                                   data = data,
                                   headers=headers)
-            for k,v in headers.items():
-                req.add_header(k,v)
-            if hasContext and self._verify == False:
-                resp = request.urlopen(req, context=ctx)
-            else:
-                resp = request.urlopen(req)
+            try:
+                resp = self._open(opener, req, idempotent=idempotent)
+            except HTTPError as e:
+                # edits are never sent twice, the server may have run them
+                if not self._body_encoding_rejected(
+                        url, encoding, code=e.code,
+                        content_type=e.headers.get('Content-Type') \
+                        if e.headers is not None else None) or \
+                   not idempotent:
+                    raise
+                e.close()
+                return self._post(url, param_dict, files, securityHandler,
+                                  additional_headers, custom_handlers,
+                                  proxy_url, proxy_port, compress,
+                                  out_folder, file_name, force_form_post,
+                                  stream)
         else:
             mpf = MultiPartForm(param_dict=param_dict,
                                 files=files)
             req = request.Request(self._asString(url), headers=headers)
-            body = mpf.make_result
+            if self.PY3:
+                body = mpf.body
+            else:
+                body = mpf.make_result
+            # assigning data resets Content-length, so it is set first
+            req.data = body
             req.add_header('User-agent', self.useragent)
             req.add_header('Content-type', mpf.get_content_type())
             req.add_header('Content-length', len(body))
-            req.data = body
-            if 'context' in self._has_context(request.urlopen) and \
-                   self._verify == False:
-                resp = request.urlopen(req, context=ctx)
-            else:
-                resp = request.urlopen(req)
+            try:
+                resp = self._open(opener, req, idempotent=idempotent)
+            finally:
+                if self.PY3:
+                    body.close()
             del body, mpf
-        self._last_code = resp.getcode()
-        self._last_url = resp.geturl()
+        self._set_last_response(method, resp)
         return_value = self._process_response(resp=resp,
-                                              out_folder=out_folder)
+                                              out_folder=out_folder,
+                                              stream=stream)
+        if self._body_encoding_rejected(url, encoding, result=return_value,
+                                        param_dict=param_dict) and \
+           idempotent:
+            return self._post(url, param_dict, files, securityHandler,
+                              additional_headers, custom_handlers,
+                              proxy_url, proxy_port, compress,
+                              out_folder, file_name, force_form_post,
+                              stream)
         if isinstance(return_value, dict):
             if "error" in return_value and \
                    'message' in return_value['error']:
@@ -516,7 +1014,9 @@ class BaseWebOperations(BaseOperation):
                                           proxy_port,
                                           compress,
                                           out_folder,
-                                          file_name)
+                                          file_name,
+                                          force_form_post,
+                                          stream)
         return return_value
     #----------------------------------------------------------------------
     def _asString(self, value):
@@ -547,25 +1047,54 @@ class BaseWebOperations(BaseOperation):
              compress=True,
              custom_handlers=None,
              out_folder=None,
-             file_name=None):
+             file_name=None,
+             stream=False,
+             use_cache=None,
+             coalesce=True):
         """
         Performs a GET operation
         Inputs:
-
+           stream - if True, JSON responses are returned as a FeatureStream
+              that decodes the 'features' array incrementally.
+           use_cache - None (default) makes conditional requests through the
+              response cache for ?f=json resource loads, True does so for
+              any JSON GET and False bypasses the cache.
+           coalesce - if True (default), a call that is identical to one
+              already running in another thread waits for that call and
+              returns a copy of its result instead of asking the server
+              again.  Streamed requests are never coalesced.
         Output:
            returns dictionary, string or None
         """
         # ensure that no spaces are in the url
         url = url.replace(" ", "%20")
 
-        pass_headers = {}
+        flight = self.single_flight
+        if coalesce and not stream and flight.enabled:
+            key = flight.key(url, param_dict,
+                             self._auth_identity(securityHandler),
+                             tuple(tuple(h) for h in additional_headers or []),
+                             proxy_url, proxy_port, compress,
+                             out_folder, file_name, use_cache,
+                             self._verify)
+            def call():
+                result = self._get(url, param_dict, securityHandler,
+                                   additional_headers, handlers,
+                                   proxy_url, proxy_port, compress,
+                                   custom_handlers, out_folder, file_name,
+                                   stream, use_cache, coalesce=False)
+                return result, self.last_response
+            (result, info), shared = flight.do(key, call)
+            if shared:
+                self._thread_state().response = info
+            return result
+
         if custom_handlers is None:
             custom_handlers = []
         if handlers is None:
             handlers = []
         if param_dict is None:
             param_dict = {}
-        self._last_method = "GET"
         CHUNK = 4056
         param_dict, handler, cj = self._processHandler(securityHandler, param_dict)
         if additional_headers is not None:
@@ -582,99 +1111,62 @@ class BaseWebOperations(BaseOperation):
             pass_headers['Accept-encoding'] = 'gzip'
         else:
             pass_headers['Accept-encoding'] = ""
-        #headers.append(('User-Agent', USER_AGENT))
         pass_headers['User-Agent'] = self.useragent
         if len(param_dict.keys()) == 0:
             param_dict = None
-        if handlers is None:
-            handlers = []
-        if handler is not None:
-            handlers.append(handler)
-        handlers.append(RedirectHandler())
-        if self._verify == False and \
-           sys.version_info[0:3] >= (2, 7, 9) and \
-            hasattr(ssl,'create_default_context'):
-            ctx = ssl.create_default_context()
-            ctx.check_hostname = False
-            ctx.verify_mode = ssl.CERT_NONE
-            handlers.append(request.HTTPSHandler(context=ctx))
-        if cj is not None:
-            handlers.append(request.HTTPCookieProcessor(cj))
-        if proxy_url is not None:
-            if proxy_port is None:
-                proxy_port = 80
-            proxies = {"http":"http://%s:%s" % (proxy_url, proxy_port),
-                       "https":"https://%s:%s" % (proxy_url, proxy_port)}
-            proxy_support = request.ProxyHandler(proxies)
-            handlers.append(proxy_support)
-        opener = request.build_opener(*handlers)
-
-        opener.addheaders = headers
-        request.install_opener(opener)
-        ctx = None
-        hasContext = False
-        if self._verify == False and \
-           'context' in self._has_context(request.urlopen) and \
-            sys.version_info[0:3] >= (2, 7, 9) and \
-            hasattr(ssl,'create_default_context'):
-            ctx = ssl.create_default_context()
-            ctx.check_hostname = False
-            ctx.verify_mode = ssl.CERT_NONE
-            hasContext = True
-
-        if hasContext == False:
-
-            if param_dict is None:
-                req = request.Request(self._asString(url),
-                                      headers=pass_headers)
-                resp = request.urlopen(req)
-            elif len(str(urlencode(param_dict))) + len(url) >= 1999:
-                return self._post(
-                    url=url,
-                    param_dict=param_dict,
-                    files=None,
-                    securityHandler=securityHandler,
-                    additional_headers=additional_headers,
-                    custom_handlers=custom_handlers,
-                    proxy_url=proxy_url,
-                    proxy_port=proxy_port,
-                    compress=compress,
-                    out_folder=out_folder,
-                    file_name=file_name,
-                    force_form_post=False)
-            else:
-                format_url = self._asString(url) + "?%s" % urlencode(param_dict)
-                req = request.Request(format_url,
-                                      headers=pass_headers)
-                resp = request.urlopen(req)
+        if param_dict is not None and \
+           len(str(urlencode(param_dict))) + len(url) >= 1999:
+            return self._post(
+                url=url,
+                param_dict=param_dict,
+                files=None,
+                securityHandler=securityHandler,
+                additional_headers=additional_headers,
+                custom_handlers=custom_handlers,
+                proxy_url=proxy_url,
+                proxy_port=proxy_port,
+                compress=compress,
+                out_folder=out_folder,
+                file_name=file_name,
+                force_form_post=False,
+                stream=stream)
+        cache = self.response_cache
+        cache_key = None
+        entry = None
+        if cache.enabled and not stream and \
+           (use_cache or (use_cache is None and \
+                          self._is_resource_load(param_dict))):
+            cache_key = cache.key(url, param_dict,
+                                  self._auth_identity(securityHandler))
+            entry = cache.get(cache_key)
+            if entry is not None:
+                if entry.fresh(cache.ttl):
+                    return self._decode_body(entry.body)
+                pass_headers.update(entry.validators)
+        opener = self._opener(handler=handler,
+                              cj=cj,
+                              custom_handlers=handlers,
+                              proxy_url=proxy_url,
+                              proxy_port=proxy_port)
+        if param_dict is None:
+            req = request.Request(self._asString(url),
+                                  headers=pass_headers)
         else:
-            if param_dict is None:
-                req = request.Request(self._asString(url),
-                                      headers=pass_headers)
-                resp = request.urlopen(req,
-                                       context=ctx)
-            elif len(str(urlencode(param_dict))) + len(url) >= 1999:
-                return self._post(
-                    url=url,
-                    param_dict=param_dict,
-                    files=None,
-                    securityHandler=securityHandler,
-                    additional_headers=additional_headers,
-                    custom_handlers=custom_handlers,
-                    proxy_url=proxy_url,
-                    proxy_port=proxy_port,
-                    compress=compress,
-                    out_folder=out_folder,
-                    file_name=file_name,
-                    force_form_post=False)
-            else:
-                format_url = self._asString(url) + "?%s" % urlencode(param_dict)
-                req = request.Request(format_url,
-                                      headers=pass_headers)
-                resp = request.urlopen(req,
-                                       context=ctx)
-        self._last_code = resp.getcode()
-        self._last_url = resp.geturl()
+            format_url = self._asString(url) + "?%s" % urlencode(param_dict)
+            req = request.Request(format_url,
+                                  headers=pass_headers)
+        try:
+            resp = self._open(opener, req, idempotent=True)
+        except HTTPError as e:
+            if e.code != 304 or entry is None:
+                raise
+            self._set_last_response("GET", e)
+            cache.touch(cache_key,
+                        etag=e.headers.get('ETag'),
+                        last_modified=e.headers.get('Last-Modified'))
+            e.close()
+            return self._decode_body(entry.body)
+        self._set_last_response("GET", resp)
         #  Get some headers from the response
         maintype = self._mainType(resp)
         contentDisposition = resp.headers.get('content-disposition')
@@ -707,34 +1199,290 @@ class BaseWebOperations(BaseOperation):
                 writer.flush()
                 del writer
             return file_name
+        elif stream:
+            return FeatureStream(self._chunk(response=resp, size=65536))
         else:
-            read = ""
-            for data in self._chunk(response=resp,
-                                    size=CHUNK):
-                if self.PY3 == True:
-                    read += data.decode('utf-8')
+            body = self._read_body(resp)
+            results = self._decode_body(body, contentType)
+            if cache_key is not None:
+                if isinstance(results, dict) and 'error' not in results:
+                    cache.put(cache_key, body,
+                              etag=resp.headers.get('ETag'),
+                              last_modified=resp.headers.get('Last-Modified'))
                 else:
-                    read += data
-
-                del data
+                    cache.remove(cache_key)
+            if isinstance(results, dict) and 'error' in results:
+                if 'message' in results['error']:
+                    if results['error']['message'] == 'Request not made over ssl':
+                        if url.startswith('http://'):
+                            url = url.replace('http://', 'https://')
+                            return self._get(url,
+                                             param_dict,
+                                             securityHandler,
+                                             additional_headers,
+                                             handlers,
+                                             proxy_url,
+                                             proxy_port,
+                                             compress,
+                                             custom_handlers,
+                                             out_folder,
+                                             file_name,
+                                             stream,
+                                             use_cache,
+                                             coalesce=False)
+            return results
+    #----------------------------------------------------------------------
+    def _async_capable(self, handler, custom_handlers, proxy_url, files=None):
+        """
+        returns True when a call can be made on the asyncio transport.
+        urllib handlers (NTLM, PKI, LDAP or custom ones), proxies and file
+        uploads are only supported by the blocking transport.
+        """
+        return handler is None and not custom_handlers and \
+               proxy_url is None and not files
+    #----------------------------------------------------------------------
+    async def _aprocess_response(self, resp, out_folder=None):
+        """asynchronous version of _process_response"""
+        maintype = resp.headers.get_content_maintype()
+        contentDisposition = resp.headers.get('content-disposition')
+        contentType = (resp.headers.get('content-type') or '').split(';')[0].lower()
+        if maintype.lower() == 'image' or \
+           contentType in ('application/x-zip-compressed', 'application/octet-stream') or \
+           resp.headers.get('Content-MD5') is not None or \
+           (contentDisposition is not None and \
+            contentDisposition.lower().find('attachment;') > -1):
+            fname = self._get_file_name(
+                contentDisposition=contentDisposition,
+                url=resp.geturl())
+            if out_folder is None:
+                out_folder = tempfile.gettempdir()
+            file_name = os.path.join(out_folder, fname)
+            with open(file_name, 'wb') as writer:
+                async for data in resp.chunks():
+                    writer.write(data)
+            return file_name
+        return self._decode_body(await resp.read(), contentType)
+    #----------------------------------------------------------------------
+    async def _arequest(self, method, url, headers, data, cj,
+                        idempotent=False):
+        """
+        sends a request on the event loop's transport, idempotent requests
+        that fail with a transient error are sent again as the retry policy
+        allows
+        """
+        cookie_req = None
+        if cj is not None:
+            cookie_req = request.Request(url, headers=headers)
+            cj.add_cookie_header(cookie_req)
+            headers = dict(headers)
+            headers.update(cookie_req.unredirected_hdrs)
+        policy = self.retry_policy
+        attempt = 1
+        while True:
             try:
-                results = json.loads(read)
-                if 'error' in results:
-                    if 'message' in results['error']:
-                        if results['error']['message'] == 'Request not made over ssl':
-                            if url.startswith('http://'):
-                                url = url.replace('http://', 'https://')
-                                return self._get(url,
-                                                 param_dict,
-                                                 securityHandler,
-                                                 additional_headers,
-                                                 handlers,
-                                                 proxy_url,
-                                                 proxy_port,
-                                                 compress,
-                                                 custom_handlers,
-                                                 out_folder,
-                                                 file_name)
-                return results
-            except:
-                return read
+                resp = await get_transport().request(method, url,
+                                                     headers=headers,
+                                                     data=data,
+                                                     ssl_context=_ssl_context(self._verify),
+                                                     timeout=self._timeout,
+                                                     idempotent=idempotent)
+                break
+            except Exception as e:
+                if not idempotent or \
+                   attempt >= policy.max_attempts or \
+                   not policy.retryable(e) or \
+                   not rewind_body(data):
+                    raise
+                await asyncio.sleep(policy.delay(attempt, e))
+                attempt += 1
+        if cj is not None:
+            cj.extract_cookies(resp, cookie_req)
+        return resp
+    #----------------------------------------------------------------------
+    async def _apost(self, url,
+                     param_dict=None,
+                     files=None,
+                     securityHandler=None,
+                     additional_headers=None,
+                     custom_handlers=None,
+                     proxy_url=None,
+                     proxy_port=80,
+                     compress=True,
+                     out_folder=None,
+                     file_name=None,
+                     force_form_post=False):
+        """
+        Performs a POST operation on a URL from a coroutine.  The inputs and
+        the output are the same as _post.  The request is made on the
+        asyncio transport of the running event loop, calls the transport
+        cannot handle run _post in the loop's default executor.
+        """
+        url = url.replace(" ", "%20")
+        if param_dict is None:
+            param_dict = {}
+        if additional_headers is None:
+            additional_headers = {}
+        params, handler, cj = self._processHandler(securityHandler, param_dict)
+        if not self._async_capable(handler, custom_handlers, proxy_url, files):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, functools.partial(self._post, url,
+                                        param_dict=param_dict,
+                                        files=files,
+                                        securityHandler=securityHandler,
+                                        additional_headers=additional_headers,
+                                        custom_handlers=custom_handlers,
+                                        proxy_url=proxy_url,
+                                        proxy_port=proxy_port,
+                                        compress=compress,
+                                        out_folder=out_folder,
+                                        file_name=file_name,
+                                        force_form_post=force_form_post))
+        headers = {
+            "User-Agent": self.useragent,
+            'Accept': '*/*'
+        }
+        if securityHandler and securityHandler.referer_url:
+            headers['referer'] = securityHandler.referer_url
+        headers['Accept-Encoding'] = 'gzip' if compress else ''
+        for k,v in additional_headers.items():
+            headers[k] = v
+        if force_form_post:
+            mpf = MultiPartForm(param_dict=params)
+            data = mpf.body
+            headers['Content-Type'] = mpf.get_content_type()
+            method = "FORM-MULTIPART"
+        else:
+            data = urlencode(params).encode('ascii')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            method = "POST"
+        encoding = None
+        if not force_form_post:
+            data, encoding = self._encode_body(self._asString(url), data)
+            if encoding is not None:
+                headers['Content-Encoding'] = encoding
+        idempotent = self.retry_policy.is_idempotent("POST", url, param_dict)
+        try:
+            resp = await self._arequest("POST", self._asString(url), headers,
+                                        data, cj, idempotent=idempotent)
+        except HTTPError as e:
+            if not self._body_encoding_rejected(
+                    url, encoding, code=e.code,
+                    content_type=e.headers.get('Content-Type') \
+                    if e.headers is not None else None) or \
+               not idempotent:
+                raise
+            e.close()
+            resp = None
+        if resp is not None:
+            self._set_last_response(method, resp)
+            return_value = await self._aprocess_response(resp=resp,
+                                                         out_folder=out_folder)
+        if resp is None or \
+           (self._body_encoding_rejected(url, encoding, result=return_value,
+                                         param_dict=params) and
+            idempotent):
+            return await self._apost(url, param_dict, files,
+                                     securityHandler, additional_headers,
+                                     custom_handlers, proxy_url, proxy_port,
+                                     compress, out_folder, file_name,
+                                     force_form_post)
+        if isinstance(return_value, dict) and \
+           "error" in return_value and \
+           'message' in return_value['error']:
+            if return_value['error']['message'].lower() == 'request not made over ssl':
+                if url.startswith('http://'):
+                    url = url.replace('http://', 'https://')
+                    return await self._apost(url,
+                                             param_dict,
+                                             files,
+                                             securityHandler,
+                                             additional_headers,
+                                             custom_handlers,
+                                             proxy_url,
+                                             proxy_port,
+                                             compress,
+                                             out_folder,
+                                             file_name,
+                                             force_form_post)
+        return return_value
+    #----------------------------------------------------------------------
+    async def _aget(self, url,
+                    param_dict=None,
+                    securityHandler=None,
+                    additional_headers=None,
+                    handlers=None,
+                    proxy_url=None,
+                    proxy_port=None,
+                    compress=True,
+                    custom_handlers=None,
+                    out_folder=None,
+                    file_name=None):
+        """
+        Performs a GET operation from a coroutine.  The inputs and the
+        output are the same as _get.  The request is made on the asyncio
+        transport of the running event loop, calls the transport cannot
+        handle run _get in the loop's default executor.
+        """
+        url = url.replace(" ", "%20")
+        if param_dict is None:
+            param_dict = {}
+        params, handler, cj = self._processHandler(securityHandler, param_dict)
+        if not self._async_capable(handler, handlers, proxy_url):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, functools.partial(self._get, url,
+                                        param_dict=param_dict,
+                                        securityHandler=securityHandler,
+                                        additional_headers=additional_headers,
+                                        handlers=handlers,
+                                        proxy_url=proxy_url,
+                                        proxy_port=proxy_port,
+                                        compress=compress,
+                                        custom_handlers=custom_handlers,
+                                        out_folder=out_folder,
+                                        file_name=file_name))
+        pass_headers = {}
+        if securityHandler and securityHandler.referer_url:
+            pass_headers['referer'] = securityHandler.referer_url
+        for h in additional_headers or []:
+            pass_headers[h[0]] = h[1]
+        pass_headers['Accept-encoding'] = 'gzip' if compress else ""
+        pass_headers['User-Agent'] = self.useragent
+        if len(params) > 0 and \
+           len(str(urlencode(params))) + len(url) >= 1999:
+            return await self._apost(url=url,
+                                     param_dict=param_dict,
+                                     securityHandler=securityHandler,
+                                     additional_headers=dict(additional_headers or []),
+                                     custom_handlers=custom_handlers,
+                                     proxy_url=proxy_url,
+                                     proxy_port=proxy_port,
+                                     compress=compress,
+                                     out_folder=out_folder,
+                                     file_name=file_name)
+        format_url = self._asString(url)
+        if len(params) > 0:
+            format_url += "?%s" % urlencode(params)
+        resp = await self._arequest("GET", format_url, pass_headers, None, cj,
+                                    idempotent=True)
+        self._set_last_response("GET", resp)
+        results = await self._aprocess_response(resp=resp,
+                                                out_folder=out_folder)
+        if isinstance(results, dict) and 'error' in results and \
+           'message' in results['error']:
+            if results['error']['message'] == 'Request not made over ssl':
+                if url.startswith('http://'):
+                    url = url.replace('http://', 'https://')
+                    return await self._aget(url,
+                                            param_dict,
+                                            securityHandler,
+                                            additional_headers,
+                                            handlers,
+                                            proxy_url,
+                                            proxy_port,
+                                            compress,
+                                            custom_handlers,
+                                            out_folder,
+                                            file_name)
+        return results
@@ -0,0 +1,240 @@
+"""
+   Conditional request (ETag/Last-Modified) cache for resource loads.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import os
+from . import _json as json
+import time
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+from ..packages.six.moves.urllib_parse import urlencode
+
+########################################################################
+class CacheEntry(object):
+    """a cached response body and the validators sent with it"""
+    __slots__ = ('body', 'etag', 'last_modified', 'stored')
+    #----------------------------------------------------------------------
+    def __init__(self, body, etag=None, last_modified=None, stored=None):
+        """Constructor"""
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored = stored if stored is not None else time.time()
+    #----------------------------------------------------------------------
+    @property
+    def validators(self):
+        """returns the conditional request headers for the entry"""
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+    #----------------------------------------------------------------------
+    def fresh(self, ttl):
+        """
+        returns True when an entry without validators is younger than
+        ttl seconds and can be used without asking the server
+        """
+        if self.etag is not None or self.last_modified is not None:
+            return False
+        return time.time() - self.stored < ttl
+########################################################################
+class ResponseCache(object):
+    """
+    Bounded LRU cache of JSON response bodies used to make conditional
+    GET requests.  Entries with an ETag or Last-Modified header are always
+    revalidated with If-None-Match/If-Modified-Since and served from the
+    cache when the server answers 304 Not Modified.  Entries from servers
+    without validators are reused for ttl seconds.
+
+    Inputs:
+       maxsize - maximum number of responses kept in memory
+       ttl - seconds a response without validators is reused, 0 disables
+          caching of such responses
+       cache_dir - optional folder where entries are also written so they
+          survive the process
+    """
+    _maxsize = None
+    _ttl = None
+    _cache_dir = None
+    _enabled = True
+    #----------------------------------------------------------------------
+    def __init__(self, maxsize=256, ttl=0, cache_dir=None):
+        """Constructor"""
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir is not None and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+    #----------------------------------------------------------------------
+    @property
+    def enabled(self):
+        """gets/sets if the cache is used"""
+        return self._enabled
+    #----------------------------------------------------------------------
+    @enabled.setter
+    def enabled(self, value):
+        """gets/sets if the cache is used"""
+        self._enabled = bool(value)
+    #----------------------------------------------------------------------
+    @property
+    def maxsize(self):
+        """gets/sets the number of entries kept in memory"""
+        return self._maxsize
+    #----------------------------------------------------------------------
+    @maxsize.setter
+    def maxsize(self, value):
+        """gets/sets the number of entries kept in memory"""
+        if isinstance(value, int) and value >= 0:
+            self._maxsize = value
+            with self._lock:
+                self._trim()
+    #----------------------------------------------------------------------
+    @property
+    def ttl(self):
+        """gets/sets the seconds responses without validators are reused"""
+        return self._ttl
+    #----------------------------------------------------------------------
+    @ttl.setter
+    def ttl(self, value):
+        """gets/sets the seconds responses without validators are reused"""
+        if isinstance(value, (int, float)) and value >= 0:
+            self._ttl = value
+    #----------------------------------------------------------------------
+    @property
+    def cache_dir(self):
+        """gets the folder of the on-disk store"""
+        return self._cache_dir
+    #----------------------------------------------------------------------
+    def key(self, url, param_dict=None, identity=None):
+        """
+        returns the cache key of a request.  The token is left out so
+        entries outlive token renewals, the identity of the credentials
+        keeps the responses of different users apart.
+        """
+        params = {}
+        if param_dict:
+            params = dict((k, v) for k, v in param_dict.items() if k != 'token')
+        return "%s?%s|%s" % (url, urlencode(sorted(params.items())), identity)
+    #----------------------------------------------------------------------
+    def _path(self, key):
+        """returns the on-disk location of a key"""
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self._cache_dir, name + ".cache")
+    #----------------------------------------------------------------------
+    def _trim(self):
+        """drops the least recently used entries"""
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+    #----------------------------------------------------------------------
+    def get(self, key):
+        """returns the CacheEntry for the key or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self._cache_dir is not None:
+            entry = self._read(key)
+            if entry is not None:
+                with self._lock:
+                    self._entries[key] = entry
+                    self._trim()
+        if entry is not None and \
+           entry.etag is None and entry.last_modified is None and \
+           not entry.fresh(self._ttl):
+            self.remove(key)
+            return None
+        return entry
+    #----------------------------------------------------------------------
+    def put(self, key, body, etag=None, last_modified=None):
+        """stores a response body, returns the CacheEntry or None"""
+        if etag is None and last_modified is None and not self._ttl:
+            return None
+        entry = CacheEntry(body=bytes(body),
+                           etag=etag,
+                           last_modified=last_modified)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._trim()
+        if self._cache_dir is not None:
+            self._write(key, entry)
+        return entry
+    #----------------------------------------------------------------------
+    def touch(self, key, etag=None, last_modified=None):
+        """marks an entry as revalidated by the server"""
+        entry = self.get(key)
+        if entry is not None:
+            entry.stored = time.time()
+            if etag is not None:
+                entry.etag = etag
+            if last_modified is not None:
+                entry.last_modified = last_modified
+            if self._cache_dir is not None:
+                self._write(key, entry)
+        return entry
+    #----------------------------------------------------------------------
+    def remove(self, key):
+        """removes an entry from memory and disk"""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self._cache_dir is not None and os.path.isfile(self._path(key)):
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+    #----------------------------------------------------------------------
+    def clear(self):
+        """removes all entries"""
+        with self._lock:
+            self._entries.clear()
+        if self._cache_dir is not None:
+            for name in os.listdir(self._cache_dir):
+                if name.endswith(".cache"):
+                    try:
+                        os.remove(os.path.join(self._cache_dir, name))
+                    except OSError:
+                        pass
+    #----------------------------------------------------------------------
+    def _read(self, key):
+        """loads an entry from the on-disk store"""
+        path = self._path(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'rb') as reader:
+                meta = json.loads(reader.readline())
+                body = reader.read()
+        except (IOError, OSError, ValueError):
+            return None
+        if meta.get('key') != key:
+            return None
+        return CacheEntry(body=body,
+                          etag=meta.get('etag'),
+                          last_modified=meta.get('last_modified'),
+                          stored=meta.get('stored'))
+    #----------------------------------------------------------------------
+    def _write(self, key, entry):
+        """writes an entry to the on-disk store"""
+        meta = json.dumpb({"key" : key,
+                           "etag" : entry.etag,
+                           "last_modified" : entry.last_modified,
+                           "stored" : entry.stored})
+        fd, temp = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as writer:
+                writer.write(meta + b"\n")
+                writer.write(entry.body)
+            os.replace(temp, self._path(key))
+        except (IOError, OSError):
+            if os.path.isfile(temp):
+                os.remove(temp)
+#----------------------------------------------------------------------
+default_cache = ResponseCache()
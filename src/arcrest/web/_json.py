@@ -0,0 +1,159 @@
+"""
+   JSON serialization used by the whole library.  The fastest installed
+   backend among orjson, ujson and python-rapidjson encodes and decodes,
+   the standard library json module is used otherwise.  loads() and
+   dumps() take the same arguments as their json module counterparts, so
+   modules import this one in place of json.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import json as _stdlib
+
+__all__ = ["loads", "dumps", "dumpb", "get_backend", "set_backend",
+           "backends"]
+
+_BACKENDS = {}
+try:
+    import orjson
+    _BACKENDS["orjson"] = orjson
+except ImportError:
+    pass
+try:
+    import ujson
+    _BACKENDS["ujson"] = ujson
+except ImportError:
+    pass
+try:
+    import rapidjson
+    _BACKENDS["rapidjson"] = rapidjson
+except ImportError:
+    pass
+_PREFERENCE = ["orjson", "ujson", "rapidjson", "json"]
+_backend = "json"
+_module = None
+#----------------------------------------------------------------------
+def backends():
+    """returns the names of the installed backends, fastest first"""
+    return [name for name in _PREFERENCE
+            if name == "json" or name in _BACKENDS]
+#----------------------------------------------------------------------
+def get_backend():
+    """returns the name of the backend in use"""
+    return _backend
+#----------------------------------------------------------------------
+def set_backend(name=None):
+    """
+    selects the backend, None picks the fastest installed one and "json"
+    the standard library
+    Inputs:
+       name - orjson, ujson, rapidjson, json or None
+    Output:
+       the name of the previous backend
+    """
+    global _backend, _module
+    previous = _backend
+    if name is None:
+        name = backends()[0]
+    if name != "json" and name not in _BACKENDS:
+        raise ValueError("JSON backend %s is not installed, installed: %s" %
+                         (name, ", ".join(backends())))
+    _backend = name
+    _module = _BACKENDS.get(name)
+    return previous
+#----------------------------------------------------------------------
+def loads(s, **kwargs):
+    """
+    decodes a JSON document given as str, bytes, bytearray or memoryview.
+    Documents a fast backend rejects (ex: NaN values, which orjson does
+    not accept) are decoded by the standard library, which raises the
+    ValueError of invalid JSON.
+    """
+    if isinstance(s, memoryview):
+        s = s.tobytes()
+    if _module is not None and not kwargs:
+        try:
+            if _backend == "orjson" or isinstance(s, str):
+                return _module.loads(s)
+            return _module.loads(bytes(s))
+        except (ValueError, TypeError, OverflowError):
+            pass
+    return _stdlib.loads(s, **kwargs)
+#----------------------------------------------------------------------
+def _has_nonfinite(obj):
+    """returns True when obj holds a NaN or infinite float"""
+    kind = type(obj)
+    if kind is float:
+        # NaN - NaN and inf - inf are NaN
+        return obj - obj != 0.0
+    if kind is dict:
+        obj = obj.values()
+    elif kind is not list and kind is not tuple:
+        return False
+    for value in obj:
+        kind = type(value)
+        if kind is float:
+            if value - value != 0.0:
+                return True
+        elif (kind is dict or kind is list or kind is tuple) and \
+             _has_nonfinite(value):
+            return True
+    return False
+#----------------------------------------------------------------------
+def _fast_dumps(obj, default, sort_keys, indent, ensure_ascii):
+    """encodes with the selected fast backend, returns str or bytes"""
+    if _backend == "orjson":
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        value = orjson.dumps(obj, default=default, option=option)
+        # orjson writes NaN and Infinity as null, the json module keeps them
+        if b"null" in value and _has_nonfinite(obj):
+            raise ValueError("non finite float")
+        return value
+    kwargs = {"ensure_ascii" : ensure_ascii, "sort_keys" : sort_keys}
+    if indent:
+        kwargs["indent"] = indent
+    if default is not None:
+        kwargs["default"] = default
+    return _module.dumps(obj, **kwargs)
+#----------------------------------------------------------------------
+def _dumps(obj, default, sort_keys, indent, separators, ensure_ascii,
+           kwargs):
+    """
+    returns the JSON of obj as str or bytes, values a fast backend cannot
+    encode fall back to the standard library
+    """
+    fast = _module is not None and not kwargs and separators is None and \
+        (_backend != "orjson" or indent in (None, 0, 2))
+    if fast:
+        try:
+            return _fast_dumps(obj, default, sort_keys, indent, ensure_ascii)
+        except (ValueError, TypeError, OverflowError):
+            # ex: integers beyond 64 bits or objects default returns as is,
+            # the standard library gives its own result or error
+            pass
+    return _stdlib.dumps(obj, default=default, sort_keys=sort_keys,
+                         indent=indent, separators=separators,
+                         ensure_ascii=ensure_ascii, **kwargs)
+#----------------------------------------------------------------------
+def dumps(obj, default=None, sort_keys=False, indent=None, separators=None,
+          ensure_ascii=True, **kwargs):
+    """
+    encodes obj as a JSON string.  default is called for objects the
+    backend cannot encode, ex: _date_handler for datetimes.  Fast
+    backends may write non-ASCII characters unescaped.
+    """
+    value = _dumps(obj, default, sort_keys, indent, separators,
+                   ensure_ascii, kwargs)
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+#----------------------------------------------------------------------
+def dumpb(obj, default=None, sort_keys=False, indent=None, separators=None,
+          ensure_ascii=True, **kwargs):
+    """encodes obj as UTF-8 JSON bytes, see dumps"""
+    value = _dumps(obj, default, sort_keys, indent, separators,
+                   ensure_ascii, kwargs)
+    return value if isinstance(value, bytes) else value.encode("utf-8")
+
+set_backend()
@@ -0,0 +1,274 @@
+"""
+   Keep-alive connection pooling for the ArcREST web operations.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import ssl
+import time
+import socket
+import threading
+
+from ..packages.six.moves.urllib import request
+from ..packages.six.moves.urllib.error import URLError
+from ..packages.six.moves import http_client
+from ._retry import default_retry
+
+#----------------------------------------------------------------------
+def rewind_body(data):
+    """rewinds a request body so it can be sent again, returns False when
+    that is not possible"""
+    if data is None or isinstance(data, (bytes, bytearray)):
+        return True
+    if hasattr(data, 'seek'):
+        try:
+            data.seek(0)
+            return True
+        except (IOError, OSError, ValueError):
+            return False
+    return False
+#----------------------------------------------------------------------
+def _is_idempotent(req):
+    """
+    returns True when the request can safely be sent twice, as set by
+    the web operation or else as the default retry policy tells
+    """
+    idempotent = getattr(req, 'idempotent', None)
+    if idempotent is None:
+        idempotent = default_retry.is_idempotent(req.get_method(),
+                                                 req.get_full_url())
+    return idempotent
+########################################################################
+class _PooledResponse(http_client.HTTPResponse):
+    """
+    response that hands its connection back to the pool once the body
+    has been completely read
+    """
+    _release = None
+    _complete = False
+    #----------------------------------------------------------------------
+    def _read_and_discard_trailer(self):
+        """marks a chunked response as fully read"""
+        http_client.HTTPResponse._read_and_discard_trailer(self)
+        self._complete = True
+    #----------------------------------------------------------------------
+    def _close_conn(self):
+        """releases or discards the underlying connection"""
+        http_client.HTTPResponse._close_conn(self)
+        release, self._release = self._release, None
+        if release is not None:
+            release(self._complete or self.length == 0)
+########################################################################
+class _PooledHTTPConnection(http_client.HTTPConnection):
+    """HTTP connection that creates pool aware responses"""
+    response_class = _PooledResponse
+########################################################################
+class _PooledHTTPSConnection(http_client.HTTPSConnection):
+    """HTTPS connection that resumes previous TLS sessions"""
+    response_class = _PooledResponse
+    _session = None
+    #----------------------------------------------------------------------
+    def connect(self):
+        """Connect to a host on a given (SSL) port."""
+        http_client.HTTPConnection.connect(self)
+        if self._tunnel_host:
+            server_hostname = self._tunnel_host
+        else:
+            server_hostname = self.host
+        try:
+            self.sock = self._context.wrap_socket(self.sock,
+                                                  server_hostname=server_hostname,
+                                                  session=self._session)
+        except (TypeError, ValueError):
+            # the session belongs to another context or is not supported
+            self.sock = self._context.wrap_socket(self.sock,
+                                                  server_hostname=server_hostname)
+########################################################################
+class ConnectionPool(object):
+    """
+    Holds idle HTTP/HTTPS connections per host so consecutive web
+    operations reuse the same TCP connection and TLS session.
+
+    Inputs:
+       maxsize - maximum number of idle connections kept per host
+       idle_timeout - seconds an idle connection may be kept before it is
+          discarded
+    """
+    _maxsize = None
+    _idle_timeout = None
+    #----------------------------------------------------------------------
+    def __init__(self, maxsize=10, idle_timeout=60):
+        """Constructor"""
+        self._maxsize = maxsize
+        self._idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._sessions = {}
+    #----------------------------------------------------------------------
+    @property
+    def maxsize(self):
+        """gets/sets the number of idle connections kept per host"""
+        return self._maxsize
+    #----------------------------------------------------------------------
+    @maxsize.setter
+    def maxsize(self, value):
+        """gets/sets the number of idle connections kept per host"""
+        if isinstance(value, int) and value >= 0:
+            self._maxsize = value
+    #----------------------------------------------------------------------
+    @property
+    def idle_timeout(self):
+        """gets/sets the seconds an idle connection is kept alive"""
+        return self._idle_timeout
+    #----------------------------------------------------------------------
+    @idle_timeout.setter
+    def idle_timeout(self, value):
+        """gets/sets the seconds an idle connection is kept alive"""
+        if isinstance(value, (int, float)) and value >= 0:
+            self._idle_timeout = value
+    #----------------------------------------------------------------------
+    def acquire(self, key):
+        """returns an idle connection for the key or None"""
+        expired = []
+        conn = None
+        now = time.time()
+        with self._lock:
+            idle = self._idle.get(key, [])
+            while idle:
+                candidate, last_used = idle.pop()
+                if now - last_used > self._idle_timeout:
+                    expired.append(candidate)
+                else:
+                    conn = candidate
+                    break
+        for candidate in expired:
+            candidate.close()
+        return conn
+    #----------------------------------------------------------------------
+    def release(self, key, conn):
+        """returns a connection to the pool for reuse"""
+        if conn.sock is None:
+            return
+        if isinstance(conn.sock, ssl.SSLSocket):
+            with self._lock:
+                self._sessions[key] = conn.sock.session
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self._maxsize:
+                idle.append((conn, time.time()))
+                return
+        conn.close()
+    #----------------------------------------------------------------------
+    def session(self, key):
+        """returns the last TLS session negotiated for the key"""
+        with self._lock:
+            return self._sessions.get(key)
+    #----------------------------------------------------------------------
+    def clear(self):
+        """closes all idle connections and forgets TLS sessions"""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+            self._sessions = {}
+        for conns in idle.values():
+            for conn, _ in conns:
+                conn.close()
+########################################################################
+class _KeepAliveMixin(object):
+    """opens requests on pooled, persistent connections"""
+    _pool = None
+    #----------------------------------------------------------------------
+    def _pooled_open(self, http_class, req, **http_conn_args):
+        """Return an HTTPResponse object for the request using a pooled
+        connection of http_class."""
+        host = req.host
+        if not host:
+            raise URLError('no host given')
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items()
+                        if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+        tunnel_headers = {}
+        if req._tunnel_host:
+            proxy_auth_hdr = "Proxy-Authorization"
+            if proxy_auth_hdr in headers:
+                tunnel_headers[proxy_auth_hdr] = headers.pop(proxy_auth_hdr)
+        key = (req.type, host, req._tunnel_host,
+               id(http_conn_args.get('context')))
+        conn = self._pool.acquire(key)
+        while True:
+            reused = conn is not None
+            if conn is None:
+                conn = http_class(host, timeout=req.timeout, **http_conn_args)
+                conn.set_debuglevel(self._debuglevel)
+                if isinstance(conn, _PooledHTTPSConnection):
+                    conn._session = self._pool.session(key)
+                if req._tunnel_host:
+                    conn.set_tunnel(req._tunnel_host, headers=tunnel_headers)
+            try:
+                conn.request(req.get_method(), req.selector, req.data,
+                             headers,
+                             encode_chunked=req.has_header('Transfer-encoding'))
+            except (socket.error, http_client.HTTPException) as err:
+                conn.close()
+                if reused and rewind_body(req.data):
+                    # the server dropped the idle connection before the
+                    # request was sent, use a new one
+                    conn = None
+                    continue
+                if isinstance(err, socket.error):
+                    raise URLError(err)
+                raise
+            except:
+                conn.close()
+                raise
+            try:
+                resp = conn.getresponse()
+            except (socket.error, http_client.HTTPException):
+                conn.close()
+                # the request was sent: the server may have processed it
+                # before dropping the connection, only requests that can
+                # be sent twice are repeated
+                if reused and _is_idempotent(req) and rewind_body(req.data):
+                    conn = None
+                    continue
+                raise
+            except:
+                conn.close()
+                raise
+            break
+        pool = self._pool
+        def release(complete):
+            if complete and not resp.will_close:
+                pool.release(key, conn)
+            else:
+                conn.close()
+        resp._release = release
+        resp.url = req.get_full_url()
+        resp.msg = resp.reason
+        return resp
+########################################################################
+class KeepAliveHTTPHandler(_KeepAliveMixin, request.HTTPHandler):
+    """HTTP handler that keeps connections open between requests"""
+    #----------------------------------------------------------------------
+    def __init__(self, pool, debuglevel=0):
+        request.HTTPHandler.__init__(self, debuglevel=debuglevel)
+        self._pool = pool
+    #----------------------------------------------------------------------
+    def http_open(self, req):
+        return self._pooled_open(_PooledHTTPConnection, req)
+########################################################################
+class KeepAliveHTTPSHandler(_KeepAliveMixin, request.HTTPSHandler):
+    """HTTPS handler that keeps connections and TLS sessions between
+    requests"""
+    #----------------------------------------------------------------------
+    def __init__(self, pool, context=None, debuglevel=0):
+        if context is None:
+            context = ssl.create_default_context()
+        request.HTTPSHandler.__init__(self, debuglevel=debuglevel,
+                                      context=context)
+        self._pool = pool
+    #----------------------------------------------------------------------
+    def https_open(self, req):
+        return self._pooled_open(_PooledHTTPSConnection, req,
+                                 context=self._context)
+#----------------------------------------------------------------------
+default_pool = ConnectionPool()
@@ -0,0 +1,215 @@
+"""
+   Per host request pacing for the ArcREST web operations.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import time
+import threading
+from email.utils import parsedate_to_datetime
+
+_THROTTLE_CODES = (429, 503)
+#----------------------------------------------------------------------
+def parse_retry_after(value):
+    """
+    returns the seconds to wait from a Retry-After header value, which is
+    either a number of seconds or an HTTP date, or None
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when is None:
+        return None
+    return max(0.0, when.timestamp() - time.time())
+########################################################################
+class _HostState(object):
+    """token bucket and concurrency window of one host"""
+    __slots__ = ('tokens', 'refilled', 'in_flight', 'limit',
+                 'baseline', 'blocked_until')
+    #----------------------------------------------------------------------
+    def __init__(self, tokens, limit):
+        """Constructor"""
+        self.tokens = tokens
+        self.refilled = time.monotonic()
+        self.in_flight = 0
+        self.limit = limit
+        self.baseline = None
+        self.blocked_until = 0.0
+########################################################################
+class RateLimiter(object):
+    """
+    Paces the requests sent to each host.  A token bucket limits the
+    request rate and a concurrency window limits the requests in flight.
+    The window adapts AIMD style: it grows by one request per window of
+    fast responses and shrinks multiplicatively when the latency rises
+    well above the fastest observed latency, or halves when the server
+    throttles with 429/503.  A Retry-After header of a throttled response
+    holds back all requests to the host for the requested time.
+
+    The default limiter has no rate or concurrency limit and only honors
+    Retry-After.
+
+    Inputs:
+       rate - requests per second per host, None for no limit
+       burst - number of requests that may be sent at once before the
+          rate applies, defaults to rate
+       max_in_flight - maximum concurrent requests per host, None for no
+          limit
+       min_in_flight - the window never shrinks below this value
+       latency_tolerance - responses slower than this multiple of the
+          baseline latency shrink the window
+       max_retry_after - longest Retry-After wait in seconds that is
+          honored
+    """
+    _rate = None
+    _burst = None
+    _max_in_flight = None
+    _min_in_flight = None
+    _latency_tolerance = None
+    _max_retry_after = None
+    #----------------------------------------------------------------------
+    def __init__(self, rate=None, burst=None, max_in_flight=None,
+                 min_in_flight=1, latency_tolerance=2.0,
+                 max_retry_after=300):
+        """Constructor"""
+        self._rate = rate
+        self._burst = burst
+        self._max_in_flight = max_in_flight
+        self._min_in_flight = min_in_flight
+        self._latency_tolerance = latency_tolerance
+        self._max_retry_after = max_retry_after
+        self._hosts = {}
+        self._cond = threading.Condition()
+    #----------------------------------------------------------------------
+    @property
+    def rate(self):
+        """gets/sets the requests per second per host"""
+        return self._rate
+    #----------------------------------------------------------------------
+    @rate.setter
+    def rate(self, value):
+        """gets/sets the requests per second per host"""
+        if value is None or (isinstance(value, (int, float)) and value > 0):
+            with self._cond:
+                self._rate = value
+                self._cond.notify_all()
+    #----------------------------------------------------------------------
+    @property
+    def burst(self):
+        """gets the size of the token bucket"""
+        if self._burst is not None:
+            return self._burst
+        return max(1.0, self._rate or 1.0)
+    #----------------------------------------------------------------------
+    @property
+    def max_in_flight(self):
+        """gets/sets the maximum concurrent requests per host"""
+        return self._max_in_flight
+    #----------------------------------------------------------------------
+    @max_in_flight.setter
+    def max_in_flight(self, value):
+        """gets/sets the maximum concurrent requests per host"""
+        if value is None or (isinstance(value, int) and value > 0):
+            with self._cond:
+                self._max_in_flight = value
+                for state in self._hosts.values():
+                    state.limit = value
+                self._cond.notify_all()
+    #----------------------------------------------------------------------
+    def current_limit(self, host):
+        """returns the adapted concurrency window of a host"""
+        with self._cond:
+            state = self._hosts.get(host)
+            if state is None or state.limit is None:
+                return self._max_in_flight
+            return int(state.limit)
+    #----------------------------------------------------------------------
+    def _state(self, host):
+        """returns the state of a host, the lock must be held"""
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(tokens=self.burst,
+                               limit=self._max_in_flight)
+            self._hosts[host] = state
+        return state
+    #----------------------------------------------------------------------
+    def acquire(self, host):
+        """
+        blocks until a request may be sent to the host
+        Output:
+           the start time to pass to release()
+        """
+        with self._cond:
+            state = self._state(host)
+            while True:
+                now = time.monotonic()
+                if self._rate is not None:
+                    state.tokens = min(self.burst,
+                                       state.tokens + (now - state.refilled) * self._rate)
+                state.refilled = now
+                if state.blocked_until > now:
+                    wait = state.blocked_until - now
+                elif state.limit is not None and \
+                     state.in_flight >= max(int(state.limit), 1):
+                    wait = None
+                elif self._rate is not None and state.tokens < 1:
+                    wait = (1 - state.tokens) / self._rate
+                else:
+                    if self._rate is not None:
+                        state.tokens -= 1
+                    state.in_flight += 1
+                    return now
+                self._cond.wait(wait)
+    #----------------------------------------------------------------------
+    def release(self, host, started, code=None, retry_after=None):
+        """
+        reports the outcome of a request sent after acquire()
+        Inputs:
+           host - the host passed to acquire()
+           started - the value returned by acquire()
+           code - the HTTP status code or None when no response arrived
+           retry_after - value of the Retry-After response header
+        """
+        with self._cond:
+            now = time.monotonic()
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+            latency = now - started
+            if code in _THROTTLE_CODES:
+                if state.limit is not None:
+                    state.limit = max(self._min_in_flight, state.limit / 2.0)
+                wait = parse_retry_after(retry_after)
+                if wait is not None:
+                    wait = min(wait, self._max_retry_after)
+                    state.blocked_until = max(state.blocked_until, now + wait)
+            elif code is not None:
+                if state.baseline is None or latency < state.baseline:
+                    state.baseline = latency
+                else:
+                    # let the baseline follow slow, lasting changes
+                    state.baseline += (latency - state.baseline) * 0.05
+                if state.limit is not None:
+                    # small absolute differences are network jitter
+                    if latency > state.baseline * self._latency_tolerance and \
+                       latency - state.baseline > 0.05:
+                        state.limit = max(self._min_in_flight,
+                                          state.limit * 0.9)
+                    else:
+                        state.limit = min(self._max_in_flight,
+                                          state.limit + 1.0 / state.limit)
+            self._cond.notify_all()
+    #----------------------------------------------------------------------
+    def reset(self):
+        """forgets the state of all hosts"""
+        with self._cond:
+            self._hosts = {}
+            self._cond.notify_all()
+#----------------------------------------------------------------------
+default_limiter = RateLimiter()
@@ -0,0 +1,120 @@
+"""
+   Retry policy for transient failures of the ArcREST web operations.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import ssl
+import socket
+import random
+
+from ..packages.six.moves import http_client
+from ..packages.six.moves.urllib.error import URLError, HTTPError
+from ..packages.six.moves.urllib_parse import urlsplit
+from ._ratelimit import parse_retry_after
+
+_IDEMPOTENT_OPERATIONS = frozenset([
+    'query', 'queryrelatedrecords', 'queryattachments', 'querydomains',
+    'querytopfeatures', 'generatetoken', 'identify', 'find', 'search',
+    'mapserver/export', 'exportimage', 'getsamples', 'computehistograms'])
+########################################################################
+class RetryPolicy(object):
+    """
+    Describes when and how often a failed request is sent again.  Only
+    requests that can safely be repeated are retried: every GET, and POSTs
+    to read only operations (query, generateToken, search, ...) or plain
+    ?f=json resource loads.  Edits, uploads and other POSTs are never
+    retried.  Between two attempts the policy waits an exponentially
+    growing, randomly jittered time, or the server's Retry-After value
+    when it is longer.
+
+    Inputs:
+       max_attempts - total number of attempts, 1 disables retries
+       backoff - seconds to wait before the first retry, doubled for
+          every following one
+       max_backoff - upper bound of the wait between two attempts
+       jitter - if True, the wait is drawn at random between 0 and the
+          backoff ("full jitter") so many clients don't retry in step
+       status_codes - HTTP status codes that are retried
+       idempotent_operations - names of the REST operations (last part of
+          the url, case insensitive) whose POSTs may be retried.  A name
+          with slashes matches the last parts of the url, e.g.
+          "mapserver/export" but not the export of a portal item.
+    """
+    _max_attempts = None
+    _backoff = None
+    _max_backoff = None
+    _jitter = None
+    _status_codes = None
+    _idempotent_operations = None
+    #----------------------------------------------------------------------
+    def __init__(self, max_attempts=3, backoff=0.5, max_backoff=30,
+                 jitter=True, status_codes=(429, 500, 502, 503, 504),
+                 idempotent_operations=_IDEMPOTENT_OPERATIONS):
+        """Constructor"""
+        self._max_attempts = max(1, int(max_attempts))
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._jitter = jitter
+        self._status_codes = frozenset(status_codes)
+        self._idempotent_operations = frozenset(
+            op.lower() for op in idempotent_operations)
+    #----------------------------------------------------------------------
+    @property
+    def max_attempts(self):
+        """gets the total number of attempts"""
+        return self._max_attempts
+    #----------------------------------------------------------------------
+    @property
+    def status_codes(self):
+        """gets the HTTP status codes that are retried"""
+        return self._status_codes
+    #----------------------------------------------------------------------
+    @property
+    def idempotent_operations(self):
+        """gets the operations whose POSTs may be retried"""
+        return self._idempotent_operations
+    #----------------------------------------------------------------------
+    def is_idempotent(self, method, url, param_dict=None):
+        """returns True when the request can safely be sent twice"""
+        if method.upper() in ("GET", "HEAD"):
+            return True
+        parts = urlsplit(url).path.rstrip('/').lower().split('/')
+        for operation in self._idempotent_operations:
+            if '/'.join(parts[-(operation.count('/') + 1):]) == operation:
+                return True
+        if param_dict and \
+           not set(param_dict.keys()) - set(['f', 'token']) and \
+           str(param_dict.get('f', '')).lower() in ('json', 'pjson'):
+            return True
+        return False
+    #----------------------------------------------------------------------
+    def retryable(self, error):
+        """returns True when the error is transient"""
+        if isinstance(error, HTTPError):
+            return error.code in self._status_codes
+        if isinstance(error, URLError):
+            reason = error.reason
+            # certificate and protocol errors will fail again
+            return isinstance(reason, (OSError, socket.timeout)) and \
+                   not isinstance(reason, ssl.SSLError)
+        if isinstance(error, ssl.SSLError):
+            return False
+        return isinstance(error, (http_client.HTTPException,
+                                  ConnectionError,
+                                  socket.timeout))
+    #----------------------------------------------------------------------
+    def delay(self, attempt, error=None):
+        """
+        returns the seconds to wait after the given failed attempt
+        (counting from 1)
+        """
+        wait = min(self._max_backoff, self._backoff * (2 ** (attempt - 1)))
+        if self._jitter:
+            wait = random.uniform(0, wait)
+        if isinstance(error, HTTPError) and error.headers is not None:
+            retry_after = parse_retry_after(error.headers.get('Retry-After'))
+            if retry_after is not None:
+                wait = max(wait, min(retry_after, self._max_backoff))
+        return wait
+#----------------------------------------------------------------------
+default_retry = RetryPolicy()
@@ -0,0 +1,107 @@
+"""
+   Coalescing of identical in-flight GET requests.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import copy
+import threading
+
+########################################################################
+class _Call(object):
+    """an in-flight call shared by a leader and its followers"""
+    __slots__ = ('done', 'result', 'error', 'followers')
+    #----------------------------------------------------------------------
+    def __init__(self):
+        """Constructor"""
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+########################################################################
+class SingleFlight(object):
+    """
+    Makes sure only one of several identical requests is on the wire at a
+    time.  The first caller (the leader) performs the request, callers that
+    ask for the same key while it is running wait for the leader and get a
+    copy of its result, or the same exception.  Nothing is kept once the
+    leader has finished, so this is not a cache.
+
+    Usage:
+    >>> flight = SingleFlight()
+    >>> flight.do(key, lambda: layer._get(url, {"f" : "json"}))
+    """
+    _enabled = True
+    #----------------------------------------------------------------------
+    def __init__(self):
+        """Constructor"""
+        self._lock = threading.Lock()
+        self._calls = {}
+    #----------------------------------------------------------------------
+    @property
+    def enabled(self):
+        """gets/sets if identical requests are coalesced"""
+        return self._enabled
+    #----------------------------------------------------------------------
+    @enabled.setter
+    def enabled(self, value):
+        """gets/sets if identical requests are coalesced"""
+        self._enabled = bool(value)
+    #----------------------------------------------------------------------
+    @property
+    def in_flight(self):
+        """gets the number of keys currently being requested"""
+        with self._lock:
+            return len(self._calls)
+    #----------------------------------------------------------------------
+    def key(self, url, param_dict=None, identity=None, *extra):
+        """
+        returns the key of a request.  The token is left out, the identity
+        of the credentials keeps the requests of different users apart.
+        """
+        params = []
+        if param_dict:
+            params = sorted(((k, v) for k, v in param_dict.items()
+                             if k != 'token'), key=lambda kv: kv[0])
+        return repr((url, params, identity) + extra)
+    #----------------------------------------------------------------------
+    def do(self, key, func):
+        """
+        calls func() unless a call for key is already running, in which
+        case the running call's result is waited for.
+        Inputs:
+           key - the request key, see key()
+           func - callable performing the request
+        Output:
+           (result, shared) where shared is True for followers
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.followers += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result), True
+        result = None
+        try:
+            result = func()
+        except BaseException as err:
+            call.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                followers = call.followers
+            if followers and call.error is None:
+                # the leader's caller may change its result, so followers
+                # copy a snapshot taken before it is handed out
+                call.result = copy.deepcopy(result)
+            call.done.set()
+        return result, False
+#----------------------------------------------------------------------
+default_flight = SingleFlight()
@@ -0,0 +1,143 @@
+"""
+   Incremental JSON decoding of large ArcGIS REST responses.
+"""
+from __future__ import absolute_import
+from __future__ import print_function
+import re
+import json
+import codecs
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+########################################################################
+class FeatureStream(object):
+    """
+    Incrementally decodes a JSON response and yields the elements of one
+    of its top level arrays (by default 'features') as they arrive, so the
+    whole document is never held in memory.  All other top level members
+    (fields, spatialReference, exceededTransferLimit, ...) are decoded into
+    the header property as they are encountered.
+
+    Inputs:
+       chunks - iterable of bytes, ex: the pieces of a web response
+       key - name of the top level array to stream
+       encoding - character encoding of the response
+    Usage:
+    >>> stream = layer._post(url, params, stream=True)
+    >>> for feature in stream:
+    ...     print(feature['attributes'])
+    >>> print(stream.header.get('exceededTransferLimit'))
+    """
+    _key = None
+    _header = None
+    #----------------------------------------------------------------------
+    def __init__(self, chunks, key="features", encoding="utf-8"):
+        """Constructor"""
+        self._chunks = iter(chunks)
+        self._key = key
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder(encoding)()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._started = False
+        self._header = {}
+    #----------------------------------------------------------------------
+    @property
+    def key(self):
+        """gets the name of the streamed array"""
+        return self._key
+    #----------------------------------------------------------------------
+    @property
+    def header(self):
+        """
+        gets the top level members other than the streamed array.  Members
+        that follow the array are only present once the stream has been
+        consumed.
+        """
+        return self._header
+    #----------------------------------------------------------------------
+    def _fill(self):
+        """reads the next chunk into the buffer, returns False at the end"""
+        if self._eof:
+            return False
+        try:
+            data = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            data = b""
+        self._buf = self._buf[self._pos:] + \
+            self._text.decode(data, final=self._eof)
+        self._pos = 0
+        return True
+    #----------------------------------------------------------------------
+    def _peek(self):
+        """skips white space and returns the next character or None"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return None
+    #----------------------------------------------------------------------
+    def _expect(self, char):
+        """consumes the expected character"""
+        found = self._peek()
+        if found != char:
+            raise ValueError("Expecting '%s' but found %r" % (char, found))
+        self._pos += 1
+    #----------------------------------------------------------------------
+    def _value(self):
+        """decodes the next complete JSON value from the buffer"""
+        while True:
+            self._peek()
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if self._fill():
+                    continue
+                raise
+            if end >= len(self._buf) and self._fill():
+                # a number could continue in the next chunk
+                continue
+            self._pos = end
+            return value
+    #----------------------------------------------------------------------
+    def _drain(self):
+        """reads the rest of the response so the connection is released"""
+        for _ in self._chunks:
+            pass
+        self._eof = True
+    #----------------------------------------------------------------------
+    def __iter__(self):
+        """yields the elements of the streamed array"""
+        if self._started:
+            raise ValueError("the stream can only be iterated once")
+        self._started = True
+        self._expect('{')
+        while True:
+            char = self._peek()
+            if char == '}':
+                break
+            elif char == ',':
+                self._pos += 1
+                continue
+            elif char is None:
+                raise ValueError("Unterminated JSON object")
+            key = self._value()
+            self._expect(':')
+            if key == self._key and self._peek() == '[':
+                self._pos += 1
+                while True:
+                    char = self._peek()
+                    if char == ']':
+                        self._pos += 1
+                        break
+                    elif char == ',':
+                        self._pos += 1
+                    elif char is None:
+                        raise ValueError("Unterminated JSON array")
+                    else:
+                        yield self._value()
+            else:
+                self._header[key] = self._value()
+        self._drain()
@@ -4,7 +4,7 @@
 from __future__ import absolute_import
 from __future__ import print_function
 from .._abstract.abstract import BaseDomain
-import json
+from ..web import _json as json
 
 ########################################################################
 class RangeDomain(BaseDomain):
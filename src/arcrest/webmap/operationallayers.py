@@ -2,7 +2,7 @@ from __future__ import absolute_import
 from __future__ import print_function
 from .._abstract.abstract import BaseOperationalLayer
 from ..common.general import _date_handler, _unicode_convert
-import json
+from ..web import _json as json
 
 
 ########################################################################
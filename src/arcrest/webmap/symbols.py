@@ -2,7 +2,7 @@ from __future__ import absolute_import
 from __future__ import print_function
 from .._abstract.abstract import BaseSymbol
 import os
-import json
+from ..web import _json as json
 import base64
 
 ########################################################################
@@ -0,0 +1,37 @@
+# coding: utf-8
+"""
+   Tests of the lazy Feature object (arcrest.common.general.Feature).
+"""
+import unittest
+
+from arcrest.common.general import Feature
+
+
+class FeatureTests(unittest.TestCase):
+
+    def test_wrapped_feature_is_unwrapped(self):
+        feature = Feature({"feature": {"attributes": {"OID": 1},
+                                       "geometry": {"x": 1, "y": 2}}})
+        self.assertEqual({"attributes": {"OID": 1},
+                          "geometry": {"x": 1, "y": 2}},
+                         feature.asDictionary)
+
+    def test_changes_to_the_dictionary_reach_the_json(self):
+        feature = Feature({"attributes": {"OID": 1, "NAME": "a"},
+                           "geometry": {"x": 1, "y": 2}}, wkid=4326)
+        self.assertIn('"NAME":"a"', feature.asJSON.replace(" ", ""))
+        value = feature.asDictionary
+        value["attributes"]["NAME"] = "b"
+        self.assertIn('"NAME":"b"', feature.asJSON.replace(" ", ""))
+        self.assertEqual({"wkid": 4326},
+                         value["geometry"]["spatialReference"])
+
+    def test_set_value_drops_the_json(self):
+        feature = Feature({"attributes": {"OID": 1, "NAME": "a"}})
+        self.assertIn('"NAME":"a"', feature.asJSON.replace(" ", ""))
+        self.assertTrue(feature.set_value("NAME", "c"))
+        self.assertIn('"NAME":"c"', feature.asJSON.replace(" ", ""))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+# coding: utf-8
+"""
+   Tests of the f=pbf decoder (arcrest.common.pbf) on hand encoded
+   FeatureCollectionPBuffer messages.
+"""
+import struct
+import unittest
+
+from arcrest.common import pbf
+from arcrest.agol.services import FeatureLayer
+
+
+def varint(value):
+    value &= (1 << 64) - 1
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+
+def field(number, payload):
+    """length delimited field"""
+    return varint(number << 3 | 2) + varint(len(payload)) + payload
+
+
+def uint(number, value):
+    return varint(number << 3) + varint(value)
+
+
+def double(number, value):
+    return varint(number << 3 | 1) + struct.pack("<d", value)
+
+
+def text(number, value):
+    return field(number, value.encode("utf-8"))
+
+
+def geometry(lengths, deltas):
+    packed = b"".join(varint(length) for length in lengths)
+    coords = b"".join(varint(zigzag(value)) for value in deltas)
+    return field(2, packed) + field(3, coords)
+
+
+def collection(message):
+    """wraps a QueryResult message in a FeatureCollectionPBuffer"""
+    return text(1, "1.0") + field(2, message)
+
+
+def polygons():
+    """two polygons, the first with two rings, quantized upperLeft"""
+    transform = (uint(1, 0) +
+                 field(2, double(1, 0.5) + double(2, 0.25)) +
+                 field(3, double(1, 100.0) + double(2, 200.0)))
+    result = (text(1, "OID") + uint(7, 3) +
+              field(8, uint(1, 102100) + uint(2, 3857)) +
+              field(12, transform) +
+              field(13, text(1, "OID") + uint(2, 6)) +
+              field(13, text(1, "NAME") + uint(2, 4)) +
+              field(13, text(1, "DEPTH") + uint(2, 1)) +
+              field(13, text(1, "AREA") + uint(2, 3)))
+    # deltas run on from one ring to the next within a geometry
+    first = geometry([4, 3], [0, 0, 300, 0, 0, 300, -300, -300,
+                              100, 100, 100, 0, -100, 0])
+    # multi-byte varints, the deltas start again from zero
+    second = geometry([3], [100000, 5, 1, -70005, -1, 70005])
+    for oid, name, depth, area, shape in ((1, u"é", -3, 2.5, first),
+                                          (300, u"b", 70000, -1.25, second)):
+        attributes = (field(1, uint(6, oid)) + field(1, text(1, name)) +
+                      field(1, uint(8, zigzag(depth))) +
+                      field(1, double(3, area)))
+        result += field(15, attributes + field(2, shape))
+    return collection(field(1, result))
+
+
+class PbfDecodeTests(unittest.TestCase):
+    RINGS = [[[[100.0, 200.0], [250.0, 200.0], [250.0, 125.0],
+               [100.0, 200.0]],
+              [[150.0, 175.0], [200.0, 175.0], [150.0, 175.0]]],
+             [[[50100.0, 198.75], [50100.5, 17700.0], [50100.0, 198.75]]]]
+
+    def _check_polygons(self):
+        result = pbf.decode(polygons())
+        self.assertEqual("OID", result["objectIdFieldName"])
+        self.assertEqual("esriGeometryPolygon", result["geometryType"])
+        self.assertEqual({"wkid": 102100, "latestWkid": 3857},
+                         result["spatialReference"])
+        self.assertEqual(["esriFieldTypeOID", "esriFieldTypeString",
+                          "esriFieldTypeInteger", "esriFieldTypeDouble"],
+                         [f["type"] for f in result["fields"]])
+        self.assertEqual([{"OID": 1, "NAME": u"é", "DEPTH": -3, "AREA": 2.5},
+                          {"OID": 300, "NAME": u"b", "DEPTH": 70000,
+                           "AREA": -1.25}],
+                         [f["attributes"] for f in result["features"]])
+        self.assertEqual(self.RINGS,
+                         [f["geometry"]["rings"] for f in result["features"]])
+
+    def test_features_numpy(self):
+        if not pbf.numpyFound:
+            self.skipTest("NumPy is not installed")
+        self._check_polygons()
+
+    def test_features_pure_python(self):
+        found = pbf.numpyFound
+        pbf.numpyFound = False
+        try:
+            self._check_polygons()
+        finally:
+            pbf.numpyFound = found
+
+    def test_count(self):
+        self.assertEqual({"count": 123456},
+                         pbf.decode(collection(field(2, uint(1, 123456)))))
+
+    def test_object_ids(self):
+        ids = b"".join(varint(oid) for oid in (1, 300, 70000))
+        message = field(3, text(1, "OBJECTID") + field(3, ids))
+        self.assertEqual({"objectIdFieldName": "OBJECTID",
+                          "objectIds": [1, 300, 70000]},
+                         pbf.decode(collection(message)))
+
+
+class PbfQueryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.posts = []
+        layer = object.__new__(FeatureLayer)
+        layer._url = "https://example.com/FeatureServer/0"
+        layer._securityHandler = None
+        layer._proxy_url = layer._proxy_port = None
+        layer._supportedQueryFormats = "JSON, geoJSON, PBF"
+        layer._extent = {"xmin": 0, "ymin": 0, "xmax": 1, "ymax": 1,
+                         "spatialReference": {"wkid": 4283}}
+
+        def post(url, param_dict, **kwargs):
+            self.posts.append(dict(param_dict))
+            return {"features": []}
+        layer._post = post
+        self.layer = layer
+
+    def test_json_by_default(self):
+        self.layer.query(as_json=True)
+        self.assertEqual("json", self.posts[0]["f"])
+        self.assertNotIn("quantizationParameters", self.posts[0])
+
+    def test_pbf_is_not_quantized_implicitly(self):
+        self.layer.query(as_json=True, use_pbf=True)
+        self.assertEqual("pbf", self.posts[0]["f"])
+        self.assertNotIn("quantizationParameters", self.posts[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# coding: utf-8
+"""
+   Tests of the local projection of query results
+   (arcrest.common.projection and FeatureLayer.query(local_projection)).
+"""
+import unittest
+
+from arcrest.common import projection
+from arcrest.agol.services import FeatureLayer
+
+
+def _layer():
+    """FeatureLayer with a WGS84 extent, no request is made"""
+    layer = object.__new__(FeatureLayer)
+    layer._extent = {"xmin": -180, "ymin": -90, "xmax": 180, "ymax": 90,
+                     "spatialReference": {"wkid": 4326}}
+    return layer
+
+
+@unittest.skipUnless(projection.numpyFound, "NumPy is not installed")
+class ProjectionTests(unittest.TestCase):
+
+    def test_web_mercator(self):
+        xy = projection.project_coordinates([[10, 10], [0, 0]], 4326, 3857)
+        self.assertAlmostEqual(1113194.9079327357, xy[0][0], places=6)
+        self.assertAlmostEqual(1118889.9748579597, xy[0][1], places=6)
+        self.assertAlmostEqual(0.0, xy[1][0], places=6)
+        self.assertAlmostEqual(0.0, xy[1][1], places=6)
+
+    def test_utm_round_trip(self):
+        points = [[-117.0, 0.0], [-116.5, 34.25], [-118.9, 48.0]]
+        xy = projection.project_coordinates(points, 4326, 32611)
+        # on the central meridian of the zone, at the equator
+        self.assertAlmostEqual(500000.0, xy[0][0], places=6)
+        self.assertAlmostEqual(0.0, xy[0][1], places=6)
+        back = projection.project_coordinates(xy, 32611, 4326)
+        for point, result in zip(points, back):
+            self.assertAlmostEqual(point[0], result[0], places=9)
+            self.assertAlmostEqual(point[1], result[1], places=9)
+
+    def test_datum_change_is_not_supported(self):
+        self.assertFalse(projection.supported(4326, 4269))
+        self.assertFalse(projection.supported(None, 3857))
+        self.assertTrue(projection.supported({"wkid": 102100}, 32611))
+
+    def test_project_response(self):
+        response = {"spatialReference": {"wkid": 4326},
+                    "features": [{"geometry": {"x": 10, "y": 10}},
+                                 {"geometry": None}]}
+        projection.project_response(response, 3857)
+        self.assertEqual({"wkid": 102100, "latestWkid": 3857},
+                         response["spatialReference"])
+        self.assertAlmostEqual(1113194.9079327357,
+                               response["features"][0]["geometry"]["x"],
+                               places=6)
+        self.assertIsNone(response["features"][1]["geometry"])
+
+    def test_local_out_sr(self):
+        layer = _layer()
+        self.assertEqual(3857, layer._local_out_sr({"outSR": 3857}))
+        self.assertIsNone(layer._local_out_sr({"outSR": 3857,
+                                               "returnGeometry": False}))
+        self.assertIsNone(layer._local_out_sr({"outSR": 3857,
+                                               "returnGeometry": "false"}))
+        self.assertIsNone(layer._local_out_sr({"outSR": 4269}))
+        self.assertIsNone(layer._local_out_sr({"outSR": 3857,
+                                               "returnTrueCurves": True}))
+
+    def test_results_without_geometries_are_kept(self):
+        result = {"features": [{"attributes": {"OID": 1}}]}
+        self.assertTrue(_layer()._project_result(result, 3857))
+        self.assertEqual({"features": [{"attributes": {"OID": 1}}]}, result)
+
+    def test_curves_are_projected_by_the_server(self):
+        curve = {"curveRings": [[[0, 0], {"c": [[2, 0], [1, 1]]}, [0, 0]]]}
+        result = {"spatialReference": {"wkid": 4326},
+                  "features": [{"geometry": {"x": 1, "y": 1}},
+                               {"geometry": curve}]}
+        self.assertFalse(_layer()._project_result(result, 3857))
+        # left untouched for the server's answer
+        self.assertEqual({"x": 1, "y": 1}, result["features"][0]["geometry"])
+
+    def test_query_with_curves_asks_the_server(self):
+        layer = _layer()
+        layer._url = "https://example.com/FeatureServer/0"
+        layer._securityHandler = None
+        layer._proxy_url = layer._proxy_port = None
+        posts = []
+
+        def post(url, param_dict, **kwargs):
+            posts.append(dict(param_dict))
+            if "outSR" in param_dict:
+                return {"spatialReference": {"wkid": 102100},
+                        "features": [{"geometry": {"curveRings": []}}]}
+            return {"spatialReference": {"wkid": 4326},
+                    "features": [{"geometry": {"curveRings": []}}]}
+        layer._post = post
+        result = layer.query(outSR=3857, as_json=True)
+        self.assertEqual([False, True], ["outSR" in p for p in posts])
+        self.assertEqual({"wkid": 102100}, result["spatialReference"])
+        posts[:] = []
+        layer.query(outSR=3857, returnTrueCurves=True, as_json=True)
+        self.assertEqual([True], ["outSR" in p for p in posts])
+
+
+if __name__ == "__main__":
+    unittest.main()
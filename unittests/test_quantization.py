@@ -0,0 +1,107 @@
+# coding: utf-8
+"""
+   Tests of the decoder of quantized, delta encoded query responses
+   (arcrest.common.quantization).
+"""
+import copy
+import unittest
+
+from arcrest.common import quantization
+
+RESPONSE = {
+    "transform": {"originPosition": "upperLeft",
+                  "scale": [0.5, 0.25, 0, 0],
+                  "translate": [100, 200, 0, 0]},
+    "features": [
+        # each ring starts from the grid origin again
+        {"attributes": {"OID": 1},
+         "geometry": {"rings": [[[0, 0], [300, 0], [0, 300], [-300, -300]],
+                                [[100, 100], [100, 0], [-100, 0]]]}},
+        # Z values are not quantized
+        {"attributes": {"OID": 2},
+         "geometry": {"paths": [[[10, 20, 5], [1, -1, 6]]]}},
+        {"attributes": {"OID": 3}, "geometry": {"x": 4, "y": 8}},
+        {"attributes": {"OID": 4}, "geometry": {"points": [[2, 2], [2, 2]]}},
+        {"attributes": {"OID": 5}, "geometry": None}]}
+
+GEOMETRIES = [
+    {"rings": [[[100.0, 200.0], [250.0, 200.0], [250.0, 125.0],
+                [100.0, 200.0]],
+               [[150.0, 175.0], [200.0, 175.0], [150.0, 175.0]]]},
+    {"paths": [[[105.0, 195.0, 5], [105.5, 195.25, 6]]]},
+    {"x": 102.0, "y": 198.0},
+    {"points": [[101.0, 199.5], [102.0, 199.0]]},
+    None]
+
+
+class DecodeResponseTests(unittest.TestCase):
+
+    def _check(self):
+        result = quantization.decode_response(copy.deepcopy(RESPONSE))
+        self.assertNotIn("transform", result)
+        self.assertEqual(GEOMETRIES,
+                         [f["geometry"] for f in result["features"]])
+
+    def test_upper_left_numpy(self):
+        if not quantization.numpyFound:
+            self.skipTest("NumPy is not installed")
+        self._check()
+
+    def test_upper_left_pure_python(self):
+        found = quantization.numpyFound
+        quantization.numpyFound = False
+        try:
+            self._check()
+        finally:
+            quantization.numpyFound = found
+
+    def test_bottom_left(self):
+        response = {"transform": {"originPosition": "bottomLeft",
+                                  "scale": [2, 2], "translate": [10, 10]},
+                    "features": [{"geometry": {"paths": [[[1, 1], [1, 2]]]}}]}
+        result = quantization.decode_response(response)
+        self.assertEqual([[[12.0, 12.0], [14.0, 16.0]]],
+                         result["features"][0]["geometry"]["paths"])
+
+    def test_without_transform(self):
+        response = {"features": [{"geometry": {"x": 1, "y": 2}}]}
+        self.assertEqual({"features": [{"geometry": {"x": 1, "y": 2}}]},
+                         quantization.decode_response(response))
+
+
+class EditToleranceTests(unittest.TestCase):
+
+    @staticmethod
+    def _tolerance(sr):
+        extent = {"xmin": 0, "ymin": 0, "xmax": 1, "ymax": 1,
+                  "spatialReference": sr}
+        return quantization.QuantizationParameters.forEdit(extent).tolerance
+
+    def test_geographic_references_are_in_degrees(self):
+        # GDA94 and an ESRI geographic id, not only WGS84 and NAD83
+        for sr in ({"wkid": 4326}, {"wkid": 4283}, {"wkid": 104199},
+                   {"wkt": 'GEOGCS["GCS_GDA_1994",DATUM["D_GDA_1994",'
+                           'SPHEROID["GRS_1980",6378137.0,298.257222101]],'
+                           'PRIMEM["Greenwich",0.0],'
+                           'UNIT["Degree",0.0174532925199433]]'}):
+            self.assertAlmostEqual(8.983e-9, self._tolerance(sr), places=11)
+
+    def test_projected_references_use_their_linear_unit(self):
+        self.assertEqual(0.001, self._tolerance({"wkid": 3857}))
+        feet = {"wkt": 'PROJCS["NAD_1983_StatePlane_California_VI_FIPS_0406'
+                       '_Feet",GEOGCS["GCS_North_American_1983",'
+                       'UNIT["Degree",0.0174532925199433]],'
+                       'PROJECTION["Lambert_Conformal_Conic"],'
+                       'UNIT["Foot_US",0.3048006096012192]]'}
+        self.assertAlmostEqual(0.001 / 0.3048006096012192,
+                               self._tolerance(feet), places=12)
+
+    def test_given_tolerance_is_kept(self):
+        extent = {"xmin": 0, "ymin": 0, "xmax": 1, "ymax": 1,
+                  "spatialReference": {"wkid": 4283}}
+        parameters = quantization.QuantizationParameters.forEdit(extent, 0.5)
+        self.assertEqual(0.5, parameters.tolerance)
+
+
+if __name__ == "__main__":
+    unittest.main()
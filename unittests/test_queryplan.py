@@ -0,0 +1,192 @@
+# coding: utf-8
+"""
+   Tests of the query planner (arcrest.agol._queryplan) against an in
+   memory layer that truncates its answers like a feature service.
+"""
+import re
+import json
+import unittest
+
+from arcrest.agol import _queryplan
+
+_RANGE = re.compile(r"OID >= (\d+) AND OID < (\d+)")
+
+
+class FakeLayer(object):
+    """
+    in memory layer answering the query parameters used by the planner.
+    Features without orderByFields are returned in a scrambled order, as
+    a server may, and at most maxRecordCount at once.
+    """
+
+    def __init__(self, oids, maxRecordCount=100, scrambled=True, **info):
+        self.oids = sorted(oids)
+        self.limit = maxRecordCount
+        self.scrambled = scrambled
+        self.requests = []
+        self._json_dict = {"maxRecordCount": maxRecordCount,
+                           "objectIdField": "OID",
+                           "extent": {"xmin": 0, "ymin": 0,
+                                      "xmax": 100, "ymax": 100,
+                                      "spatialReference": {"wkid": 3857}}}
+        self._json_dict.update(info)
+
+    @staticmethod
+    def position(oid):
+        return (oid * 37) % 1000 / 10.0, (oid * 91) % 1000 / 10.0
+
+    def _select(self, kwargs):
+        oids = self.oids
+        if kwargs.get("objectIds"):
+            wanted = set(int(oid) for oid in kwargs["objectIds"].split(","))
+            return [oid for oid in oids if oid in wanted]
+        where = kwargs.get("where") or "1=1"
+        for start, end in _RANGE.findall(where):
+            oids = [oid for oid in oids if int(start) <= oid < int(end)]
+        geometryFilter = kwargs.get("geometryFilter")
+        if geometryFilter:
+            box = json.loads(geometryFilter["geometry"])
+            oids = [oid for oid in oids
+                    if box["xmin"] <= self.position(oid)[0] <= box["xmax"] and
+                    box["ymin"] <= self.position(oid)[1] <= box["ymax"]]
+        return oids
+
+    def query(self, **kwargs):
+        self.requests.append(kwargs)
+        oids = self._select(kwargs)
+        if kwargs.get("returnCountOnly"):
+            return {"count": len(oids)}
+        if kwargs.get("returnIDsOnly"):
+            return {"objectIdFieldName": "OID", "objectIds": list(oids)}
+        if kwargs.get("outStatistics"):
+            values = {}
+            for statistic in json.loads(kwargs["outStatistics"]):
+                kind = statistic["statisticType"]
+                value = len(oids) if kind == "count" else \
+                    (min(oids) if kind == "min" else max(oids)) if oids \
+                    else None
+                values[statistic["outStatisticFieldName"].lower()] = value
+            return {"features": [{"attributes": values}]}
+        if not kwargs.get("orderByFields") and self.scrambled:
+            oids = sorted(oids, key=lambda oid: (oid * 7919) % 104729)
+        offset = kwargs.get("resultOffset") or 0
+        size = min(kwargs.get("resultRecordCount") or self.limit, self.limit)
+        page = oids[offset:offset + size]
+        result = {"objectIdFieldName": "OID",
+                  "features": [{"attributes": {"OID": oid},
+                                "geometry": dict(zip("xy",
+                                                     self.position(oid)))}
+                               for oid in page]}
+        if len(oids) > offset + size:
+            result["exceededTransferLimit"] = True
+        return result
+
+
+def _features(layer, strategy=None, **kwargs):
+    query = {"where": "1=1", "out_fields": "*", "timeFilter": None,
+             "geometryFilter": None}
+    plan = _queryplan.plan_query(layer, query, strategy=strategy, **kwargs)
+    result = plan.execute()
+    return plan, [f["attributes"]["OID"] for f in result["features"]]
+
+
+class QueryPlanTests(unittest.TestCase):
+    # dense and sparse object IDs with a gap
+    OIDS = list(range(1, 1201)) + list(range(50000, 51500, 3))
+
+    def test_strategy_choice(self):
+        query = {"where": "1=1"}
+        for info, strategy in (({"supportsPagination": True,
+                                 "supportsStatistics": True}, "offset"),
+                               ({"supportsStatistics": True}, "oid_range"),
+                               ({}, "oid_list")):
+            plan = _queryplan.plan_query(FakeLayer(self.OIDS, **info), query)
+            self.assertEqual(strategy, plan.strategy)
+            self.assertEqual(len(self.OIDS), plan.count)
+            self.assertIn("strategy: %s" % strategy, plan.explain())
+
+    def test_single_page(self):
+        layer = FakeLayer(range(1, 51))
+        plan, oids = _features(layer)
+        self.assertEqual("single", plan.strategy)
+        self.assertEqual(list(range(1, 51)), oids)
+
+    def test_offset_pages(self):
+        layer = FakeLayer(self.OIDS, supportsPagination=True)
+        plan, oids = _features(layer)
+        self.assertEqual("offset", plan.strategy)
+        self.assertEqual(self.OIDS, oids)
+        self.assertEqual(len(self.OIDS), plan.statistics["features"])
+
+    def test_oid_list_batches(self):
+        layer = FakeLayer(self.OIDS)
+        plan, oids = _features(layer)
+        self.assertEqual("oid_list", plan.strategy)
+        self.assertEqual(self.OIDS, oids)
+        self.assertEqual(17, len(plan.requests()))
+        self.assertEqual(",".join(str(oid) for oid in self.OIDS[-100:]),
+                         plan.requests()[-1]["objectIds"])
+
+    def test_oid_range_refines_dense_ranges(self):
+        for orderBy in (True, False):
+            layer = FakeLayer(self.OIDS, supportsStatistics=True,
+                              supportsOrderBy=orderBy)
+            plan, oids = _features(layer)
+            self.assertEqual("oid_range", plan.strategy)
+            self.assertEqual(self.OIDS, oids)
+            self.assertEqual(1.0, plan.statistics["coverage"])
+            self.assertGreater(plan.statistics["refined ranges"], 0)
+            self.assertFalse(any(r.get("returnIDsOnly")
+                                 for r in layer.requests))
+
+    def test_oid_range_keeps_the_first_ids_of_a_truncated_page(self):
+        # ordered by the server, or in storage order verified by a count
+        for orderBy, scrambled in ((True, True), (False, False)):
+            layer = FakeLayer(self.OIDS, supportsStatistics=True,
+                              supportsOrderBy=orderBy, scrambled=scrambled)
+            plan, oids = _features(layer)
+            self.assertEqual(self.OIDS, oids)
+            pages = [r for r in layer.requests
+                     if not r.get("returnCountOnly") and
+                     not r.get("outStatistics")]
+            self.assertEqual(len(pages), plan.statistics["pages"])
+
+    def test_oid_range_requests_follow_the_data(self):
+        layer = FakeLayer(range(1, 20001), maxRecordCount=1000,
+                          supportsStatistics=True)
+        plan, oids = _features(layer)
+        self.assertEqual(list(range(1, 20001)), oids)
+        # count, statistics and one request per range of 700 features
+        self.assertEqual(2 + 29, len(layer.requests))
+        self.assertEqual(0, plan.statistics["refined ranges"])
+
+    def test_tiles_split_until_pages_fit(self):
+        layer = FakeLayer(self.OIDS)
+        plan, oids = _features(layer, strategy="tiles")
+        self.assertEqual("tiles", plan.strategy)
+        self.assertEqual(self.OIDS, oids)
+        self.assertGreater(plan.statistics["split tiles"], 0)
+        self.assertGreaterEqual(plan.statistics["duplicates"], 0)
+        self.assertEqual(1.0, plan.statistics["coverage"])
+
+    def test_iter_pages_sequential(self):
+        layer = FakeLayer(self.OIDS, supportsStatistics=True)
+        query = {"where": "1=1", "out_fields": "*", "timeFilter": None,
+                 "geometryFilter": None}
+        plan = _queryplan.plan_query(layer, query)
+        oids = [f["attributes"]["OID"]
+                for page in plan.iter_pages(prefetch=0)
+                for f in page["features"]]
+        self.assertEqual(self.OIDS, oids)
+
+    def test_tiles_with_geometry_filter_is_refused(self):
+        layer = FakeLayer(self.OIDS)
+        envelope = {"xmin": 0, "ymin": 0, "xmax": 10, "ymax": 10}
+        query = {"where": "1=1",
+                 "geometryFilter": {"geometry": json.dumps(envelope)}}
+        self.assertRaises(ValueError, _queryplan.plan_query, layer, query,
+                          strategy="tiles")
+
+
+if __name__ == "__main__":
+    unittest.main()
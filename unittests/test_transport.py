@@ -0,0 +1,290 @@
+# coding: utf-8
+"""
+   Tests of the request rules of the web operations
+   (arcrest.web._base, arcrest.web._retry) on a stub HTTP handler that
+   answers from a list instead of the network.
+"""
+import io
+import json
+import asyncio
+import unittest
+import warnings
+import threading
+from http.client import HTTPMessage
+from urllib import request
+from urllib.error import HTTPError, URLError
+from urllib.response import addinfourl
+
+from arcrest.web import _base
+from arcrest.web._base import BaseWebOperations
+from arcrest.web._retry import RetryPolicy, default_retry
+from arcrest.web._ratelimit import RateLimiter
+from arcrest.web._cache import ResponseCache
+from arcrest.web._singleflight import SingleFlight
+
+URL = "http://example.com/arcgis/rest/services/Roads/FeatureServer/0"
+
+
+class StubHandler(request.HTTPHandler):
+    """
+    answers the requests with the given (code, content type, body) or
+    (code, content type, body, headers)
+    """
+
+    def __init__(self, *answers):
+        request.HTTPHandler.__init__(self)
+        self.answers = list(answers)
+        self.requests = []
+
+    def http_open(self, req):
+        self.requests.append(req)
+        answer = self.answers.pop(0)
+        code, content_type, body = answer[:3]
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        headers = HTTPMessage()
+        headers["Content-Type"] = content_type
+        headers["Content-Length"] = str(len(body))
+        for name, value in (answer[3] if len(answer) > 3 else {}).items():
+            headers[name] = value
+        resp = addinfourl(io.BytesIO(body), headers, req.full_url, code)
+        resp.msg = "OK" if code == 200 else "Error"
+        return resp
+
+
+def _operations():
+    operations = BaseWebOperations()
+    operations.retry_policy = RetryPolicy(backoff=0)
+    operations.rate_limiter = RateLimiter()
+    return operations
+
+
+class RetryTests(unittest.TestCase):
+
+    def _post(self, url, *answers):
+        handler = StubHandler(*answers)
+        result = _operations()._post(url, {"f": "json", "features": "[]"},
+                                     custom_handlers=[handler])
+        return handler, result
+
+    def test_read_only_posts_are_retried(self):
+        handler, result = self._post(URL + "/query",
+                                     (503, "text/html", b"busy"),
+                                     (200, "application/json",
+                                      {"features": []}))
+        self.assertEqual({"features": []}, result)
+        self.assertEqual(2, len(handler.requests))
+
+    def test_edits_are_not_retried(self):
+        for operation in ("applyEdits", "addFeatures", "deleteFeatures"):
+            handler = StubHandler((503, "text/html", b"busy"),
+                                  (200, "application/json", {}))
+            self.assertRaises(HTTPError, _operations()._post,
+                              URL + "/" + operation,
+                              {"f": "json", "features": "[]"},
+                              custom_handlers=[handler])
+            self.assertEqual(1, len(handler.requests))
+
+    def test_only_map_service_exports_are_idempotent(self):
+        portal = "https://example.com/sharing/rest/content/users/u/items/1"
+        self.assertFalse(default_retry.is_idempotent(
+            "POST", portal + "/export", {"f": "json", "exportFormat": "CSV"}))
+        self.assertTrue(default_retry.is_idempotent(
+            "POST", "https://example.com/arcgis/rest/services/Base/"
+                    "MapServer/export", {"f": "json", "bbox": "0,0,1,1"}))
+        self.assertTrue(default_retry.is_idempotent(
+            "POST", "https://example.com/arcgis/rest/services/Dem/"
+                    "ImageServer/exportImage/", {"f": "json"}))
+
+
+class CompressionTests(unittest.TestCase):
+    EDIT_ERROR = {"error": {"code": 400,
+                            "message": "Unable to complete operation.",
+                            "details": ["Invalid geometry."]}}
+
+    def setUp(self):
+        _base._body_encoding_support.clear()
+
+    tearDown = setUp
+
+    def _post(self, operation, *answers):
+        handler = StubHandler(*answers)
+        operations = _operations()
+        operations.request_compression = "gzip"
+        operations.request_compression_threshold = 0
+        result = operations._post(URL + "/" + operation,
+                                  {"f": "json", "features": "[]"},
+                                  custom_handlers=[handler])
+        return handler, result
+
+    def test_edit_error_is_returned_without_resending(self):
+        handler, result = self._post("applyEdits",
+                                     (200, "application/json",
+                                      self.EDIT_ERROR),
+                                     (200, "application/json", {}))
+        self.assertEqual(self.EDIT_ERROR, result)
+        self.assertEqual(1, len(handler.requests))
+        # says nothing about the encoding
+        self.assertNotIn("example.com", _base._body_encoding_support)
+
+    def test_rejected_edit_is_not_resent(self):
+        handler = StubHandler((415, "text/html", b"<html></html>"))
+        operations = _operations()
+        operations.request_compression = "gzip"
+        operations.request_compression_threshold = 0
+        self.assertRaises(HTTPError, operations._post, URL + "/addFeatures",
+                          {"f": "json", "features": "[]"},
+                          custom_handlers=[handler])
+        self.assertEqual(1, len(handler.requests))
+        self.assertIs(False, _base._body_encoding_support["example.com"])
+
+    def test_unread_query_is_resent_uncompressed(self):
+        handler, result = self._post("query",
+                                     (200, "text/html", b"<html></html>"),
+                                     (200, "application/json",
+                                      {"features": []}))
+        self.assertEqual({"features": []}, result)
+        self.assertEqual(["gzip", None],
+                         [r.get_header("Content-encoding")
+                          for r in handler.requests])
+        self.assertIs(False, _base._body_encoding_support["example.com"])
+
+    def test_clean_answer_marks_support(self):
+        handler, result = self._post("query",
+                                     (200, "application/json",
+                                      {"features": []}))
+        self.assertEqual(1, len(handler.requests))
+        self.assertIs(True, _base._body_encoding_support["example.com"])
+
+
+class ResponseCacheTests(unittest.TestCase):
+
+    def test_resource_loads_are_revalidated(self):
+        handler = StubHandler((200, "application/json", {"name": "Roads"},
+                               {"ETag": '"v1"'}),
+                              (304, "application/json", b"", {"ETag": '"v1"'}))
+        operations = _operations()
+        operations.response_cache = ResponseCache()
+        for _ in range(2):
+            self.assertEqual({"name": "Roads"},
+                             operations._get(URL, {"f": "json"},
+                                             handlers=[handler]))
+        self.assertEqual([None, '"v1"'],
+                         [r.get_header("If-none-match")
+                          for r in handler.requests])
+
+    def test_queries_are_not_cached(self):
+        handler = StubHandler((200, "application/json", {"features": []},
+                               {"ETag": '"v1"'}),
+                              (200, "application/json", {"features": [1]}))
+        operations = _operations()
+        operations.response_cache = ResponseCache()
+        results = [operations._get(URL + "/query",
+                                   {"f": "json", "where": "1=1"},
+                                   handlers=[handler]) for _ in range(2)]
+        self.assertEqual([{"features": []}, {"features": [1]}], results)
+        self.assertIsNone(handler.requests[1].get_header("If-none-match"))
+
+
+class SlowHandler(StubHandler):
+    """holds every answer until released"""
+
+    def __init__(self, *answers):
+        StubHandler.__init__(self, *answers)
+        self.entered = threading.Event()
+        self.released = threading.Event()
+
+    def http_open(self, req):
+        self.entered.set()
+        self.released.wait(5)
+        return StubHandler.http_open(self, req)
+
+
+class SingleFlightTests(unittest.TestCase):
+
+    def test_identical_calls_share_one_request(self):
+        handler = SlowHandler((200, "application/json", {"features": [1]}),
+                              (200, "application/json", {"features": [2]}))
+        operations = _operations()
+        operations.single_flight = SingleFlight()
+        results = []
+
+        def call():
+            results.append(operations._get(URL + "/query",
+                                           {"f": "json", "where": "1=1"},
+                                           handlers=[handler]))
+        first = threading.Thread(target=call)
+        first.start()
+        self.assertTrue(handler.entered.wait(5))
+        second = threading.Thread(target=call)
+        second.start()
+        # the second call waits for the first one's answer
+        second.join(0.2)
+        handler.released.set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual([{"features": [1]}] * 2, results)
+        self.assertEqual(1, len(handler.requests))
+        # results are copies, not the same dictionary
+        self.assertIsNot(results[0], results[1])
+
+
+class OpenerCacheTests(unittest.TestCase):
+
+    def test_anonymous_calls_reuse_the_opener(self):
+        handler = StubHandler((200, "application/json", {"a": 1}),
+                              (200, "application/json", {"a": 2}))
+        before = set(_base._openers)
+        self.assertEqual({"a": 1}, _operations()._post(
+            URL + "/query", {"where": "1=1"}, custom_handlers=[handler]))
+        self.assertEqual({"a": 2}, _operations()._post(
+            URL + "/query", {"where": "1=1"}, custom_handlers=[handler]))
+        # one opener built for both calls, with one cookie jar
+        self.assertEqual(1, len(set(_base._openers) - before))
+        self.assertIs(_operations()._processHandler(None, {})[2],
+                      _operations()._processHandler(None, {})[2])
+
+    def test_least_recently_used_openers_are_dropped(self):
+        operations = _operations()
+        first = operations._opener(custom_handlers=[StubHandler()])
+        key = next(reversed(_base._openers))
+        for i in range(_base._OPENER_CACHE_SIZE + 8):
+            # a recently used opener stays cached
+            self.assertIs(first, _base._openers[key])
+            operations._opener(custom_handlers=[StubHandler()])
+            _base._openers.move_to_end(key)
+        self.assertEqual(_base._OPENER_CACHE_SIZE, len(_base._openers))
+        self.assertIn(key, _base._openers)
+
+
+class AsyncTimeoutTests(unittest.TestCase):
+
+    def test_stalled_body_times_out(self):
+        async def answer(reader, writer):
+            await reader.readuntil(b"\r\n\r\n")
+            # the head arrives, the body never does
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json"
+                         b"\r\nContent-Length: 100\r\n\r\n{")
+            await writer.drain()
+            await asyncio.sleep(5)
+            writer.close()
+
+        async def run():
+            server = await asyncio.start_server(answer, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            operations = _operations()
+            operations.timeout = 0.2
+            try:
+                with self.assertRaises(URLError):
+                    await operations._aget(
+                        "http://127.0.0.1:%s/arcgis/rest/info" % port,
+                        {"f": "json"})
+            finally:
+                server.close()
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            asyncio.run(asyncio.wait_for(run(), 3))
+
+
+if __name__ == "__main__":
+    unittest.main()